@@ -1,65 +1,208 @@
+import hmac
 import os
 import sqlite3
-from datetime import datetime
-from flask import Flask, request, jsonify
-from app.graph_builder import create_graph
-from app.llm_config import get_embedding, get_groq_llm
-from app.prompt import CLASSIFICATION_PROMPT_TEMPLATE, CONDENS_QUESTION_PROMPT_TEMPLATE, GENERAL_CHAT_PROMPT_TEMPLATE, RAG_PROMPT_TEMPLATE
-from app.vectorstore import get_or_create_vector_store
-from langchain_core.messages import HumanMessage
+import json
+import time
+import uuid
+from contextlib import ExitStack, nullcontext
+from flask import Flask, Response, request, jsonify, stream_with_context
+from app.admission import AdmissionController, AdmissionRejected
+from app.answer_cache import AnswerCache
+from app.batch import DEFAULT_BATCH_CONCURRENCY, run_batch, validate_batch_items
+from app.chat_templates import CHAT_TEMPLATES_ENABLED, ChatTemplateEngine
+from app.chunk_resolver import ChunkResolver
+from app.embedding_batcher import BatchedEmbeddings
+from app.graph_builder import build_chat_inputs, create_graph, extract_answer, normalize_question
+from app.ingest_jobs import IngestJobManager
+from app.llm_config import get_embedding
+from app.llm_gateway import gateway_stats, get_node_llms
+from app.reranker import CrossEncoderReranker
+from app.serde import SERDE_FORMAT, get_checkpoint_serde
+from app.retrieval import CategoryAwareRetriever, SwappableRetriever
+from app.singleflight import SingleFlight
+from app.query_log import QUERY_LOG_ENABLED, QueryLog, build_entry
+from app.prompt import CLASSIFICATION_PROMPT_TEMPLATE, CONDENS_QUESTION_PROMPT_TEMPLATE, GENERAL_CHAT_PROMPT_TEMPLATE, RAG_PREFIX_CACHE_PROMPT_TEMPLATE, RAG_PROMPT_TEMPLATE
+from app.vector_versions import DEFAULT_RELEASE_DELAY_S, VersionWatcher, close_vector_store, load_current_vector_store
+from app.tenants import DEFAULT_TENANT, TenantNotFound, TenantRegistry, list_tenants
+from app.vectorstore import get_document_id
+from app.warmup import WARMUP_ENABLED, WarmupRunner
 from langchain_core.globals import set_llm_cache
 from langchain_community.cache import SQLiteCache
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.checkpoint.sqlite import SqliteSaver
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Setup Cache agar hemat biaya API
 set_llm_cache(SQLiteCache(database_path=".langchain_cache.sqlite"))
 
 app = Flask(__name__)
 CORS(app)
+# Di belakang reverse proxy: alamat client diambil dari X-Forwarded-For sebanyak jumlah proxy tepercaya
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+if TRUSTED_PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
 
 # Global variables
 app_graph = None
+embedding_model = None
+answer_cache = None
+
+# "prefix_cache": prompt RAG disusun dari bagian statis ke dinamis agar prefix-nya bisa di-cache provider
+PROMPT_ASSEMBLY = os.getenv("PROMPT_ASSEMBLY", "prefix_cache")
+
+# Pertanyaan pertama yang identik dan datang bersamaan cukup dijalankan sekali
+COALESCE_REQUESTS = os.getenv("CHAT_COALESCE", "1") == "1"
+inflight_requests = SingleFlight()
+
+# Batas request global & per client (antrean FIFO terbatas), giliran per thread_id berurutan
+ADMISSION_ENABLED = os.getenv("ADMISSION_CONTROL", "1") == "1"
+admission = AdmissionController()
+# Secret bersama untuk frontend yang boleh menentukan X-Client-Id sendiri
+CLIENT_ID_TOKEN = os.getenv("CLIENT_ID_TOKEN")
+
+# Retriever aktif bisa ditukar oleh job ingest tanpa restart server
+retriever_holder = SwappableRetriever()
+retrieval_k = 15
+# k menjadi batas atas; hasil dipotong saat skor relevansi anjlok (dimatikan jika reranker aktif).
+# Default mati: kalibrasi RETRIEVAL_SCORE_THRESHOLD dulu dengan `python -m benchmarks.adaptive_k`
+adaptive_k = os.getenv("RETRIEVAL_ADAPTIVE_K", "0") == "1"
+ingest_jobs = None
+version_watcher = None
+# Prodi lain (tenant) dimuat lazy dari vector_store_tenants/<tenant>/, berbagi model & cache
+tenant_registry = None
+# Warm-up cache di background; /ready 200 setelah pertanyaan teratas ter-warm-up atau batas waktunya lewat
+warmup_runner = None
+# State graph hanya menyimpan ID chunk; teks dimuat dari cache in-process / vector store aktif
+chunk_resolver = ChunkResolver(get_vector_store=lambda: getattr(retriever_holder.inner, "vector_store", None))
+# Sapaan/terima kasih dijawab dari template tanpa LLM
+template_engine = ChatTemplateEngine() if CHAT_TEMPLATES_ENABLED else None
+# Pertanyaan, route, chunk & timings dicatat di background (antrean + batch insert SQLite)
+query_log = QueryLog() if QUERY_LOG_ENABLED else None
+# Endpoint /ingest/jobs mewajibkan header X-Ingest-Token; tanpa INGEST_API_TOKEN endpoint ditolak
+INGEST_API_TOKEN = os.getenv("INGEST_API_TOKEN")
+
+def build_retriever(vector_store):
+    # Pencarian dipersempit ke kategori/sumber yang terdeteksi dari pertanyaan
+    return CategoryAwareRetriever(
+        vector_store=vector_store,
+        k=retrieval_k,
+        use_metadata_filter=os.getenv("RETRIEVAL_METADATA_FILTER", "1") == "1",
+        adaptive_k=adaptive_k,
+        min_k=int(os.getenv("RETRIEVAL_MIN_K", "3")),
+        score_threshold=float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.3")),
+        score_gap=float(os.getenv("RETRIEVAL_SCORE_GAP", "0.15")),
+    )
+
+def swap_vector_store(vector_store):
+    """Tukar retriever ke vector store baru, lalu tutup store lama setelah request yang memakainya selesai."""
+    previous = getattr(retriever_holder.inner, "vector_store", None)
+    retriever_holder.swap(build_retriever(vector_store))
+    if previous is not None and previous is not vector_store:
+        close_vector_store(previous, delay_s=DEFAULT_RELEASE_DELAY_S)
+
+def on_ingest_ready(vector_store, job):
+    """Dipanggil worker ingest setelah index baru dipublikasikan (lewat version_watcher.publish)."""
+    swap_vector_store(vector_store)
+    if answer_cache:
+        answer_cache.invalidate_sources(job.changed_sources)
+    print(f"🔁 Retriever ditukar ke index hasil job {job.id}")
+    if warmup_runner:
+        warmup_runner.start(reason=f"ingest {job.id}")
+
+def on_version_published(vector_store, version_dir):
+    """Versi baru dipublikasikan proses lain (script ingest): tukar retriever tanpa restart."""
+    swap_vector_store(vector_store)
+    if warmup_runner:
+        warmup_runner.start(reason="version")
 
 def initialize_chatbot():
     """Inisialisasi komponen chatbot sekali saja saat startup."""
+    global embedding_model, answer_cache, retrieval_k, adaptive_k, ingest_jobs, version_watcher, warmup_runner, tenant_registry
     print("🚀 Memulai inisialisasi Chatbot...")
     
     # 1. Setup LLM & Embedding
-    llm = get_groq_llm(model_name="llama-3.1-8b-instant", temperature=0.1)
-    embedding_model = get_embedding()
+    # Semua panggilan LLM lewat gateway: pooling, rate limit, retry, hedging & failover ke Ollama
+    # Model, max_tokens & stop sequence per node (klasifikasi/condense jauh lebih murah)
+    node_llms = get_node_llms()
+    # Query dari request yang bersamaan digabung menjadi satu forward pass
+    embedding_model = BatchedEmbeddings(get_embedding())
 
     # 2. Setup Vector Store (Mode Load Only)
     # Pastikan Anda sudah menjalankan script ingest data sebelumnya
-    vector_store = get_or_create_vector_store(
-        embedding_model=embedding_model,
-        documents=None, 
-        force_rebuild=False
-    )
+    # Versi aktif dibaca dari pointer vector_store_versions/CURRENT (fallback ke vector_store/)
+    vector_store = load_current_vector_store(embedding_model)
     
-    retriever = None
+    # Reranker opsional: ambil kandidat lebar secara murah, lalu cross-encoder memilih top-N
+    reranker = None
+    if os.getenv("RERANKER_ENABLED", "0") == "1":
+        reranker = CrossEncoderReranker(top_n=int(os.getenv("RERANK_TOP_N", "4")))
+        retrieval_k = int(os.getenv("RERANK_CANDIDATES", "30"))
+        # Reranker butuh kandidat lebar; pemotongan dilakukan oleh reranker (top-N)
+        adaptive_k = False
+
+    # Cache jawaban per (pertanyaan ter-condense + chunk), di-invalidate per sumber saat ingest
+    if os.getenv("ANSWER_CACHE", "1") == "1":
+        answer_cache = AnswerCache(serde=get_checkpoint_serde() if SERDE_FORMAT == "compact" else None)
+
     if not vector_store:
         print("⚠️ Vector Store kosong/gagal dimuat. Chatbot hanya bisa menjawab pertanyaan umum.")
     else:
-        retriever = vector_store.as_retriever(
-            search_type="similarity", 
-            search_kwargs={"k": 15}
-        )
+        retriever_holder.swap(build_retriever(vector_store))
+
+    # Hot reload jika pointer versi dipindah oleh script ingest di luar proses server
+    version_watcher = VersionWatcher(embedding_model, on_change=on_version_published).start()
+    # Ingest berjalan di worker terpisah; embed_documents melewati batcher, query tetap di-batch.
+    # Versi hasil job dipublikasikan lewat watcher agar tidak ikut di-hot-reload lagi
+    ingest_jobs = IngestJobManager(
+        embedding_model=embedding_model,
+        on_ready=on_ingest_ready,
+        get_live_store=lambda: getattr(retriever_holder.inner, "vector_store", None),
+        publish=version_watcher.publish,
+    )
 
     # 3. Build Graph
     # Memory persistence biasanya ditangani di dalam create_graph menggunakan MemorySaver/Checkpointer
     conn = sqlite3.connect('chat_history.sqlite', check_same_thread=False)
-    memory = SqliteSaver(conn)
+    # Checkpoint ditulis sebagai msgpack ringkas + zstd; checkpoint lama (JsonPlus) tetap terbaca
+    memory = SqliteSaver(conn, serde=get_checkpoint_serde())
 
-    graph = create_graph(
-        llm=llm,
-        retriever=retriever,
-        rag_prompt=RAG_PROMPT_TEMPLATE,
+    graph_kwargs = dict(
+        # `llm` hanya default untuk node yang tidak ada di node_llms; pakai gateway jawaban yang sama
+        llm=node_llms["answer_rag"],
+        retriever=retriever_holder,
+        rag_prompt=RAG_PREFIX_CACHE_PROMPT_TEMPLATE if PROMPT_ASSEMBLY == "prefix_cache" else RAG_PROMPT_TEMPLATE,
         condense_prompt=CONDENS_QUESTION_PROMPT_TEMPLATE,
         classification_prompt=CLASSIFICATION_PROMPT_TEMPLATE,
         general_chat_prompt=GENERAL_CHAT_PROMPT_TEMPLATE,
-        memory=memory
+        reranker=reranker,
+        node_llms=node_llms,
+        prompt_assembly=PROMPT_ASSEMBLY,
+        answer_cache=answer_cache,
+        chunk_resolver=chunk_resolver,
     )
+    graph = create_graph(**graph_kwargs, memory=memory, template_engine=template_engine)
+
+    # Graph per tenant: retriever & resolver sendiri, sisanya (LLM, embedding, checkpointer, cache) bersama
+    tenant_registry = TenantRegistry(
+        embedding_model,
+        build_retriever=build_retriever,
+        build_graph=lambda retriever, resolver: create_graph(
+            **{**graph_kwargs, "retriever": retriever, "chunk_resolver": resolver},
+            memory=memory,
+            template_engine=template_engine,
+        ),
+    ).start()
+
+    # Warm-up memakai cache yang sama, tapi checkpoint di memori agar riwayat chat asli bersih
+    # (thread warm-up dihapus setelah tiap pertanyaan, jadi MemorySaver ini tidak terus membesar)
+    if WARMUP_ENABLED:
+        warmup_graph = create_graph(**graph_kwargs, memory=MemorySaver())
+        warmup_runner = WarmupRunner(
+            warmup_graph,
+            # Melambat (tidak berhenti) selama ada request /chat yang sedang diproses
+            is_busy=lambda: admission.in_flight > 0 or inflight_requests.stats()["in_flight"] > 0,
+        ).start()
     
     print("✅ Chatbot Siap!")
     return graph
@@ -70,6 +213,91 @@ try:
 except Exception as e:
     print(f"❌ Gagal inisialisasi app: {e}")
 
+def get_client_id():
+    """
+    Identitas client untuk batas per client: alamat IP (sudah dikoreksi ProxyFix jika
+    TRUSTED_PROXY_COUNT di-set). X-Client-Id hanya dipercaya jika disertai
+    X-Client-Token yang cocok dengan CLIENT_ID_TOKEN (misal frontend tepercaya),
+    karena header tanpa autentikasi bisa diganti-ganti untuk mendapat kuota baru.
+    """
+    client_id = request.headers.get("X-Client-Id")
+    token = request.headers.get("X-Client-Token") or ""
+    if client_id and CLIENT_ID_TOKEN and hmac.compare_digest(token.encode(), CLIENT_ID_TOKEN.encode()):
+        return f"id:{client_id}"
+    return f"ip:{request.remote_addr or 'unknown'}"
+
+def admit_chat(client_id, thread_id):
+    if not ADMISSION_ENABLED:
+        return nullcontext()
+    return admission.admit(client_id, thread_id)
+
+def admission_rejected_response(error):
+    messages = {
+        429: "Terlalu banyak request dari client/thread ini, coba lagi sebentar lagi.",
+        503: "Server sedang sibuk, coba lagi sebentar lagi.",
+    }
+    response = jsonify({"error": messages[error.status], "reason": error.reason, "retry_after": error.retry_after})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, error.status
+
+def resolve_tenant(tenant_key):
+    """
+    Graph & resolver chunk untuk tenant. Tenant bawaan (atau kosong) memakai graph utama.
+    Raise TenantNotFound jika tenant tidak dikenal.
+    """
+    if not tenant_key or tenant_key == DEFAULT_TENANT:
+        return app_graph, chunk_resolver, None
+    tenant = tenant_registry.get(tenant_key)
+    return tenant.graph, tenant.chunk_resolver, tenant.key
+
+def tenant_thread_id(tenant_key, thread_id):
+    # Checkpointer dipakai bersama; thread milik tenant lain diberi prefix agar tidak bertabrakan
+    return f"{tenant_key}:{thread_id}" if tenant_key else thread_id
+
+def invalid_thread_id(thread_id):
+    """
+    Pesan error jika thread_id dari client tidak valid, selain itu None. ':' ditolak
+    karena dipakai sebagai pemisah prefix tenant: tanpa itu thread "prodi:abc" di
+    tenant bawaan sama dengan thread "abc" milik tenant "prodi".
+    """
+    if not isinstance(thread_id, str):
+        return "'thread_id' harus berupa string"
+    if ":" in thread_id:
+        return "'thread_id' tidak boleh mengandung ':'"
+    return None
+
+def save_shared_turn(graph, config, inputs, result):
+    """
+    Menyimpan hasil pipeline milik request lain ke checkpoint thread ini,
+    seolah-olah graph dijalankan sendiri untuk thread tersebut.
+    """
+    last_node = {
+        "rag_query": "generate_answer_rag",
+        "template": "generate_answer_template",
+    }.get(result.get("query_type"), "generate_answer_general")
+    values = {key: value for key, value in result.items() if key != "messages"}
+    values["messages"] = inputs["messages"] + [result["messages"][-1].model_copy()]
+    graph.update_state(config, values, as_node=last_node)
+    return {**result, "messages": values["messages"]}
+
+def run_chat_turn(user_message, inputs, config, graph=None, tenant_key=None):
+    graph = graph or app_graph
+    if not COALESCE_REQUESTS:
+        return graph.invoke(inputs, config=config)
+
+    # Hanya giliran pertama (tanpa riwayat) yang aman untuk dipakai bersama
+    has_history = bool(graph.get_state(config).values.get("messages"))
+    if has_history:
+        return graph.invoke(inputs, config=config)
+
+    result, shared = inflight_requests.do(
+        f"{tenant_key or ''}\n{normalize_question(user_message)}",
+        lambda: graph.invoke(inputs, config=config),
+    )
+    if shared:
+        result = save_shared_turn(graph, config, inputs, result)
+    return result
+
 @app.route("/chat", methods=["POST"])
 def chat():
     if not app_graph:
@@ -80,64 +308,147 @@ def chat():
         return jsonify({"error": "Invalid JSON body"}), 400
 
     user_message = data.get("message")
-    thread_id = data.get("thread_id", "default_thread")
+    # Tanpa thread_id, setiap request mendapat thread baru (bukan thread bersama)
+    thread_id = data.get("thread_id") or uuid.uuid4().hex
+    include_contexts = bool(data.get("include_contexts", False))
 
     if not user_message:
         return jsonify({"error": "No message provided"}), 400
+    error = invalid_thread_id(thread_id)
+    if error:
+        return jsonify({"error": error}), 400
+
+    tenant = data.get("tenant") or request.headers.get("X-Tenant")
+    if not isinstance(tenant, (str, type(None))):
+        return jsonify({"error": "'tenant' harus berupa string"}), 400
+    try:
+        graph, resolver, tenant_key = resolve_tenant(tenant)
+    except TenantNotFound as e:
+        return jsonify({"error": str(e)}), 404
 
     # Konfigurasi untuk session/memory per user
-    config = {"configurable": {"thread_id": thread_id}}
+    config = {"configurable": {"thread_id": tenant_thread_id(tenant_key, thread_id)}}
+    start = time.perf_counter()
     
     try:
         # Input state: Sesuaikan dengan definisi GraphState Anda
         # Kita perlu mengirimkan 'messages' karena node di graph mengakses state["messages"][-1]
-        inputs = {
-            "question": user_message,
-            "messages": [HumanMessage(content=user_message, additional_kwargs={"timestamp": datetime.now().isoformat()})]
-        }
+        inputs = build_chat_inputs(user_message)
         
         # Gunakan .invoke() untuk mendapatkan hasil akhir secara langsung
         # .stream() lebih cocok jika Anda menggunakan WebSocket atau Server-Sent Events (SSE)
-        result = app_graph.invoke(inputs, config=config)
+        with admit_chat(get_client_id(), config["configurable"]["thread_id"]):
+            result = run_chat_turn(user_message, inputs, config, graph, tenant_key)
+        if tenant_key:
+            tenant_registry.record(tenant_key, (time.perf_counter() - start) * 1000)
+        if query_log:
+            query_log.record(build_entry(user_message, result, (time.perf_counter() - start) * 1000, thread_id, tenant=tenant_key))
         
         # Logika Ekstraksi Jawaban (Menangani berbagai kemungkinan output state)
-        ai_response = ""
-        timestamp = datetime.now().isoformat()
-        msg_id = None
-        
-        # Prioritas 1: Jika output ada di key 'generation' (umum untuk RAG graph sederhana)
-        if "generation" in result and result["generation"]:
-            ai_response = result["generation"]
-            
-        # Prioritas 2: Jika output ada di key 'answer'
-        elif "answer" in result and result["answer"]:
-            ai_response = result["answer"]
-            
-        # Prioritas 3: Jika output ada di list 'messages' (umum untuk Chat graph)
-        elif "messages" in result and len(result["messages"]) > 0:
-            last_message = result["messages"][-1]
-            ai_response = last_message.content
-            msg_id = getattr(last_message, "id", None)
-            if hasattr(last_message, "additional_kwargs"):
-                timestamp = last_message.additional_kwargs.get("timestamp", timestamp)
-            
-        else:
-            ai_response = "Maaf, sistem tidak dapat menghasilkan jawaban (Format output tidak dikenali)."
+        answer = extract_answer(result)
+        ai_response = answer["content"]
+        timestamp = answer["timestamp"]
         
-        return jsonify({
+        response = {
             "response": ai_response,
             "thread_id": thread_id,
             "message": {
                 "role": "assistant",
                 "content": ai_response,
                 "timestamp": timestamp
-            }
-        })
+            },
+            "timings": result.get("timings", {}),
+            "prompt_cache": result.get("prompt_cache", {}),
+            "doc_refs": result.get("doc_refs", []),
+        }
+        # Teks konteks hanya dimuat jika diminta (evaluasi / debugging)
+        if include_contexts:
+            scores = {ref["id"]: ref["score"] for ref in response["doc_refs"]}
+            response["contexts"] = [
+                {
+                    "id": get_document_id(doc),
+                    "score": scores.get(get_document_id(doc)),
+                    "source": doc.metadata.get("source"),
+                    "content": doc.page_content,
+                }
+                for doc in resolver.resolve(response["doc_refs"])
+            ]
+        return jsonify(response)
 
+    except AdmissionRejected as e:
+        return admission_rejected_response(e)
     except Exception as e:
         print(f"Error processing chat: {e}")
+        if tenant_key:
+            tenant_registry.record(tenant_key, (time.perf_counter() - start) * 1000, error=True)
+        if query_log:
+            query_log.record(build_entry(user_message, thread_id=thread_id, error=str(e), tenant=tenant_key))
         return jsonify({"error": str(e)}), 500
 
+@app.route("/chat/batch", methods=["POST"])
+def chat_batch():
+    """
+    Banyak pertanyaan sekaligus: {"items": [{"thread_id", "message"}, ...], "max_concurrency"}.
+    Hasil dikirim sebagai NDJSON (satu baris JSON per item) begitu selesai.
+
+    Yang di-batch hanya embedding: pesan pertama tiap thread di-embed dalam satu
+    forward pass. Retrieval dan generasi tetap berjalan per item (paralel sampai
+    `max_concurrency`, berurutan dalam satu thread). Pesan berikutnya dalam thread,
+    atau pesan untuk thread_id yang sudah punya riwayat, di-condense dulu sehingga
+    embedding hasil prime tidak terpakai dan query di-embed seperti /chat biasa.
+    """
+    if not app_graph:
+        return jsonify({"error": "Chatbot not initialized properly"}), 500
+
+    data = request.json
+    if not data:
+        return jsonify({"error": "Invalid JSON body"}), 400
+
+    items = data.get("items")
+    error = validate_batch_items(items)
+    if not error:
+        # Thread batch memakai checkpointer yang sama dengan /chat tenant bawaan
+        errors = [invalid_thread_id(item["thread_id"]) for item in items if item.get("thread_id")]
+        error = next((e for e in errors if e), None)
+    if error:
+        return jsonify({"error": error}), 400
+    try:
+        max_concurrency = int(data.get("max_concurrency", DEFAULT_BATCH_CONCURRENCY))
+    except (TypeError, ValueError):
+        return jsonify({"error": "'max_concurrency' harus berupa bilangan bulat"}), 400
+    if max_concurrency < 1:
+        return jsonify({"error": "'max_concurrency' minimal 1"}), 400
+    max_concurrency = min(max_concurrency, DEFAULT_BATCH_CONCURRENCY)
+
+    # Satu batch memakai satu jatah per client selama stream berjalan, sehingga satu
+    # client tidak bisa membuka banyak batch sekaligus untuk menghabiskan slot global
+    client_hold = ExitStack()
+    if ADMISSION_ENABLED:
+        try:
+            client_hold.enter_context(admission.hold_client(get_client_id()))
+        except AdmissionRejected as e:
+            return admission_rejected_response(e)
+
+    def generate():
+        # Item batch berbagi slot global & kunci thread dengan /chat; jatah client dipegang request ini
+        admit = lambda thread_id: admit_chat(None, thread_id)
+        for result in run_batch(app_graph, items, max_concurrency, embedding_model, admit):
+            if query_log:
+                query_log.record(build_entry(
+                    result["message"],
+                    {"query_type": result.get("query_type"), "doc_refs": result.get("doc_refs"), "timings": result.get("timings")},
+                    result.get("latency_ms"),
+                    result["thread_id"],
+                    source="batch",
+                    error=result.get("error"),
+                ))
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    response = Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    # Dilepas saat response ditutup, termasuk jika client memutus sebelum stream dimulai
+    response.call_on_close(client_hold.close)
+    return response
+
 @app.route("/history", methods=["GET"])
 def get_history():
     if not app_graph:
@@ -146,12 +457,20 @@ def get_history():
     thread_id = request.args.get("thread_id")
     if not thread_id:
         return jsonify({"error": "Missing thread_id parameter"}), 400
+    error = invalid_thread_id(thread_id)
+    if error:
+        return jsonify({"error": error}), 400
 
-    config = {"configurable": {"thread_id": thread_id}}
+    try:
+        graph, _, tenant_key = resolve_tenant(request.args.get("tenant") or request.headers.get("X-Tenant"))
+    except TenantNotFound as e:
+        return jsonify({"error": str(e)}), 404
+
+    config = {"configurable": {"thread_id": tenant_thread_id(tenant_key, thread_id)}}
     
     try:
         # Ambil state terakhir dari graph untuk thread_id tersebut
-        state_snapshot = app_graph.get_state(config)
+        state_snapshot = graph.get_state(config)
         
         # Cek apakah ada state/values
         if not state_snapshot.values:
@@ -183,5 +502,79 @@ def get_history():
         print(f"Error retrieving history: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    data = {}
+    if embedding_model:
+        data["embedding_batcher"] = embedding_model.stats()
+    data["singleflight"] = inflight_requests.stats()
+    data["llm"] = gateway_stats()
+    if answer_cache:
+        data["answer_cache"] = answer_cache.stats()
+    data["chunk_resolver"] = chunk_resolver.stats()
+    if template_engine:
+        data["chat_templates"] = template_engine.stats()
+    if warmup_runner:
+        data["warmup"] = warmup_runner.status()
+    if query_log:
+        data["query_log"] = query_log.stats()
+    if ADMISSION_ENABLED:
+        data["admission"] = admission.stats()
+    if tenant_registry:
+        data["tenants"] = {**tenant_registry.stats(), "available": list_tenants(tenant_registry.root)}
+    return jsonify(data)
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness check: 503 sampai graph siap dan pertanyaan teratas ter-warm-up (atau batas waktunya lewat)."""
+    warmup = warmup_runner.status() if warmup_runner else None
+    is_ready = bool(app_graph) and (warmup_runner is None or warmup_runner.ready)
+    return jsonify({"ready": is_ready, "warmup": warmup}), 200 if is_ready else 503
+
+def ingest_authorized():
+    # Tanpa token yang dikonfigurasi, endpoint ingest nonaktif
+    token = request.headers.get("X-Ingest-Token") or ""
+    return bool(INGEST_API_TOKEN) and hmac.compare_digest(token.encode(), INGEST_API_TOKEN.encode())
+
+@app.route("/ingest/jobs", methods=["POST"])
+def create_ingest_job():
+    if not ingest_jobs:
+        return jsonify({"error": "Chatbot not initialized properly"}), 500
+    if not ingest_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.json
+    if not data or not data.get("type") or not data.get("path"):
+        return jsonify({"error": "Body harus berisi 'type' dan 'path'"}), 400
+
+    try:
+        job = ingest_jobs.submit(data["type"], data["path"])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.to_dict()), 202
+
+@app.route("/ingest/jobs", methods=["GET"])
+def list_ingest_jobs():
+    if not ingest_jobs:
+        return jsonify({"error": "Chatbot not initialized properly"}), 500
+    return jsonify({"jobs": [job.to_dict() for job in ingest_jobs.list()]})
+
+@app.route("/ingest/jobs/<job_id>", methods=["GET"])
+def get_ingest_job(job_id):
+    job = ingest_jobs.get(job_id) if ingest_jobs else None
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route("/ingest/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_ingest_job(job_id):
+    if not ingest_jobs:
+        return jsonify({"error": "Chatbot not initialized properly"}), 500
+    if not ingest_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    if not ingest_jobs.cancel(job_id):
+        return jsonify({"error": "Job not found or already finished"}), 409
+    return jsonify(ingest_jobs.get(job_id).to_dict())
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", debug=True, port=5000)
@@ -1,12 +1,22 @@
 # ingest.py
+from app.answer_cache import AnswerCache, changed_sources, store_source_chunk_ids
 from app.document_processor import process_document_for_rag
-from app.vectorstore import get_or_create_vector_store
+from app.vector_versions import build_version, close_vector_store, current_version_dir, open_vector_store
 from app.llm_config import get_embedding
 
 if __name__ == "__main__":
     print("🔄 Memulai update dokumen...")
     chunks = process_document_for_rag(local_dir="./documents")
     embed_model = get_embedding()
-    # Force rebuild = True untuk memastikan data bersih
-    get_or_create_vector_store(embed_model, chunks, force_rebuild=True)
-    print("✅ Update selesai!")
\ No newline at end of file
+    live_dir = current_version_dir()
+    live_chunk_ids = {}
+    if live_dir:
+        live_store = open_vector_store(live_dir, embed_model)
+        live_chunk_ids = store_source_chunk_ids(live_store)
+        close_vector_store(live_store)
+    # Dibangun sebagai versi baru; server yang berjalan hot-reload setelah pointer dipindah
+    vector_store = build_version(embed_model, chunks)
+    if vector_store:
+        # Sumber yang chunk-nya tidak berubah menghasilkan kunci cache yang sama
+        AnswerCache().invalidate_sources(changed_sources(live_chunk_ids, store_source_chunk_ids(vector_store)))
+    print("✅ Update selesai!")
@@ -0,0 +1,192 @@
+import math
+import os
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional
+
+DEFAULT_MAX_INFLIGHT = int(os.getenv("ADMISSION_MAX_INFLIGHT", "8"))
+DEFAULT_MAX_PER_CLIENT = int(os.getenv("ADMISSION_MAX_PER_CLIENT", "2"))
+DEFAULT_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+DEFAULT_MAX_WAIT_S = float(os.getenv("ADMISSION_MAX_WAIT_S", "10"))
+
+
+class AdmissionRejected(Exception):
+    """Request ditolak; `status` 429 (batas per client/thread) atau 503 (server penuh)."""
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _ThreadLock:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.users = 0
+
+
+class AdmissionController:
+    """
+    Admission control untuk /chat:
+
+    - maksimal `max_per_client` request aktif (berjalan + menunggu) per client -> 429;
+    - giliran dalam satu thread_id dijalankan bergantian agar checkpoint tidak balapan;
+    - maksimal `max_inflight` request berjalan bersamaan; sisanya antre FIFO
+      (maks `max_queue`, tunggu maks `max_wait_s`) -> 503 jika penuh/timeout.
+
+    Penolakan selalu cepat dan disertai perkiraan Retry-After dari rata-rata
+    lama layanan, sehingga saat overload client menerima 429/503, bukan timeout.
+    Request yang menjalankan banyak giliran sendiri (/chat/batch) memegang jatah
+    client lewat `hold_client` selama request berjalan.
+    """
+
+    def __init__(
+        self,
+        max_inflight: int = DEFAULT_MAX_INFLIGHT,
+        max_per_client: int = DEFAULT_MAX_PER_CLIENT,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_wait_s: float = DEFAULT_MAX_WAIT_S,
+    ):
+        self.max_inflight = max_inflight
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+
+        self._cond = threading.Condition()
+        self._queue: Deque[object] = deque()
+        self._inflight = 0
+        self._clients: Counter = Counter()
+        self._threads: Dict[str, _ThreadLock] = {}
+
+        self._admitted = 0
+        self._rejected: Counter = Counter()
+        self._total_wait_ms = 0.0
+        self._avg_service_s = 1.0  # EWMA lama layanan, untuk Retry-After
+
+    @property
+    def in_flight(self) -> int:
+        return self._inflight
+
+    def _retry_after(self, depth: int) -> int:
+        # Perkiraan waktu sampai antrean sedalam `depth` habis diproses
+        return max(1, math.ceil(self._avg_service_s * (depth + 1) / max(1, self.max_inflight)))
+
+    def _reject(self, status: int, reason: str, depth: int) -> AdmissionRejected:
+        self._rejected[reason] += 1
+        return AdmissionRejected(status, reason, self._retry_after(depth))
+
+    def _enter_client(self, client_id: str) -> None:
+        # Dipanggil dengan self._cond terkunci
+        if self._clients[client_id] >= self.max_per_client:
+            raise self._reject(429, "client_limit", len(self._queue))
+        self._clients[client_id] += 1
+
+    def _exit_client(self, client_id: str) -> None:
+        # Dipanggil dengan self._cond terkunci
+        self._clients[client_id] -= 1
+        if self._clients[client_id] <= 0:
+            del self._clients[client_id]
+
+    @contextmanager
+    def hold_client(self, client_id: str) -> Iterator[None]:
+        """
+        Memakai satu jatah `max_per_client` tanpa mengambil slot, misal selama satu
+        stream /chat/batch yang item-itemnya masuk lewat `admit(None, thread_id)`.
+        """
+        with self._cond:
+            self._enter_client(client_id)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._exit_client(client_id)
+
+    @contextmanager
+    def admit(self, client_id: Optional[str] = None, thread_id: Optional[str] = None) -> Iterator[None]:
+        """
+        Context manager di sekitar satu giliran chat. `client_id=None` melewati batas
+        per client; pemanggilnya harus sudah memegang jatah client (lihat `hold_client`).
+        """
+        deadline = time.monotonic() + self.max_wait_s
+        with self._cond:
+            if client_id is not None:
+                self._enter_client(client_id)
+            if thread_id is not None:
+                thread_lock = self._threads.setdefault(thread_id, _ThreadLock())
+                thread_lock.users += 1
+
+        slot = False
+        thread_locked = False
+        try:
+            if thread_id is not None:
+                thread_locked = thread_lock.lock.acquire(timeout=max(0.0, deadline - time.monotonic()))
+                if not thread_locked:
+                    with self._cond:
+                        raise self._reject(429, "thread_busy", len(self._queue))
+
+            self._acquire_slot(deadline)
+            slot = True
+            start = time.monotonic()
+            yield
+            elapsed = time.monotonic() - start
+            with self._cond:
+                self._avg_service_s = 0.8 * self._avg_service_s + 0.2 * elapsed
+        finally:
+            with self._cond:
+                if slot:
+                    self._inflight -= 1
+                    self._cond.notify_all()
+                if client_id is not None:
+                    self._exit_client(client_id)
+                if thread_id is not None:
+                    if thread_locked:
+                        thread_lock.lock.release()
+                    thread_lock.users -= 1
+                    if thread_lock.users == 0:
+                        del self._threads[thread_id]
+
+    def _acquire_slot(self, deadline: float) -> None:
+        enqueued_at = time.monotonic()
+        with self._cond:
+            if self._inflight < self.max_inflight and not self._queue:
+                self._inflight += 1
+                self._admitted += 1
+                return
+            if len(self._queue) >= self.max_queue:
+                raise self._reject(503, "queue_full", len(self._queue))
+
+            ticket = object()
+            self._queue.append(ticket)
+            try:
+                # FIFO: hanya kepala antrean yang boleh mengambil slot
+                while not (self._queue[0] is ticket and self._inflight < self.max_inflight):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject(503, "queue_timeout", len(self._queue))
+                    self._cond.wait(remaining)
+                self._inflight += 1
+                self._admitted += 1
+                self._total_wait_ms += (time.monotonic() - enqueued_at) * 1000
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "in_flight": self._inflight,
+                "queue_depth": len(self._queue),
+                "max_inflight": self.max_inflight,
+                "max_queue": self.max_queue,
+                "max_per_client": self.max_per_client,
+                "active_clients": len(self._clients),
+                "active_threads": len(self._threads),
+                "admitted": self._admitted,
+                "rejected": sum(self._rejected.values()),
+                "rejected_by_reason": dict(self._rejected),
+                "avg_queue_wait_ms": round(self._total_wait_ms / self._admitted, 2) if self._admitted else 0.0,
+                "avg_service_ms": round(self._avg_service_s * 1000, 1),
+            }
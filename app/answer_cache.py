@@ -0,0 +1,209 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from app.dedup import MERGED_SEPARATOR, MERGED_SOURCES_KEY, chunk_source
+from app.graph_builder import normalize_question
+from app.serde import CompactSerializer
+from app.vectorstore import get_document_id
+
+DEFAULT_ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", ".answer_cache.sqlite")
+DEFAULT_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2000"))
+
+
+def get_document_source(doc: Document) -> str:
+    """Sumber yang menjadi dependensi jawaban: file ingest (JSON/PDF) atau URL."""
+    return chunk_source(doc.metadata)
+
+
+def get_document_sources(doc: Document) -> List[str]:
+    """Semua sumber chunk, termasuk sumber duplikat yang digabung ke chunk ini saat dedup."""
+    merged = doc.metadata.get(MERGED_SOURCES_KEY)
+    if merged:
+        return merged.split(MERGED_SEPARATOR)
+    return [get_document_source(doc)]
+
+
+def store_source_chunk_ids(vector_store: Any, page_size: int = 500) -> Dict[str, Set[str]]:
+    """ID chunk per sumber di sebuah vector store (hanya metadata yang dibaca, per halaman)."""
+    result: Dict[str, Set[str]] = {}
+    if vector_store is None:
+        return result
+    offset = 0
+    while True:
+        page = vector_store.get(include=["metadatas"], limit=page_size, offset=offset)
+        if not page["ids"]:
+            return result
+        offset += len(page["ids"])
+        for doc_id, metadata in zip(page["ids"], page["metadatas"]):
+            for source in get_document_sources(Document(page_content="", metadata=metadata or {})):
+                result.setdefault(source, set()).add(doc_id)
+
+
+def changed_sources(before: Dict[str, Set[str]], after: Dict[str, Set[str]]) -> Set[str]:
+    """
+    Sumber yang himpunan ID chunk-nya berubah (termasuk sumber baru/hilang).
+    ID chunk deterministik (sumber + isi), jadi sumber yang tidak berubah
+    menghasilkan kunci cache yang sama dan tidak perlu di-invalidate.
+    """
+    return {source for source in set(before) | set(after) if before.get(source) != after.get(source)}
+
+
+class AnswerCache:
+    """
+    Cache jawaban RAG dengan kunci (pertanyaan ter-condense + himpunan ID chunk).
+
+    Setiap entri mencatat sumber yang dipakai, sehingga re-ingest satu file
+    hanya menghapus jawaban yang dibangun dari file tersebut. Disimpan di
+    SQLite agar invalidasi dari proses ingest terlihat oleh server, dengan
+    eviction LRU berdasarkan waktu akses terakhir.
+
+    Jika `serde` diberikan, jawaban disimpan sebagai BLOB ringkas (msgpack + zstd
+    untuk jawaban panjang); entri TEXT lama tetap terbaca.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_ANSWER_CACHE_PATH,
+        max_entries: int = DEFAULT_ANSWER_CACHE_MAX_ENTRIES,
+        serde: Optional[CompactSerializer] = None,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.serde = serde
+        self._decoder = serde or CompactSerializer()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                chunk_ids TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS answer_sources (
+                key TEXT NOT NULL,
+                source TEXT NOT NULL,
+                PRIMARY KEY (key, source)
+            );
+            CREATE INDEX IF NOT EXISTS idx_answer_sources_source ON answer_sources(source);
+            CREATE INDEX IF NOT EXISTS idx_answers_last_access ON answers(last_access);
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(question: str, documents: List[Document]) -> str:
+        chunk_ids = sorted({get_document_id(doc) for doc in documents})
+        raw = normalize_question(question) + "\n" + "\n".join(chunk_ids)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, question: str, documents: List[Document]) -> Optional[str]:
+        key = self.make_key(question, documents)
+        with self._lock:
+            row = self._conn.execute("SELECT answer FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._stats["hits"] += 1
+        return self._decoder.loads(row[0]) if isinstance(row[0], bytes) else row[0]
+
+    def put(self, question: str, documents: List[Document], answer: str) -> None:
+        key = self.make_key(question, documents)
+        chunk_ids = sorted({get_document_id(doc) for doc in documents})
+        sources = sorted({source for doc in documents for source in get_document_sources(doc)})
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, question, answer, chunk_ids, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, question, self.serde.dumps(answer) if self.serde else answer, json.dumps(chunk_ids), now, now),
+            )
+            self._conn.execute("DELETE FROM answer_sources WHERE key = ?", (key,))
+            self._conn.executemany(
+                "INSERT INTO answer_sources (key, source) VALUES (?, ?)", [(key, s) for s in sources]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow <= 0:
+            return
+
+        keys = [row[0] for row in self._conn.execute(
+            "SELECT key FROM answers ORDER BY last_access ASC LIMIT ?", (overflow,)
+        )]
+        self._delete_keys(keys)
+        self._stats["evictions"] += len(keys)
+
+    def _delete_keys(self, keys: List[str]) -> None:
+        self._conn.executemany("DELETE FROM answers WHERE key = ?", [(k,) for k in keys])
+        self._conn.executemany("DELETE FROM answer_sources WHERE key = ?", [(k,) for k in keys])
+
+    def invalidate_sources(self, sources: Iterable[str]) -> int:
+        """Hapus semua jawaban yang bergantung pada salah satu sumber. Mengembalikan jumlah entri."""
+        sources = list(set(sources))
+        if not sources:
+            return 0
+
+        placeholders = ",".join("?" * len(sources))
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute(
+                f"SELECT DISTINCT key FROM answer_sources WHERE source IN ({placeholders})", sources
+            )]
+            self._delete_keys(keys)
+            self._conn.commit()
+            self._stats["invalidations"] += len(keys)
+
+        print(f"🧹 Answer cache: {len(keys)} jawaban di-invalidate untuk {len(sources)} sumber")
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers")
+            self._conn.execute("DELETE FROM answer_sources")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": size,
+                "max_entries": self.max_entries,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kelola answer cache.")
+    parser.add_argument("--invalidate", nargs="+", metavar="SOURCE", help="Nama file / URL sumber yang di-invalidate")
+    parser.add_argument("--clear", action="store_true")
+    args = parser.parse_args()
+
+    cache = AnswerCache()
+    if args.invalidate:
+        cache.invalidate_sources(args.invalidate)
+    if args.clear:
+        cache.clear()
+        print("🧹 Answer cache dikosongkan.")
+    print(cache.stats())
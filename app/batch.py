@@ -0,0 +1,86 @@
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from app.graph_builder import build_chat_inputs, extract_answer
+
+DEFAULT_BATCH_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+DEFAULT_BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "200"))
+
+
+def _run_thread(graph, thread_id: str, items: List[Tuple[int, str]], admit) -> List[Dict[str, Any]]:
+    """Pesan dalam satu thread dijalankan berurutan agar riwayat/checkpoint tetap konsisten."""
+    results = []
+    config = {"configurable": {"thread_id": thread_id}}
+    for index, message in items:
+        start = time.perf_counter()
+        try:
+            with admit(thread_id):
+                result = graph.invoke(build_chat_inputs(message), config=config)
+            results.append({
+                "index": index,
+                "thread_id": thread_id,
+                "message": message,
+                "response": extract_answer(result)["content"],
+                "query_type": result.get("query_type"),
+                "doc_refs": result.get("doc_refs", []),
+                "timings": result.get("timings", {}),
+                "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            })
+        except Exception as e:
+            print(f"❌ Batch item {index} ({thread_id}) gagal: {e}")
+            results.append({"index": index, "thread_id": thread_id, "message": message, "error": str(e)})
+    return results
+
+
+def run_batch(
+    graph,
+    items: List[Dict[str, str]],
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY,
+    embedding_model=None,
+    admit: Optional[Callable[[str], ContextManager]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Menjalankan banyak pasangan (thread_id, message) sekaligus dan mengembalikan
+    hasil satu per satu begitu selesai (urutan penyelesaian, lihat field "index").
+
+    Pesan pertama tiap thread di-embed dulu dalam satu batch besar (jika
+    `embedding_model` mendukung `prime`), sehingga retrieval-nya tidak lagi menunggu
+    forward pass embedding. Pesan yang di-condense (giliran lanjutan, atau thread_id
+    yang sudah punya riwayat) tidak memakai hasil prime. Retrieval & generasi
+    dijalankan paralel dengan batas `max_concurrency`; pesan dengan thread_id yang
+    sama tetap berurutan. `admit(thread_id)` (opsional)
+    membungkus setiap giliran, misal slot admission control yang dipakai bersama /chat.
+    """
+    admit = admit or (lambda thread_id: nullcontext())
+    threads: Dict[str, List[Tuple[int, str]]] = {}
+    for index, item in enumerate(items):
+        # Tanpa thread_id, setiap item mendapat thread baru (sama seperti /chat); id-nya ada di hasil
+        thread_id = item.get("thread_id") or uuid.uuid4().hex
+        threads.setdefault(thread_id, []).append((index, item["message"]))
+
+    if embedding_model is not None and hasattr(embedding_model, "prime"):
+        start = time.perf_counter()
+        # Giliran pertama tiap thread tidak di-condense, jadi pertanyaannya dipakai apa adanya
+        embedded = embedding_model.prime([messages[0][1] for messages in threads.values()])
+        print(f"🧮 Batch: {embedded} pertanyaan di-embed sekaligus dalam {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="chat-batch") as executor:
+        futures = [executor.submit(_run_thread, graph, thread_id, messages, admit) for thread_id, messages in threads.items()]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def validate_batch_items(items: Any, max_items: int = DEFAULT_BATCH_MAX_ITEMS) -> Optional[str]:
+    """Pesan error jika payload batch tidak valid, selain itu None."""
+    if not isinstance(items, list) or not items:
+        return "'items' harus berupa list berisi {thread_id, message}"
+    if len(items) > max_items:
+        return f"Maksimal {max_items} item per batch"
+    for item in items:
+        if not isinstance(item, dict) or not item.get("message"):
+            return "Setiap item wajib memiliki 'message'"
+    return None
@@ -0,0 +1,119 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from app.graph_builder import normalize_question
+
+CHAT_TEMPLATES_ENABLED = os.getenv("CHAT_TEMPLATES", "1") == "1"
+
+# Sapaan/panggilan yang boleh menempel di akhir ("makasih ya kak", "halo min")
+_ADDRESS = r"(?:\s+(?:ya|yah|yaa|kak|kakak|min|admin|bot|bang|mas|mbak|pak|bu|semua|banyak|sekali|ya kak|ya min))*"
+
+INTENT_PATTERNS: Dict[str, str] = {
+    "greeting": (
+        r"(?:halo+|hallo+|hai+|hi+|hello+|hey+|helo+|pagi|siang|sore|malam|permisi|p"
+        r"|selamat\s+(?:pagi|siang|sore|malam)"
+        r"|assalamu\s*alaikum(?:\s+(?:wr|warahmatullahi)(?:\s+(?:wb|wabarakatuh))?)?)"
+    ),
+    "thanks": r"(?:terima\s*kasih|terimakasih|makasih|makasi|trims|thanks|thank\s+you|thx|tengkyu|tq|nuhun)",
+    "goodbye": r"(?:sampai\s+jumpa|dadah|bye|selamat\s+tinggal|sudah\s+dulu|udah\s+dulu|cukup)",
+    "acknowledge": r"(?:ok|oke|okay|okey|sip|siap|baik|baiklah|mantap|mantab|paham|noted|oh\s+begitu|oh\s+gitu)",
+    "identity": (
+        r"(?:(?:kamu|anda|km)\s+(?:itu\s+)?siapa|siapa\s+(?:kamu|anda|km|namamu|namanya)"
+        r"|nama\s*(?:kamu|anda|mu|nya)\s+siapa|kamu\s+(?:itu\s+)?(?:bot|robot|ai|manusia))"
+    ),
+    "capabilities": (
+        r"(?:(?:kamu|anda)\s+bisa\s+(?:apa|bantu\s+apa|ngapain)(?:\s+saja|\s+aja)?"
+        r"|apa\s+(?:saja\s+|aja\s+)?yang\s+bisa\s+(?:kamu\s+|anda\s+)?(?:bantu|lakukan|jawab|tanyakan)"
+        r"|bisa\s+bantu\s+apa(?:\s+saja|\s+aja)?|fitur(?:nya)?\s+apa(?:\s+saja|\s+aja)?)"
+    ),
+}
+
+RESPONSE_POOLS: Dict[str, List[str]] = {
+    "greeting": [
+        "Halo! 👋 Saya Asisten Akademik Prodi Informatika UMSIDA. Ada yang bisa saya bantu seputar perkuliahan?",
+        "Hai! Silakan tanyakan apa saja tentang Prodi Informatika UMSIDA, misalnya kurikulum, layanan, atau fasilitas.",
+        "Halo, selamat datang! Mau cari info apa hari ini? Jadwal praktikum, mata kuliah, atau layanan kemahasiswaan?",
+        "Hai, senang bertemu denganmu! Ada pertanyaan seputar Prodi Informatika yang ingin ditanyakan?",
+    ],
+    "thanks": [
+        "Sama-sama! 😊 Kalau ada pertanyaan lain, jangan ragu untuk bertanya lagi.",
+        "Dengan senang hati! Semoga informasinya bermanfaat.",
+        "Sama-sama, semoga membantu! Silakan kembali kapan saja kalau butuh info akademik lainnya.",
+        "Terima kasih kembali! Semangat kuliahnya ya. 💪",
+    ],
+    "goodbye": [
+        "Sampai jumpa! Semoga harimu menyenangkan. 👋",
+        "Baik, sampai ketemu lagi! Jangan ragu kembali kalau ada pertanyaan.",
+        "Sampai jumpa, semangat kuliahnya!",
+    ],
+    "acknowledge": [
+        "Siap! Kalau ada hal lain yang ingin ditanyakan, silakan saja.",
+        "Baik! Ada lagi yang bisa saya bantu?",
+        "Oke, semoga jelas ya. Silakan tanya lagi jika masih ada yang membingungkan.",
+    ],
+    "identity": [
+        "Saya Asisten Akademik Prodi Informatika UMSIDA, chatbot yang menjawab pertanyaan berdasarkan dokumen resmi prodi.",
+        "Saya chatbot Asisten Akademik Prodi Informatika UMSIDA. Saya membantu mencarikan informasi akademik dari dokumen prodi.",
+        "Perkenalkan, saya Asisten Akademik Prodi Informatika UMSIDA. Tanyakan saja seputar kurikulum, layanan, atau fasilitas prodi.",
+    ],
+    "capabilities": [
+        "Saya bisa membantu menjawab pertanyaan seputar Prodi Informatika UMSIDA, misalnya:\n"
+        "- Kurikulum & sebaran mata kuliah\n- Layanan kemahasiswaan (surat aktif kuliah, dispensasi, dll.)\n"
+        "- Fasilitas & laboratorium\n- Program akademik (MBKM, magang, sertifikasi)\n- Panduan skripsi & PKL",
+        "Beberapa hal yang bisa kamu tanyakan: mata kuliah per semester, prosedur layanan akademik, "
+        "fasilitas kampus, organisasi mahasiswa, hingga panduan skripsi dan PKL.",
+    ],
+}
+
+_COMPILED_PATTERNS = {
+    intent: re.compile(rf"{pattern}{_ADDRESS}")
+    for intent, pattern in INTENT_PATTERNS.items()
+}
+
+
+class ChatTemplateEngine:
+    """
+    Jalur cepat untuk basa-basi (sapaan, terima kasih, identitas, kemampuan):
+    pesan yang cocok penuh dengan pola intent dijawab dari kumpulan template
+    tanpa panggilan LLM. Pesan lain diteruskan ke alur biasa.
+
+    Template dipilih bergiliran berdasarkan panjang riwayat, sehingga
+    jawabannya bervariasi antar giliran tetapi tetap deterministik.
+    """
+
+    def __init__(self, patterns=None, pools: Optional[Dict[str, List[str]]] = None):
+        self.patterns = patterns or _COMPILED_PATTERNS
+        self.pools = pools or RESPONSE_POOLS
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits: Dict[str, int] = {intent: 0 for intent in self.patterns}
+
+    def match(self, message: str, record: bool = True) -> Optional[str]:
+        """Intent jika seluruh pesan cocok dengan salah satu pola, selain itu None."""
+        text = normalize_question(message)
+        intent = None
+        if text and len(text) <= 80:
+            intent = next((name for name, pattern in self.patterns.items() if pattern.fullmatch(text)), None)
+
+        if record:
+            with self._lock:
+                self._lookups += 1
+                if intent:
+                    self._hits[intent] += 1
+        return intent
+
+    def respond(self, intent: str, turn: int = 0) -> str:
+        pool = self.pools[intent]
+        return pool[turn % len(pool)]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            hits = sum(self._hits.values())
+            return {
+                "lookups": self._lookups,
+                "hits": hits,
+                "hit_rate": round(hits / self._lookups, 3) if self._lookups else 0.0,
+                "hits_by_intent": dict(self._hits),
+            }
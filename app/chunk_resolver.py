@@ -0,0 +1,92 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from app.vectorstore import get_document_id
+
+DEFAULT_CHUNK_CACHE_SIZE = int(os.getenv("CHUNK_CACHE_SIZE", "4096"))
+
+
+def to_doc_refs(documents: List[Document]) -> List[Dict[str, Any]]:
+    """Representasi ringkas hasil retrieval untuk GraphState: hanya ID chunk + skor."""
+    refs = []
+    for doc in documents:
+        score = doc.metadata.get("rerank_score", doc.metadata.get("score"))
+        refs.append({"id": get_document_id(doc), "score": None if score is None else round(float(score), 4)})
+    return refs
+
+
+class ChunkResolver:
+    """
+    Memetakan ID chunk kembali ke Document. Chunk yang baru diambil retriever
+    disimpan di cache LRU in-process; ID yang tidak ada di cache (misal dari
+    checkpoint lama atau proses lain) dimuat dari vector store dengan `get(ids=...)`.
+    """
+
+    def __init__(
+        self,
+        get_vector_store: Optional[Callable[[], Any]] = None,
+        cache_size: int = DEFAULT_CHUNK_CACHE_SIZE,
+    ):
+        self.get_vector_store = get_vector_store or (lambda: None)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Document]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "store_loads": 0, "unresolved": 0}
+
+    def remember(self, documents: List[Document]) -> None:
+        with self._lock:
+            for doc in documents:
+                doc_id = get_document_id(doc)
+                self._cache[doc_id] = doc
+                self._cache.move_to_end(doc_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def resolve(self, doc_refs: List[Dict[str, Any]]) -> List[Document]:
+        """Mengembalikan Document sesuai urutan `doc_refs`; ID yang tidak ditemukan dilewati."""
+        ids = [ref["id"] for ref in doc_refs or []]
+        found: Dict[str, Document] = {}
+        with self._lock:
+            for doc_id in ids:
+                doc = self._cache.get(doc_id)
+                if doc is not None:
+                    self._cache.move_to_end(doc_id)
+                    found[doc_id] = doc
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(ids) - len(found)
+
+        missing = [doc_id for doc_id in ids if doc_id not in found]
+        if missing:
+            loaded = self._load_from_store(missing)
+            self.remember(loaded)
+            found.update({doc.id: doc for doc in loaded})
+
+        unresolved = sum(1 for doc_id in ids if doc_id not in found)
+        if unresolved:
+            self._stats["unresolved"] += unresolved
+            print(f"⚠️ {unresolved} chunk tidak ditemukan di cache maupun vector store")
+        return [found[doc_id] for doc_id in ids if doc_id in found]
+
+    def _load_from_store(self, ids: List[str]) -> List[Document]:
+        vector_store = self.get_vector_store()
+        if vector_store is None:
+            return []
+        result = vector_store.get(ids=ids, include=["documents", "metadatas"])
+        self._stats["store_loads"] += 1
+        return [
+            Document(id=doc_id, page_content=content, metadata=metadata or {})
+            for doc_id, content, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+        ]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._cache),
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+            }
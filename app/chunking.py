@@ -0,0 +1,316 @@
+import argparse
+import os
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# "structured": strategi per sumber (JSON atomik, PDF per heading/tabel, web rekursif)
+# "legacy": satu RecursiveCharacterTextSplitter berbasis karakter untuk semua dokumen
+CHUNKING_STRATEGY = os.getenv("CHUNKING_STRATEGY", "structured")
+# Tokenizer model embedding: chunk diukur dalam wordpiece yang benar-benar dilihat model.
+# Default tokenizer.json hasil export ONNX, lalu tokenizer all-MiniLM-L6-v2 dari cache HuggingFace
+EMBED_TOKENIZER = os.getenv("EMBED_TOKENIZER")
+DEFAULT_EMBED_TOKENIZERS = ["models/all-MiniLM-L6-v2-onnx/tokenizer.json", "sentence-transformers/all-MiniLM-L6-v2"]
+# all-MiniLM-L6-v2 memotong input di 256 token (termasuk [CLS] & [SEP]); sisanya tidak ikut ter-embed
+EMBED_MAX_TOKENS = int(os.getenv("EMBED_MAX_TOKENS", "256"))
+_SPECIAL_TOKENS = 2
+CHUNK_MAX_TOKENS = min(int(os.getenv("CHUNK_MAX_TOKENS", "254")), EMBED_MAX_TOKENS - _SPECIAL_TOKENS)
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "24"))
+
+_HEADING_PATTERN = re.compile(
+    r"^(?:BAB\s+[IVXLC\d]+|SEMESTER\s+[IVX\d]+|(?:[IVX]+|[A-Z]|\d+(?:\.\d+)*)[.)])\s*\S",
+    re.IGNORECASE,
+)
+_NUMBER_TOKEN = re.compile(r"^\d+(?:[.,]\d+)?$")
+
+
+def _load_embed_tokenizer():
+    from tokenizers import Tokenizer
+
+    for name in [EMBED_TOKENIZER] if EMBED_TOKENIZER else DEFAULT_EMBED_TOKENIZERS:
+        try:
+            if os.path.exists(name):
+                tokenizer = Tokenizer.from_file(name)
+            else:
+                from transformers import AutoTokenizer
+
+                tokenizer = AutoTokenizer.from_pretrained(name).backend_tokenizer
+        except Exception:
+            continue
+        # Dihitung utuh: truncation/padding dari konfigurasi embedding tidak berlaku di sini
+        tokenizer.no_truncation()
+        tokenizer.no_padding()
+        return tokenizer
+    return None
+
+
+def _build_token_counter() -> Callable[[str], int]:
+    try:
+        tokenizer = _load_embed_tokenizer()
+    except ImportError:
+        tokenizer = None
+    if tokenizer is not None:
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids) if text else 0
+
+    print("⚠️ Tokenizer model embedding tidak tersedia, ukuran chunk memakai perkiraan (tiktoken)")
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        # Perkiraan kasar jika tiktoken tidak tersedia (~4 karakter per token)
+        return lambda text: max(1, len(text) // 4) if text else 0
+
+
+_token_counter: Optional[Callable[[str], int]] = None
+
+
+def count_tokens(text: str) -> int:
+    """Jumlah token `text` menurut tokenizer model embedding (tanpa token spesial)."""
+    global _token_counter
+    # Dimuat saat pertama dipakai, bukan saat import
+    if _token_counter is None:
+        _token_counter = _build_token_counter()
+    return _token_counter(text)
+
+
+def get_chunk_strategy(doc: Document) -> str:
+    source = (doc.metadata.get("source_file") or doc.metadata.get("source") or "").lower()
+    if source.endswith(".json"):
+        return "atomic"
+    if source.endswith(".pdf"):
+        return "structured"
+    return "recursive"
+
+
+def _token_splitter(max_tokens: int, overlap_tokens: int) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=max_tokens,
+        chunk_overlap=overlap_tokens,
+        length_function=count_tokens,
+        separators=["\n\n", "\n", ". ", " ", ""],
+    )
+
+
+def _is_heading(line: str) -> bool:
+    words = line.split()
+    if not words or len(line) > 80 or len(words) > 10 or line.endswith((".", ",", ";")):
+        return False
+    letters = [c for c in line if c.isalpha()]
+    if letters and all(c.isupper() for c in letters) and len(letters) >= 4:
+        return True
+    return bool(_HEADING_PATTERN.match(line)) and not _is_table_row(line)
+
+
+def _is_table_row(line: str) -> bool:
+    """Baris tabel hasil ekstraksi PDF: kolom dipisah tab/|/spasi ganda, atau banyak angka (No, SKS, ...)."""
+    if "\t" in line or line.count("|") >= 2 or re.search(r"\S {2,}\S.* {2,}\S", line):
+        return True
+    tokens = line.split()
+    numbers = sum(1 for token in tokens if _NUMBER_TOKEN.match(token))
+    return len(tokens) >= 3 and numbers >= 2
+
+
+def _parse_blocks(text: str) -> List[Tuple[str, str]]:
+    """Memecah teks halaman menjadi blok (heading | table | paragraph) dengan urutan asli."""
+    blocks: List[Tuple[str, str]] = []
+    kind, lines = None, []
+
+    def flush():
+        if lines:
+            blocks.append((kind, "\n".join(lines)))
+
+    for raw_line in text.splitlines():
+        line = raw_line.strip()
+        if not line:
+            if kind == "paragraph":
+                flush()
+                kind, lines = None, []
+            continue
+        if _is_heading(line):
+            flush()
+            blocks.append(("heading", line))
+            kind, lines = None, []
+            continue
+        line_kind = "table" if _is_table_row(line) else "paragraph"
+        if line_kind != kind:
+            flush()
+            kind, lines = line_kind, []
+        lines.append(line)
+    flush()
+    return blocks
+
+
+def _split_table(table: str, max_tokens: int) -> List[str]:
+    """Tabel panjang dipecah di batas baris, tidak pernah di tengah baris."""
+    parts, rows, size = [], [], 0
+    for row in table.splitlines():
+        row_tokens = count_tokens(row)
+        if rows and size + row_tokens > max_tokens:
+            parts.append("\n".join(rows))
+            rows, size = [], 0
+        rows.append(row)
+        size += row_tokens
+    if rows:
+        parts.append("\n".join(rows))
+    return parts
+
+
+def _chunk_structured(doc: Document, max_tokens: int, overlap_tokens: int) -> List[Tuple[str, str]]:
+    """Mengembalikan (section, teks) per chunk; chunk baru dimulai di setiap heading."""
+    chunks: List[Tuple[str, str]] = []
+    section, parts, size = "", [], 0
+
+    def flush():
+        nonlocal parts, size
+        body = [p for p in parts if p != section]
+        if body:
+            chunks.append((section, "\n".join(parts)))
+        parts, size = [], 0
+
+    def start(heading_prefix: bool = True):
+        nonlocal parts, size
+        # Judul bagian diulang di awal chunk agar tiap chunk tetap bermakna sendiri
+        if heading_prefix and section:
+            parts, size = [section], count_tokens(section)
+
+    for kind, text in _parse_blocks(doc.page_content):
+        if kind == "heading":
+            flush()
+            section = text
+            start()
+            continue
+
+        tokens = count_tokens(text)
+        if size + tokens <= max_tokens:
+            parts.append(text)
+            size += tokens
+            continue
+
+        flush()
+        start()
+        budget = max(32, max_tokens - size)
+        if tokens <= budget:
+            parts.append(text)
+            size += tokens
+            continue
+
+        pieces = _split_table(text, budget) if kind == "table" else _token_splitter(budget, overlap_tokens).split_text(text)
+        for piece in pieces:
+            parts.append(piece)
+            flush()
+            start()
+    flush()
+    return chunks
+
+
+def _atomic_header(doc: Document) -> str:
+    """Judul/pertanyaan entri JSON, sesuai format "[Kategori] Judul: isi" dari loader."""
+    title = doc.metadata.get("title") or doc.metadata.get("question") or ""
+    if not title:
+        return ""
+    header = f"[{doc.metadata.get('category', '')}] {title}:"
+    return header if doc.page_content.startswith(header) else title
+
+
+def _chunk_atomic(doc: Document, max_tokens: int, overlap_tokens: int) -> List[Tuple[str, str]]:
+    """
+    Entri JSON dipertahankan utuh selama muat dalam batas embedding. Entri yang
+    lebih panjang dipecah, dan judulnya diulang di setiap potongan agar tiap
+    potongan tetap bisa ditemukan lewat judul tersebut.
+    """
+    text = doc.page_content
+    if count_tokens(text) <= max_tokens:
+        return [("", text)]
+
+    header = _atomic_header(doc)
+    body = text[len(header):].strip() if header and text.startswith(header) else text
+    budget = max(32, max_tokens - count_tokens(header) - 1)
+    return [
+        (header, f"{header} {piece}" if header else piece)
+        for piece in _token_splitter(budget, overlap_tokens).split_text(body)
+    ]
+
+
+def chunk_document(
+    doc: Document,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    strategy: Optional[str] = None,
+) -> List[Document]:
+    strategy = strategy or get_chunk_strategy(doc)
+
+    if strategy == "atomic":
+        pieces = _chunk_atomic(doc, max_tokens, overlap_tokens)
+    elif strategy == "structured":
+        pieces = _chunk_structured(doc, max_tokens, overlap_tokens)
+    else:
+        pieces = [("", text) for text in _token_splitter(max_tokens, overlap_tokens).split_text(doc.page_content)]
+
+    chunks = []
+    for section, text in pieces:
+        metadata = {**doc.metadata, "chunk_strategy": strategy, "chunk_tokens": count_tokens(text)}
+        if section:
+            metadata["section"] = section
+        chunks.append(Document(page_content=text, metadata=metadata))
+    return chunks
+
+
+def chunk_documents(
+    documents: List[Document],
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> List[Document]:
+    return [chunk for doc in documents for chunk in chunk_document(doc, max_tokens, overlap_tokens)]
+
+
+def summarize_chunks(chunks: List[Document]) -> Dict[str, Dict[str, float]]:
+    """Jumlah & ukuran chunk (token) per sumber."""
+    sizes: Dict[str, List[int]] = {}
+    for chunk in chunks:
+        source = chunk.metadata.get("source_file") or chunk.metadata.get("source") or "unknown"
+        tokens = chunk.metadata.get("chunk_tokens") or count_tokens(chunk.page_content)
+        sizes.setdefault(source, []).append(tokens)
+
+    return {
+        source: {
+            "chunks": len(values),
+            "total_tokens": sum(values),
+            "avg_tokens": round(sum(values) / len(values), 1),
+            "min_tokens": min(values),
+            "max_tokens": max(values),
+        }
+        for source, values in sorted(sizes.items())
+    }
+
+
+def print_chunk_report(chunks: List[Document]) -> None:
+    report = summarize_chunks(chunks)
+    print(f"📊 Laporan chunking ({len(chunks)} chunk):")
+    print(f"   {'sumber':<45}{'chunk':>7}{'avg tok':>9}{'max tok':>9}{'total tok':>11}")
+    for source, row in report.items():
+        print(
+            f"   {source[:44]:<45}{row['chunks']:>7}{row['avg_tokens']:>9}"
+            f"{row['max_tokens']:>9}{row['total_tokens']:>11}"
+        )
+
+
+if __name__ == "__main__":
+    from app.document_processor import iter_documents, load_document_pdf, split_documents
+
+    parser = argparse.ArgumentParser(description="Bandingkan chunking legacy vs structured.")
+    parser.add_argument("--dir", default="./documents")
+    args = parser.parse_args()
+
+    # iter_documents hanya memuat JSON dari direktori; PDF dimuat langsung untuk perbandingan
+    documents = list(iter_documents(local_dir=args.dir))
+    for name in sorted(os.listdir(args.dir)):
+        if name.endswith(".pdf"):
+            documents += load_document_pdf(os.path.join(args.dir, name))
+
+    for strategy in ("legacy", "structured"):
+        print(f"\n=== {strategy} ===")
+        print_chunk_report(split_documents(documents, strategy=strategy))
@@ -0,0 +1,224 @@
+import os
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import mmh3
+import numpy as np
+from langchain_core.documents import Document
+
+from app.vectorstore import get_document_id
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+# Estimasi Jaccard minimal agar dua chunk dianggap duplikat
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 16
+SHINGLE_SIZE = 5
+
+# Metadata yang digabung dari semua anggota cluster ke kunci jamak
+MERGED_METADATA_KEYS = {
+    "source": "sources",
+    "source_file": "source_files",
+    "url": "urls",
+    "image_url": "image_urls",
+}
+MERGED_SEPARATOR = " | "
+# Sumber dependensi (source_file, atau source jika tidak ada) semua anggota cluster:
+# dipakai invalidasi answer cache dan penyalinan chunk saat ingest per sumber
+MERGED_SOURCES_KEY = "merged_sources"
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 32, size=DEDUP_NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 1 << 32, size=DEDUP_NUM_PERM, dtype=np.uint64)
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash_signature(text: str) -> np.ndarray:
+    hashes = np.array([mmh3.hash(s, signed=False) for s in _shingles(text)], dtype=np.uint64)
+    # Permutasi universal (a*x + b) mod p; a, x < 2^32 sehingga tidak overflow uint64
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def estimate_jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.mean(a == b))
+
+
+class MinHashLSH:
+    """Index LSH (banding) atas signature MinHash; query mengembalikan kandidat duplikat."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, bands: int = DEDUP_BANDS):
+        self.rows = num_perm // bands
+        self.bands = bands
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(bands)]
+        self.signatures: List[np.ndarray] = []
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def query(self, signature: np.ndarray, threshold: float = DEDUP_THRESHOLD) -> Optional[int]:
+        """Indeks entri pertama yang cukup mirip, atau None."""
+        seen = set()
+        for band, key in self._band_keys(signature):
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if estimate_jaccard(signature, self.signatures[candidate]) >= threshold:
+                    return candidate
+        return None
+
+    def insert(self, signature: np.ndarray) -> int:
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        for band, key in self._band_keys(signature):
+            self._buckets[band].setdefault(key, []).append(index)
+        return index
+
+
+def _find(parent: List[int], i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def chunk_source(metadata: Dict) -> str:
+    return metadata.get("source_file") or metadata.get("source") or "unknown"
+
+
+def merged_fields(metadatas: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Kunci jamak (sources, urls, ..., merged_sources) untuk metadata anggota satu cluster."""
+    fields = {}
+    for key, plural_key in MERGED_METADATA_KEYS.items():
+        values = []
+        for metadata in metadatas:
+            value = metadata.get(key)
+            if value not in (None, "") and value not in values:
+                values.append(value)
+        if len(values) > 1:
+            fields[plural_key] = MERGED_SEPARATOR.join(str(v) for v in values)
+
+    sources = []
+    for metadata in metadatas:
+        source = chunk_source(metadata)
+        if source not in sources:
+            sources.append(source)
+    if len(sources) > 1:
+        fields[MERGED_SOURCES_KEY] = MERGED_SEPARATOR.join(sources)
+    return fields
+
+
+def merge_metadata(representative: Document, members: List[Document]) -> Document:
+    """Metadata representatif dilengkapi nilai dari anggota lain; sumber/url digabung ke kunci jamak."""
+    metadata = dict(representative.metadata)
+    for member in members:
+        for key, value in member.metadata.items():
+            if value not in (None, "") and metadata.get(key) in (None, ""):
+                metadata[key] = value
+
+    metadata.update(merged_fields([representative.metadata] + [member.metadata for member in members]))
+    return Document(page_content=representative.page_content, metadata=metadata)
+
+
+def deduplicate_chunks(chunks: List[Document], threshold: float = DEDUP_THRESHOLD) -> List[Document]:
+    """
+    Menggabungkan chunk yang hampir identik (MinHash + LSH). Dari setiap cluster
+    dipertahankan chunk terpanjang dengan metadata gabungan seluruh anggota.
+    """
+    if len(chunks) < 2:
+        return chunks
+
+    lsh = MinHashLSH()
+    parent = list(range(len(chunks)))
+    for i, chunk in enumerate(chunks):
+        signature = minhash_signature(chunk.page_content)
+        match = lsh.query(signature, threshold)
+        lsh.insert(signature)
+        if match is not None:
+            parent[_find(parent, i)] = _find(parent, match)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(chunks)):
+        clusters.setdefault(_find(parent, i), []).append(i)
+
+    result, removed_per_source = [], {}
+    for members in sorted(clusters.values(), key=lambda m: m[0]):
+        if len(members) == 1:
+            result.append(chunks[members[0]])
+            continue
+        keep = max(members, key=lambda i: len(chunks[i].page_content))
+        others = [chunks[i] for i in members if i != keep]
+        result.append(merge_metadata(chunks[keep], others))
+        for doc in others:
+            source = chunk_source(doc.metadata)
+            removed_per_source[source] = removed_per_source.get(source, 0) + 1
+
+    removed = len(chunks) - len(result)
+    print(f"🧬 Dedup: {removed} chunk hampir identik dihapus ({len(chunks)} -> {len(result)})")
+    for source, count in sorted(removed_per_source.items(), key=lambda item: -item[1]):
+        print(f"   - {source}: {count}")
+    return result
+
+
+class StreamingDeduplicator:
+    """
+    Dedup untuk pipeline streaming: hanya signature MinHash (~1 KB per chunk), ID
+    chunk dan metadata sumbernya yang disimpan, bukan chunk-nya. Chunk pertama yang
+    lewat yang dipertahankan, karena chunk tersebut mungkin sudah ditulis ke vector
+    store saat duplikatnya datang. Sumber duplikat dicatat pada chunk yang dipertahankan;
+    `merged_metadata()` berisi kunci gabungan (sama seperti `deduplicate_chunks`) yang
+    harus ditulis balik ke vector store setelah semua chunk lewat.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD):
+        self.threshold = threshold
+        self._lsh = MinHashLSH()
+        self.seen = 0
+        self.removed_per_source: Dict[str, int] = {}
+        # Per indeks LSH: ID chunk yang dipertahankan & metadata sumbernya
+        self._kept: List[Tuple[str, Dict[str, Any]]] = []
+        # Indeks LSH -> metadata sumber semua anggota cluster (hanya yang punya duplikat)
+        self._clusters: Dict[int, List[Dict[str, Any]]] = {}
+
+    @staticmethod
+    def _source_metadata(chunk: Document) -> Dict[str, Any]:
+        keys = list(MERGED_METADATA_KEYS) + ["source_file"]
+        return {key: chunk.metadata[key] for key in keys if chunk.metadata.get(key) not in (None, "")}
+
+    def is_duplicate(self, chunk: Document) -> bool:
+        self.seen += 1
+        signature = minhash_signature(chunk.page_content)
+        match = self._lsh.query(signature, self.threshold)
+        if match is not None:
+            source = chunk_source(chunk.metadata)
+            self.removed_per_source[source] = self.removed_per_source.get(source, 0) + 1
+            self._clusters.setdefault(match, [self._kept[match][1]]).append(self._source_metadata(chunk))
+            return True
+        self._lsh.insert(signature)
+        self._kept.append((get_document_id(chunk), self._source_metadata(chunk)))
+        return False
+
+    def merged_metadata(self) -> Dict[str, Dict[str, str]]:
+        """ID chunk yang dipertahankan -> kunci metadata gabungan dari duplikatnya."""
+        result = {}
+        for index, metadatas in self._clusters.items():
+            fields = merged_fields(metadatas)
+            if fields:
+                result[self._kept[index][0]] = fields
+        return result
+
+    def report(self) -> None:
+        removed = sum(self.removed_per_source.values())
+        print(f"🧬 Dedup (streaming): {removed} chunk hampir identik dilewati dari {self.seen} chunk")
+        for source, count in sorted(self.removed_per_source.items(), key=lambda item: -item[1]):
+            print(f"   - {source}: {count}")
@@ -2,12 +2,13 @@ from fileinput import filename
 import json
 import os
 import re
-from typing import Any, List, Optional, Dict
-from langchain_community.document_loaders import WebBaseLoader
+from typing import Any, Iterable, Iterator, List, Optional, Dict
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.document_transformers import BeautifulSoupTransformer
+from app.chunking import CHUNKING_STRATEGY, chunk_documents, print_chunk_report
+from app.dedup import DEDUP_ENABLED, StreamingDeduplicator, deduplicate_chunks
+from app.html_extract import HTMLCache, extract_url, iter_extracted_urls
 
 DEFAULT_CHUNK_SIZE = 1000
 DEFAULT_CHUNK_OVERLAP = 200  # UPGRADE: Overlap diperbesar agar konteks terjaga
@@ -17,28 +18,33 @@ def clean_text(text: str) -> str:
     """Membersihkan teks dari artefak PDF umum."""
     # Hapus header/footer halaman umum (contoh: "Halaman 1 dari 10")
     text = re.sub(r'Halaman \d+ dari \d+', '', text, flags=re.IGNORECASE)
-    # Hapus spasi berlebih dan newline aneh
-    text = re.sub(r'\s+', ' ', text).strip()
+    # Rapikan spasi, tapi pertahankan baris baru agar heading & baris tabel tetap terbaca
+    text = re.sub(r'[ \t\f\v]+', ' ', text)
+    text = re.sub(r' *\n *', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text).strip()
     return text
 
 
-def load_document_pdf(
-    file_path: str
-) -> List[Document]:
+def iter_document_pdf(file_path: str) -> Iterator[Document]:
+    """Memuat PDF halaman per halaman (lazy) agar PDF besar tidak dimuat sekaligus."""
     try:
         loader = PyPDFLoader(file_path)
-        documents = loader.load()
 
         # UPGRADE: Bersihkan teks dan tambah metadata filename
         filename = os.path.basename(file_path)
-        for doc in documents:
+        for doc in loader.lazy_load():
             doc.page_content = clean_text(doc.page_content)
             doc.metadata["source"] = filename  # Pastikan source adalah nama file
-
-        return documents
+            doc.metadata["source_file"] = filename
+            yield doc
     except Exception as e:
         print(f"Error loading PDF {file_path}: {e}")
-        return []
+
+
+def load_document_pdf(
+    file_path: str
+) -> List[Document]:
+    return list(iter_document_pdf(file_path))
 
 
 def load_custom_json(file_path: str) -> List[Document]:
@@ -61,6 +67,8 @@ def load_custom_json(file_path: str) -> List[Document]:
             enriched_content = f"[{category}] {title}: {content}"
             
             if content:
+                # Catat file asal agar cache jawaban bisa di-invalidate per file
+                metadata["source_file"] = os.path.basename(file_path)
                 # Gunakan enriched_content sebagai page_content
                 doc = Document(page_content=enriched_content, metadata=metadata)
                 documents.append(doc)
@@ -72,6 +80,84 @@ def load_custom_json(file_path: str) -> List[Document]:
         return []
 
 
+def load_document_file(file_path: str) -> List[Document]:
+    """Memuat satu file dokumen (JSON khusus atau PDF)."""
+    return list(iter_document_file(file_path))
+
+
+def iter_document_file(file_path: str) -> Iterator[Document]:
+    if file_path.endswith(".json"):
+        return iter(load_custom_json(file_path))
+    if file_path.endswith(".pdf"):
+        return iter_document_pdf(file_path)
+    raise ValueError(f"Format file tidak didukung: {file_path}")
+
+
+def iter_documents(
+    local_dir: Optional[str] = None,
+    url_list_file_path: Optional[str] = None,
+    file_path: Optional[str] = None,
+) -> Iterator[Document]:
+    """
+    Memuat dokumen satu per satu dari direktori lokal, daftar URL, dan/atau
+    satu file, sehingga pemanggil bisa memantau progres atau berhenti di tengah.
+    """
+    if local_dir:
+        if not os.path.exists(local_dir):
+            print(f"Tidak ada file di direktori: {local_dir}")
+        else:
+            for file_name in os.listdir(local_dir):
+                dir_file_path = os.path.join(local_dir, file_name)
+                # if file_name.endswith(".pdf"):
+                #     print(f"Memproses file: {dir_file_path}")
+                #     yield from load_document_pdf(dir_file_path)
+                if file_name.endswith(".json"):
+                    print(f"Memproses file JSON khusus: {dir_file_path}")
+                    yield from load_custom_json(dir_file_path)
+
+    if url_list_file_path:
+        urls = read_urls_from_file(url_list_file_path)
+        for i, url in enumerate(urls):
+            print(f"Processing URL {i + 1}/{len(urls)}: {url}")
+            yield from load_web_url_content(url)
+
+    if file_path:
+        print(f"Memproses file: {file_path}")
+        yield from iter_document_file(file_path)
+
+
+def stream_chunks(
+    documents: Iterable[Document],
+    dedup: bool = DEDUP_ENABLED,
+    deduplicator: Optional[StreamingDeduplicator] = None,
+) -> Iterator[Document]:
+    """
+    Memecah dokumen satu per satu dan meneruskan chunk-nya secara lazy.
+    Memori puncak tidak bergantung pada jumlah dokumen/halaman. Berikan
+    `deduplicator` sendiri untuk menulis `deduplicator.merged_metadata()` ke
+    vector store setelah semua chunk tertulis (lihat `update_chunk_metadata`).
+    """
+    if deduplicator is None and dedup:
+        deduplicator = StreamingDeduplicator()
+    for doc in documents:
+        for chunk in split_documents([doc]):
+            if deduplicator and deduplicator.is_duplicate(chunk):
+                continue
+            yield chunk
+    if deduplicator:
+        deduplicator.report()
+
+
+def iter_chunks(
+    local_dir: Optional[str] = None,
+    url_list_file_path: Optional[str] = None,
+    json_file_path: Optional[str] = None,
+    deduplicator: Optional[StreamingDeduplicator] = None,
+) -> Iterator[Document]:
+    """Versi streaming `process_document_for_rag`: muat -> pecah -> dedup per dokumen."""
+    return stream_chunks(iter_documents(local_dir, url_list_file_path, json_file_path), deduplicator=deduplicator)
+
+
 # Memproses dokumen dari URL untuk retrieval-augmented generation (RAG)
 def process_document_for_rag(
     local_dir: Optional[str] = None,
@@ -90,37 +176,17 @@ def process_document_for_rag(
     Returns:
         Dict[str, Any]: A dictionary containing the processed document and metadata.
     """
-    loaded_documents = []
     try:
-        if local_dir:
-            if not os.path.exists(local_dir):
-                print(f"Tidak ada file di direktori: {local_dir}")
-            else:
-                for file_name in os.listdir(local_dir):
-                    file_path = os.path.join(local_dir, file_name)
-                    # if file_name.endswith(".pdf"):
-                    #     print(f"Memproses file: {file_path}")
-                    #     documents = load_document_pdf(file_path)
-                    #     if documents:
-                    #         loaded_documents.extend(documents)
-                    if file_name.endswith(".json"):
-                        print(f"Memproses file JSON khusus: {file_path}")
-                        documents = load_custom_json(file_path)
-                        if documents:
-                            loaded_documents.extend(documents)
-
-        if url_list_file_path:
-            urls = read_urls_from_file(url_list_file_path)
-            if urls:
-                for i, url in enumerate(urls):
-                    print(f"Processing URL {i + 1}/{len(urls)}: {url}")
-                    documents = load_web_url_content(url)
-                    loaded_documents.extend(documents)
+        loaded_documents = list(iter_documents(local_dir, url_list_file_path, json_file_path))
 
         if not loaded_documents:
             return []
 
         chunked_documents = split_documents(loaded_documents, chunk_size, chunk_overlap)
+        # Konten yang sama muncul di JSON, PDF & halaman web: simpan sekali saja
+        if DEDUP_ENABLED:
+            chunked_documents = deduplicate_chunks(chunked_documents)
+        print_chunk_report(chunked_documents)
         return chunked_documents
     except ValueError as e:
         raise ValueError(f"Error processing URLs: {str(e)}")
@@ -154,31 +220,18 @@ def load_web_url_content(
     Returns:
         str: The content loaded from the URL.
     """
-    # Placeholder for actual implementation
     try:
-        headers = {  # Beberapa website butuh User-Agent
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-        loader = WebBaseLoader(url, header_template=headers)
-
-        documents = loader.load()
-
-        final_docs = []
-        for doc in documents:
-            doc_metadata = doc.metadata.copy()
-
-            if "source" not in doc_metadata or not doc_metadata["source"]:
-                doc_metadata["source"] = url
-            if custom_metadata:
-                doc_metadata.update(custom_metadata)
-            final_docs.append(
-                Document(page_content=doc.page_content, metadata=doc_metadata)
-            )
-
-        if not final_docs:
+        # Parser lxml + cache HTML/teks di disk: halaman yang tidak berubah tidak diparse ulang
+        page = extract_url(url, cache=HTMLCache(), main_only=False)
+
+        doc_metadata = {"source": url, "title": page["title"]}
+        if custom_metadata:
+            doc_metadata.update(custom_metadata)
+
+        if not page["text"]:
             raise ValueError(f"No content found at {url}")
         else:
-            return final_docs
+            return [Document(page_content=page["text"], metadata=doc_metadata)]
 
     except Exception as e:
         raise ValueError(f"Failed to load content from {url}: {str(e)}") from e
@@ -200,21 +253,15 @@ def process_urls_for_rag(urls: List[str]) -> List:
 
     print(f"Memulai proses untuk {len(urls)} URL...")
 
-    # 1. Loading: Memuat konten HTML dari URL.
-    # Anda bisa memberikan beberapa URL sekaligus.
-    loader = WebBaseLoader(urls)
-    docs_raw = loader.load()
-    print(f"Berhasil memuat konten mentah dari {len(docs_raw)} halaman.")
-
-    # 2. Transforming: Membersihkan HTML dan mengekstrak teks yang relevan.
-    # Kita hanya akan mengambil teks dari tag <main> untuk fokus pada konten utama.
-    # Anda bisa menyesuaikan ini sesuai dengan struktur website target.
-    # Contoh lain: ["article", "div.content", "p"]
-    bs_transformer = BeautifulSoupTransformer()
-    docs_transformed = bs_transformer.transform_documents(
-        documents=docs_raw, tags_to_extract=["main", "article", "div.content", "p"]
-    )
-    print("Berhasil membersihkan HTML dan mengekstrak konten utama.")
+    # 1 & 2. Loading + Transforming dalam satu langkah: fetch (dengan cache & conditional GET),
+    # lalu ekstraksi konten utama (<main>, <article>, div.content; fallback <body>)
+    # dengan satu kali penelusuran tree lxml.
+    docs_transformed = [
+        Document(page_content=page["text"], metadata={"source": page["url"], "title": page["title"]})
+        for page in iter_extracted_urls(urls, cache=HTMLCache(), main_only=True)
+        if page["text"]
+    ]
+    print(f"Berhasil memuat & mengekstrak konten utama dari {len(docs_transformed)} halaman.")
 
     # 3. Splitting: Memecah teks bersih menjadi potongan-potongan (chunks).
     # Parameter ini bisa disesuaikan dengan yang Anda gunakan untuk dokumen lain.
@@ -231,17 +278,22 @@ def split_documents(
     documents: List[Document],
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    strategy: str = CHUNKING_STRATEGY,
 ) -> List[Document]:
     """
     Split text into chunks of a specified size.
 
     Args:
         text (str): The text to split.
-        chunk_size (int): The size of each chunk.
+        chunk_size (int): The size of each chunk (karakter, hanya untuk strategi "legacy").
+        strategy (str): "structured" (per sumber, berbasis token) atau "legacy".
 
     Returns:
         list: A list of text chunks.
     """
+    if strategy != "legacy":
+        return chunk_documents(documents)
+
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
@@ -0,0 +1,148 @@
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import Future
+from queue import Empty, Queue
+from typing import Any, Dict, List, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# Konfigurasi micro-batching (bisa diubah lewat environment variable)
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", "16"))
+DEFAULT_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "5"))
+# Vektor hasil `prime()` (batch offline) yang menunggu dipakai `embed_query`
+DEFAULT_PRIMED_CACHE_SIZE = int(os.getenv("EMBED_PRIMED_CACHE_SIZE", "4096"))
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Wrapper embedding yang menggabungkan panggilan `embed_query` yang datang
+    bersamaan (dari beberapa request /chat) menjadi satu forward pass batch.
+
+    Request pertama membuka "jendela" selama `max_wait_ms`; semua query yang
+    masuk selama jendela itu (maksimal `max_batch_size`) di-embed sekaligus
+    lewat `embed_documents` model aslinya.
+
+    Catatan: model yang membedakan prefix query/dokumen (misal nomic) tidak
+    cocok dibungkus karena query di-embed lewat `embed_documents`.
+    """
+
+    def __init__(
+        self,
+        embedding_model: Embeddings,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size minimal 1")
+
+        self.embedding_model = embedding_model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max(0.0, max_wait_ms)
+
+        self._queue: "Queue[Tuple[str, Future]]" = Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes: Counter = Counter()
+        self._total_requests = 0
+        self._total_batches = 0
+        self._total_forward_ms = 0.0
+        self._primed: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._primed_hits = 0
+
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Dokumen (ingest) sudah berupa batch, langsung teruskan ke model asli
+        return self.embedding_model.embed_documents(texts)
+
+    def prime(self, texts: List[str], batch_size: int = 64) -> int:
+        """
+        Embed banyak query sekaligus (misal satu batch /chat/batch) dalam forward
+        pass berukuran besar; `embed_query` berikutnya untuk teks yang sama
+        langsung memakai hasilnya. Mengembalikan jumlah teks yang di-embed.
+        """
+        with self._stats_lock:
+            pending = [text for text in dict.fromkeys(texts) if text not in self._primed]
+        for i in range(0, len(pending), batch_size):
+            chunk = pending[i:i + batch_size]
+            vectors = self.embedding_model.embed_documents(chunk)
+            with self._stats_lock:
+                for text, vector in zip(chunk, vectors):
+                    self._primed[text] = vector
+                while len(self._primed) > DEFAULT_PRIMED_CACHE_SIZE:
+                    self._primed.popitem(last=False)
+        return len(pending)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._stats_lock:
+            vector = self._primed.pop(text, None)
+            if vector is not None:
+                self._primed_hits += 1
+                return vector
+
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future.result()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait_ms / 1000
+
+            # Kumpulkan query lain yang datang selama jendela tunggu
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        batch.append(self._queue.get_nowait())
+                    else:
+                        batch.append(self._queue.get(timeout=remaining))
+                except Empty:
+                    break
+
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Future]]) -> None:
+        # Query identik dalam satu batch cukup di-embed sekali
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+
+        start = time.perf_counter()
+        try:
+            vectors = self.embedding_model.embed_documents(unique_texts)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        vector_by_text = dict(zip(unique_texts, vectors))
+        for text, future in batch:
+            future.set_result(vector_by_text[text])
+
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._total_requests += len(batch)
+            self._total_batches += 1
+            self._total_forward_ms += elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrik pengisian batch untuk endpoint /metrics."""
+        with self._stats_lock:
+            batches = self._total_batches
+            avg_fill = self._total_requests / batches if batches else 0.0
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "total_requests": self._total_requests,
+                "total_batches": batches,
+                "avg_batch_fill": round(avg_fill, 2),
+                "avg_fill_ratio": round(avg_fill / self.max_batch_size, 3),
+                "avg_forward_ms": round(self._total_forward_ms / batches, 2) if batches else 0.0,
+                "avg_ms_per_query": round(self._total_forward_ms / self._total_requests, 2) if self._total_requests else 0.0,
+                "batch_size_histogram": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "queue_depth": self._queue.qsize(),
+                "primed_hits": self._primed_hits,
+                "primed_pending": len(self._primed),
+            }
@@ -0,0 +1,87 @@
+"""
+Dataset pertanyaan + ground truth untuk evaluasi chatbot.
+Dipakai oleh evaluate_ragas.py dan script benchmark (misal recall retrieval).
+"""
+
+EVAL_DATA = [
+    {
+        "question": "Apa saja fokus utama dari Laboratorium Sistem Cerdas di Informatika UMSIDA?",
+        "ground_truth": "Fokus utama Laboratorium Sistem Cerdas adalah Software Engineering, Programming, dan Computer Science. Aktivitasnya meliputi pengembangan basis kode video game dan alat pengembangan software.",
+    },
+    {
+        "question": "Sebutkan fasilitas umum yang tersedia di kampus UMSIDA untuk mahasiswa.",
+        "ground_truth": "Fasilitas umum di UMSIDA meliputi Masjid Kampus, Gedung Perkuliahan, Area Parkir yang luas, Ruang Baca dan Perpustakaan, serta Kantin Universitas.",
+    },
+    {
+        "question": "Berikan link untuk mengunduh Jadwal Praktikum PBO Semester Genap 2024/2025.",
+        "ground_truth": "Jadwal Praktikum PBO (Pemrograman Berorientasi Objek) Semester Genap 2024/2025 dapat diunduh melalui tautan ini: https://informatika.umsida.ac.id/wp-content/uploads/2025/03/PRAKTIKUM-PBO-2024-2025.pdf",
+    },
+    {
+        "question": "Dimana saya bisa download jadwal praktikum Jaringan Komputer?",
+        "ground_truth": "Jadwal Praktikum Jaringan Komputer (Jarkom) Semester Genap 2024/2025 tersedia di tautan berikut: https://informatika.umsida.ac.id/wp-content/uploads/2025/03/PRAKTIKUM-JARINGAN-KOMPUTER-2024-2025.pdf",
+    },
+    {
+        "question": "Bagaimana cara mengajukan surat keterangan aktif kuliah secara online?",
+        "ground_truth": "Mahasiswa dapat mengajukan Surat Aktif Kuliah melalui layanan administrasi online menggunakan formulir berikut: https://docs.google.com/forms/d/1ijKTVs1T546WU__zqqEc9JeSfj2HoGVWFqhcGaJr-bs/viewform?edit_requested=true",
+    },
+    {
+        "question": "Apa visi dari Program Studi Informatika UMSIDA?",
+        "ground_truth": "Visi Program Studi Informatika UMSIDA adalah menghasilkan lulusan yang profesional, unggul, inovatif, dan kompetitif dalam rekayasa perangkat lunak dan sistem cerdas yang adaptif terhadap perkembangan IPTEKS berdasarkan nilai-nilai Islam untuk kesejahteraan masyarakat tingkat ASEAN pada tahun 2038.",
+    },
+    {
+        "question": "Mata kuliah apa saja yang dipelajari pada semester 1?",
+        "ground_truth": "Mata kuliah pada semester 1 meliputi: Kemanusiaan dan Keimanan, Algoritma dan Pemrograman, Sistem Digital, Arsitektur Komputer, Kalkulus, dan Fisika.",
+    },
+    {
+        "question": "Sebutkan mata kuliah pilihan yang tersedia di semester 7.",
+        "ground_truth": "Mata kuliah pilihan di semester 7 meliputi Multimedia, Game Programming (Game Prog), Web Mining, dan Ethical Hacking.",
+    },
+    {
+        "question": "Apa itu program Magang Bersertifikat di UMSIDA?",
+        "ground_truth": "Program Magang Bersertifikat adalah program MBKM yang berlangsung selama 1-2 semester untuk memberikan pengalaman industri agar mahasiswa siap kerja, dimana mahasiswa dapat mengaplikasikan ilmunya dan industri mendapatkan talenta.",
+    },
+    {
+        "question": "Saya membutuhkan Sertifikat Akreditasi Informatika, dimana saya bisa mengunduhnya?",
+        "ground_truth": "Dokumen Sertifikat Akreditasi Program Studi Informatika UMSIDA dapat diunduh melalui tautan ini: https://informatika.umsida.ac.id/wp-content/uploads/2025/04/file_sertifikat_25011014431107106055201_1742941667.pdf",
+    },
+    {
+        "question": "Apakah ada dokumen SK mengenai alternatif pengganti skripsi?",
+        "ground_truth": "Ya, Surat Keputusan (SK) Alternatif Pengganti Skripsi berisi aturan mengenai jalur kelulusan non-skripsi dan dapat diunduh di sini: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/984SK-Penetapan-Kegiatan-Alternatif-sebagai-Pengganti-Tesis-Skripsi-Tugas-Akhir_11zon.pdf",
+    },
+    {
+        "question": "Minta link download untuk Template Proposal Skripsi.",
+        "ground_truth": "Template Proposal Skripsi Informatika yang berisi format baku dan aturan penulisan dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/template-proposal-skripsi-1.docx",
+    },
+    {
+        "question": "Dimana saya bisa mendapatkan formulir pendaftaran ujian proposal skripsi?",
+        "ground_truth": "Form Pendaftaran Ujian Proposal Skripsi dapat diunduh melalui tautan berikut: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/FORM-DAFTAR-UJIAN-PROPOSAL-SKRIPSI-FST.pdf",
+    },
+    {
+        "question": "Bagaimana format penulisan proposal PKL? Apakah ada panduannya?",
+        "ground_truth": "Format Penulisan Proposal PKL 2023 tersedia sebagai panduan dan template yang dapat diunduh di sini: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/Format_Penulisan_PROPOSAL_PKL-1-1.docx",
+    },
+    {
+        "question": "Apa fungsi dari surat keterangan lulus praktikum dan dimana downloadnya?",
+        "ground_truth": "Surat Keterangan Lulus Praktikum menyatakan bahwa mahasiswa telah menyelesaikan seluruh beban praktikum dan menjadi syarat mendaftar skripsi/yudisium. Dokumennya dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/SURAT-PERNYATAAN-LULUS-PRAKTIKUM-1-1.pdf",
+    },
+    {
+        "question": "Saya ingin mengajukan dispensasi SPP, apakah ada formulirnya?",
+        "ground_truth": "Ya, Form Surat Permohonan Dispensasi SPP untuk mengajukan keringanan atau penundaan pembayaran dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/Format-Surat-Permohonan-Dispensasi-SPP-TA-Ganjil-2023-2024-1.docx",
+    },
+    {
+        "question": "Apa peran HIMATIKA bagi mahasiswa?",
+        "ground_truth": "HIMATIKA (Himpunan Mahasiswa Informatika) adalah wadah pengembangan pola pikir, kepribadian, dan potensi intelektual mahasiswa Informatika yang berlandaskan nilai-nilai Islam.",
+    },
+    {
+        "question": "Apa itu ASLAB dan apa saja tugasnya?",
+        "ground_truth": "ASLAB adalah Asisten Laboratorium Informatika, sebuah organisasi yang bertugas mewujudkan laboratorium bermutu, menyelenggarakan praktikum, dan menyediakan sarana penelitian.",
+    },
+    {
+        "question": "Apa saja mata kuliah di semester 8?",
+        "ground_truth": "Mata kuliah di Semester 8 hanya berfokus pada pengerjaan Skripsi dengan bobot 6 SKS.",
+    },
+    {
+        "question": "Apakah ada form persetujuan dosen pembimbing skripsi?",
+        "ground_truth": "Ya, Form Persetujuan Dosen Pembimbing Skripsi sebagai bukti tertulis persetujuan dosbing dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/05/Form-Persetujuan-Dosen-Pembimbing-Skripsi_New.docx",
+    },
+]
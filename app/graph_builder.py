@@ -1,18 +1,72 @@
-from typing import Annotated, List, Sequence, TypedDict
+from typing import Annotated, Any, Dict, List, Sequence, TypedDict
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
 from langchain_core.documents import Document
 import operator
+import re
 from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, END
 import os
+import time
 from datetime import datetime
+from app.chunk_resolver import ChunkResolver, to_doc_refs
 
 class GraphState(TypedDict):
     question: str
     messages: Annotated[Sequence[BaseMessage], operator.add]
-    document: List[Document]
+    # Hanya {"id", "score"} per chunk; teks dimuat ulang lewat ChunkResolver saat dibutuhkan
+    # agar checkpoint per giliran tetap kecil
+    doc_refs: List[Dict[str, Any]]
     sources: str
     query_type: str
+    timings: Dict[str, float]
+    prompt_cache: Dict[str, int]
+    answer_cache_hit: bool
+
+
+def normalize_question(question: str) -> str:
+    """Normalisasi pertanyaan (huruf kecil, tanpa tanda baca, spasi tunggal) untuk kunci dedup/cache."""
+    text = re.sub(r"[^\w\s]", " ", question.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def build_chat_inputs(message: str) -> GraphState:
+    """Input state untuk satu giliran chat (dipakai /chat, /chat/batch & evaluasi)."""
+    return {
+        "question": message,
+        "messages": [HumanMessage(content=message, additional_kwargs={"timestamp": datetime.now().isoformat()})],
+        # Channel tanpa reducer tetap berisi nilai giliran sebelumnya; giliran non-RAG
+        # tidak boleh mengembalikan chunk/sumber dari giliran RAG sebelumnya
+        "doc_refs": [],
+        "sources": "",
+        "timings": {},
+        "prompt_cache": {},
+        "answer_cache_hit": False,
+    }
+
+
+def extract_answer(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Mengambil jawaban akhir dari state hasil graph.invoke.
+    Mengembalikan {"content", "timestamp", "id"}.
+    """
+    answer = {"content": "", "timestamp": datetime.now().isoformat(), "id": None}
+
+    # Prioritas 1: Jika output ada di key 'generation' (umum untuk RAG graph sederhana)
+    if result.get("generation"):
+        answer["content"] = result["generation"]
+    # Prioritas 2: Jika output ada di key 'answer'
+    elif result.get("answer"):
+        answer["content"] = result["answer"]
+    # Prioritas 3: Jika output ada di list 'messages' (umum untuk Chat graph)
+    elif result.get("messages"):
+        last_message = result["messages"][-1]
+        answer["content"] = last_message.content
+        answer["id"] = getattr(last_message, "id", None)
+        if hasattr(last_message, "additional_kwargs"):
+            answer["timestamp"] = last_message.additional_kwargs.get("timestamp", answer["timestamp"])
+    else:
+        answer["content"] = "Maaf, sistem tidak dapat menghasilkan jawaban (Format output tidak dikenali)."
+    return answer
 
 
 def node_condense_question(state: GraphState, llm, condense_prompt) -> str:
@@ -36,34 +90,70 @@ def node_condense_question(state: GraphState, llm, condense_prompt) -> str:
     print(f"Condensed question: {condensed_question}")
     return {"question": condensed_question}
 
-def node_retrieve_documents(state: GraphState, retriever) -> GraphState:
+def node_retrieve_documents(state: GraphState, retriever, chunk_resolver: ChunkResolver) -> GraphState:
     """
     Retrieve documents based on the question in the state.
     """
     question = state["question"]
     documents = retriever.invoke(question)
-    if not documents:
-        sources_str = "Tidak ada sumber dokumen yang spesifik."
-    else:
-        unique_sources = set()
-        for doc in documents:
-            # Ambil nama file dari path 'source' di metadata
-            source = doc.metadata.get('source', 'Tidak diketahui')
-            unique_sources.add(os.path.basename(source))
-        sources_str = "\n".join([f"- {s}" for s in sorted(list(unique_sources))])
-    
     print(f"Retrieved {len(documents)} documents for question: {question}")
-    return {"document": documents, "sources": sources_str}
+    chunk_resolver.remember(documents)
+    return {"doc_refs": to_doc_refs(documents), "sources": format_sources(documents)}
+
+def node_rerank_documents(state: GraphState, reranker, chunk_resolver: ChunkResolver) -> GraphState:
+    """
+    Rerank the retrieved candidates and keep only the top documents.
+    """
+    question = state["question"]
+    candidates = chunk_resolver.resolve(state["doc_refs"])
+    documents = reranker.rerank(question, candidates)
+    print(f"Reranked {len(candidates)} -> {len(documents)} documents")
+    return {"doc_refs": to_doc_refs(documents), "sources": format_sources(documents)}
+
+def render_chat_history(messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """
+    Salinan riwayat chat yang deterministik: hanya role + isi, tanpa id/timestamp,
+    sehingga prefix prompt identik antar giliran dalam satu thread.
+    """
+    rendered = []
+    for msg in messages:
+        if msg.type == "human":
+            rendered.append(HumanMessage(content=msg.content))
+        elif msg.type == "ai":
+            rendered.append(AIMessage(content=msg.content))
+    return rendered
+
+def get_prompt_cache_usage(response) -> Dict[str, int]:
+    """Ambil jumlah token prompt yang terbaca dari cache provider (jika dilaporkan)."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    cached_tokens = (usage.get("input_token_details") or {}).get("cache_read")
+    if cached_tokens is None:
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        cached_tokens = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if not usage and cached_tokens is None:
+        return {}
+    return {"input_tokens": usage.get("input_tokens", 0), "cached_tokens": cached_tokens or 0}
 
-def node_answer_rag(state: GraphState, llm, rag_prompt) -> str:
+def node_answer_rag(state: GraphState, llm, rag_prompt, chunk_resolver: ChunkResolver, prompt_assembly: str = "legacy", answer_cache=None) -> str:
     """
     Answer the question using the retrieved documents.
     """
     question = state["question"]
-    documents = state["document"]
+    documents = chunk_resolver.resolve(state["doc_refs"])
     message = state["messages"]
     sources = state["sources"]
 
+    # Jawaban untuk pertanyaan + himpunan chunk yang sama sudah pernah dibuat
+    if answer_cache is not None and documents:
+        cached_answer = answer_cache.get(question, documents)
+        if cached_answer is not None:
+            print(f"Answer cache hit for question: {question}")
+            return {
+                "messages": [AIMessage(content=cached_answer, additional_kwargs={"timestamp": datetime.now().isoformat()})],
+                "prompt_cache": {},
+                "answer_cache_hit": True,
+            }
+
     # --- PERUBAHAN DIMULAI DARI SINI ---
     
     # 1. Panggil format_docs untuk mengubah List[Document] menjadi String
@@ -73,21 +163,44 @@ def node_answer_rag(state: GraphState, llm, rag_prompt) -> str:
     # 2. Gunakan Chain standar (Prompt | LLM | Parser)
     #    Kita TIDAK menggunakan create_stuff_documents_chain lagi karena 
     #    kita sudah memformat dokumennya sendiri secara manual di atas.
-    rag_chain = rag_prompt | llm | StrOutputParser()
+    if prompt_assembly == "prefix_cache":
+        # Riwayat (tanpa pertanyaan saat ini) dikirim sebagai pesan deterministik
+        response = (rag_prompt | llm).invoke(
+            {
+                "question": question,
+                "context": formatted_context,
+                "chat_history": render_chat_history(message[:-1]),
+                "sources": sources,
+            }
+        )
+        answer = StrOutputParser().invoke(response)
+        prompt_cache = get_prompt_cache_usage(response)
+        if prompt_cache:
+            print(f"Prompt cache: {prompt_cache['cached_tokens']}/{prompt_cache['input_tokens']} token dari cache")
+    else:
+        rag_chain = rag_prompt | llm | StrOutputParser()
 
-    answer = rag_chain.invoke(
-        {
-            "question": question,
-            "context": formatted_context, # Masukkan string yang sudah ada URL-nya
-            "chat_history": message,
-            "sources": sources,
-        }
-    )
+        answer = rag_chain.invoke(
+            {
+                "question": question,
+                "context": formatted_context, # Masukkan string yang sudah ada URL-nya
+                "chat_history": message,
+                "sources": sources,
+            }
+        )
+        prompt_cache = {}
     # --- PERUBAHAN SELESAI ---
 
     print(f"Generated answer: {answer}")
+
+    if answer_cache is not None and documents:
+        answer_cache.put(question, documents, answer)
     
-    return {"messages": [AIMessage(content=answer, additional_kwargs={"timestamp": datetime.now().isoformat()})]}
+    return {
+        "messages": [AIMessage(content=answer, additional_kwargs={"timestamp": datetime.now().isoformat()})],
+        "prompt_cache": prompt_cache,
+        "answer_cache_hit": False,
+    }
 
 def node_answer_general_chat(state: GraphState, llm, general_chat_prompt) -> str:
     """
@@ -108,6 +221,19 @@ def node_answer_general_chat(state: GraphState, llm, general_chat_prompt) -> str
     
     return {"messages": [AIMessage(content=response, additional_kwargs={"timestamp": datetime.now().isoformat()})]}
 
+def node_answer_template(state: GraphState, template_engine) -> GraphState:
+    """
+    Jawab basa-basi (sapaan, terima kasih, identitas, kemampuan) dari template tanpa LLM.
+    """
+    question = state["messages"][-1].content
+    intent = template_engine.match(question, record=False)
+    response = template_engine.respond(intent, turn=len(state["messages"]) // 2)
+    print(f"Template response for intent: {intent}")
+    return {
+        "messages": [AIMessage(content=response, additional_kwargs={"timestamp": datetime.now().isoformat()})],
+        "query_type": "template",
+    }
+
 def node_classify_question(state: GraphState, llm, classification_prompt) -> str:
     """
     Classify the question to determine if it requires RAG or general chat response.
@@ -126,6 +252,11 @@ def node_classify_question(state: GraphState, llm, classification_prompt) -> str
     else:
         return {"query_type": "general_chat"}
     
+def decide_entry(state: GraphState, template_engine) -> str:
+    if template_engine.match(state["messages"][-1].content):
+        return "generate_answer_template"
+    return "classify_question"
+
 def decide_path(state: GraphState) -> str:
     if state["query_type"] == "rag_query":
         print(f"Deciding path for query type: {state['query_type']}")
@@ -134,6 +265,17 @@ def decide_path(state: GraphState) -> str:
         print(f"Deciding path for query type: {state['query_type']}")
         return "generate_answer_general"
 
+def format_sources(documents: List[Document]) -> str:
+    if not documents:
+        return "Tidak ada sumber dokumen yang spesifik."
+
+    unique_sources = set()
+    for doc in documents:
+        # Ambil nama file dari path 'source' di metadata
+        source = doc.metadata.get('source', 'Tidak diketahui')
+        unique_sources.add(os.path.basename(source))
+    return "\n".join([f"- {s}" for s in sorted(list(unique_sources))])
+
 def format_docs(docs):
     formatted_docs = []
     for doc in docs:
@@ -163,22 +305,66 @@ def format_docs(docs):
         
     return "\n\n---\n\n".join(formatted_docs)
 
-def create_graph(llm, retriever, rag_prompt, condense_prompt, classification_prompt, general_chat_prompt ,memory):
+def timed_node(name: str, node_fn):
+    """
+    Membungkus node agar durasinya dicatat ke state["timings"] (ms).
+    Node berjalan berurutan, jadi timings cukup digabung dari state sebelumnya.
+    """
+    def run(state: GraphState):
+        start = time.perf_counter()
+        update = node_fn(state) or {}
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"⏱️ {name}: {elapsed_ms:.1f} ms")
+        timings = {**(state.get("timings") or {}), **(update.get("timings") or {}), f"{name}_ms": round(elapsed_ms, 2)}
+        return {**update, "timings": timings}
+    return run
+
+def create_graph(llm, retriever, rag_prompt, condense_prompt, classification_prompt, general_chat_prompt ,memory, reranker=None, node_llms=None, prompt_assembly="legacy", answer_cache=None, chunk_resolver=None, template_engine=None):
     """
     Membuat dan mengompilasi StateGraph LangGraph.
+    Jika `reranker` diberikan, node rerank disisipkan antara retrieval dan jawaban RAG.
+    `node_llms` memetakan nama node ("classify", "condense", "answer_rag", "general_chat")
+    ke LLM khusus node tersebut; node yang tidak ada di mapping memakai `llm`.
+    `prompt_assembly="prefix_cache"` dipakai bersama RAG_PREFIX_CACHE_PROMPT_TEMPLATE.
+    `answer_cache` (AnswerCache) melewati panggilan LLM untuk jawaban yang sudah ada.
+    `chunk_resolver` memetakan `doc_refs` di state kembali ke Document; tanpa resolver
+    hanya cache in-process yang dipakai.
+    `template_engine` (ChatTemplateEngine) menjawab basa-basi langsung dari template,
+    sebelum klasifikasi dan tanpa panggilan LLM.
     """
+    chunk_resolver = chunk_resolver or ChunkResolver()
+    node_llms = node_llms or {}
+    classify_llm = node_llms.get("classify", llm)
+    condense_llm = node_llms.get("condense", llm)
+    answer_rag_llm = node_llms.get("answer_rag", llm)
+    general_chat_llm = node_llms.get("general_chat", llm)
 
     workflow = StateGraph(GraphState)
 
     # Tambahkan node-node ke dalam alur kerja
-    workflow.add_node("classify_question", lambda state: node_classify_question(state, llm, classification_prompt))
-    workflow.add_node("condense_question", lambda state: node_condense_question(state, llm, condense_prompt))
-    workflow.add_node("retrieve_documents", lambda state: node_retrieve_documents(state, retriever))
-    workflow.add_node("generate_answer_rag", lambda state: node_answer_rag(state, llm, rag_prompt))
-    workflow.add_node("generate_answer_general", lambda state: node_answer_general_chat(state, llm, general_chat_prompt))
+    workflow.add_node("classify_question", timed_node("classify_question", lambda state: node_classify_question(state, classify_llm, classification_prompt)))
+    workflow.add_node("condense_question", timed_node("condense_question", lambda state: node_condense_question(state, condense_llm, condense_prompt)))
+    workflow.add_node("retrieve_documents", timed_node("retrieve_documents", lambda state: node_retrieve_documents(state, retriever, chunk_resolver)))
+    workflow.add_node("generate_answer_rag", timed_node("generate_answer_rag", lambda state: node_answer_rag(state, answer_rag_llm, rag_prompt, chunk_resolver, prompt_assembly, answer_cache)))
+    if reranker:
+        workflow.add_node("rerank_documents", timed_node("rerank_documents", lambda state: node_rerank_documents(state, reranker, chunk_resolver)))
+    workflow.add_node("generate_answer_general", timed_node("generate_answer_general", lambda state: node_answer_general_chat(state, general_chat_llm, general_chat_prompt)))
+
+    if template_engine:
+        workflow.add_node("generate_answer_template", timed_node("generate_answer_template", lambda state: node_answer_template(state, template_engine)))
 
     # Tentukan alur kerjanya
-    workflow.set_entry_point("classify_question")
+    if template_engine:
+        workflow.set_conditional_entry_point(
+            lambda state: decide_entry(state, template_engine),
+            {
+                "generate_answer_template": "generate_answer_template",
+                "classify_question": "classify_question",
+            },
+        )
+        workflow.add_edge("generate_answer_template", END)
+    else:
+        workflow.set_entry_point("classify_question")
 
     workflow.add_conditional_edges(
         "classify_question",
@@ -190,7 +376,11 @@ def create_graph(llm, retriever, rag_prompt, condense_prompt, classification_pro
     )
 
     workflow.add_edge("condense_question", "retrieve_documents")
-    workflow.add_edge("retrieve_documents", "generate_answer_rag")
+    if reranker:
+        workflow.add_edge("retrieve_documents", "rerank_documents")
+        workflow.add_edge("rerank_documents", "generate_answer_rag")
+    else:
+        workflow.add_edge("retrieve_documents", "generate_answer_rag")
     workflow.add_edge("generate_answer_rag", END)
     workflow.add_edge("generate_answer_general", END)
 
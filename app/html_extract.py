@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # lxml opsional: jatuh kembali ke BeautifulSoup html.parser
+    lxml_html = None
+
+DEFAULT_HTML_CACHE_DIR = os.getenv("HTML_CACHE_DIR", ".html_cache")
+# Naikkan jika logika ekstraksi berubah agar teks lama di cache tidak dipakai
+EXTRACTOR_VERSION = "1"
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Kandidat konten utama, dicoba berurutan; jika tidak ada, seluruh <body>
+MAIN_CONTENT_XPATHS = ["//main", "//article", "//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]"]
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "iframe", "head"}
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tr", "td", "th", "ul",
+}
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class HTMLCache:
+    """
+    Cache HTML mentah & teks hasil ekstraksi di disk.
+
+    HTML disimpan per URL beserta ETag/Last-Modified untuk conditional GET;
+    teks hasil ekstraksi disimpan per (URL, hash konten), sehingga halaman yang
+    tidak berubah tidak diparse ulang meskipun server tidak mengirim ETag. URL
+    ikut menjadi kunci karena link di teks sudah di-resolve terhadap URL halaman:
+    mirror dengan byte yang sama tetap butuh link absolutnya sendiri.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_HTML_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, name)
+
+    def get_meta(self, url: str) -> Optional[Dict]:
+        try:
+            with open(self._path(_url_key(url) + ".json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get_html(self, url: str) -> Optional[bytes]:
+        try:
+            with open(self._path(_url_key(url) + ".html"), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_html(self, url: str, html: bytes, etag: Optional[str], last_modified: Optional[str]) -> str:
+        content_hash = hashlib.sha1(html).hexdigest()
+        key = _url_key(url)
+        self._write(key + ".html", html)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "fetched_at": time.time(),
+        }
+        self._write(key + ".json", json.dumps(meta).encode("utf-8"))
+        return content_hash
+
+    @staticmethod
+    def _extracted_name(url: str, content_hash: str, variant: str) -> str:
+        return f"{_url_key(url)}.{content_hash}.{variant}.v{EXTRACTOR_VERSION}.txt.json"
+
+    def get_extracted(self, url: str, content_hash: str, variant: str) -> Optional[Dict]:
+        try:
+            with open(self._path(self._extracted_name(url, content_hash, variant)), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def put_extracted(self, url: str, content_hash: str, variant: str, page: Dict) -> None:
+        self._write(self._extracted_name(url, content_hash, variant), json.dumps(page).encode("utf-8"))
+
+    def _write(self, name: str, data: bytes) -> None:
+        # Tulis ke file sementara lalu rename agar pembaca tidak melihat file setengah jadi
+        # Nama sementara unik per penulis: beberapa thread bisa menulis hash konten yang sama
+        tmp_path = self._path(f".{name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(name))
+
+
+def fetch_html(
+    url: str,
+    session: Optional[requests.Session] = None,
+    cache: Optional[HTMLCache] = None,
+    timeout: float = 15,
+) -> Tuple[bytes, str, bool]:
+    """
+    Mengambil HTML dengan conditional GET (If-None-Match / If-Modified-Since).
+    Mengembalikan (html, content_hash, not_modified).
+    """
+    session = session or requests
+    headers = dict(DEFAULT_HEADERS)
+    meta = cache.get_meta(url) if cache else None
+    cached_html = cache.get_html(url) if meta else None
+    if cached_html is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = session.get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304 and cached_html is not None:
+        return cached_html, meta["content_hash"], True
+    response.raise_for_status()
+
+    html = response.content
+    if cache:
+        content_hash = cache.put_html(url, html, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    else:
+        content_hash = hashlib.sha1(html).hexdigest()
+    return html, content_hash, False
+
+
+def _walk(element, base_url: str, out: List[str]) -> None:
+    """Satu kali penelusuran tree: kumpulkan teks, link ditulis inline sebagai "teks (url)"."""
+    # Komentar & processing instruction: tag-nya bukan string
+    if not isinstance(element.tag, str) or element.tag in SKIP_TAGS:
+        return
+    tag = element.tag
+
+    block = tag in BLOCK_TAGS
+    if block:
+        out.append("\n")
+
+    href = element.get("href") if tag == "a" else None
+    if href:
+        text = " ".join(element.text_content().split())
+        if text:
+            out.append(f"{text} ({urljoin(base_url, href)})")
+        else:
+            # Link tanpa teks (misal gambar) tidak ditulis, tapi isinya tetap ditelusuri
+            _walk_children(element, base_url, out)
+    else:
+        if element.text:
+            out.append(element.text)
+        _walk_children(element, base_url, out)
+
+    if block:
+        out.append("\n")
+
+
+def _walk_children(element, base_url: str, out: List[str]) -> None:
+    for child in element:
+        _walk(child, base_url, out)
+        if child.tail:
+            out.append(child.tail)
+
+
+def _normalize_text(pieces: List[str]) -> str:
+    lines = (" ".join(line.split()) for line in "".join(pieces).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _extract_with_lxml(html: bytes, base_url: str, main_only: bool) -> Dict:
+    root = lxml_html.fromstring(html)
+    title_nodes = root.xpath("//title")
+    title = " ".join(title_nodes[0].text_content().split()) if title_nodes else ""
+
+    container = None
+    if main_only:
+        for xpath in MAIN_CONTENT_XPATHS:
+            nodes = root.xpath(xpath)
+            if nodes:
+                container = nodes[0]
+                break
+    if container is None:
+        bodies = root.xpath("//body")
+        container = bodies[0] if bodies else root
+
+    pieces: List[str] = []
+    _walk(container, base_url, pieces)
+    return {"title": title, "text": _normalize_text(pieces)}
+
+
+def _extract_with_bs4(html: bytes, base_url: str, main_only: bool) -> Dict:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.get_text(strip=True) if soup.title else ""
+    container = None
+    if main_only:
+        container = soup.find("main") or soup.find("article") or soup.select_one("div.content")
+    container = container or soup.body or soup
+    for tag in container.find_all(list(SKIP_TAGS)):
+        tag.decompose()
+    for link in container.find_all("a", href=True):
+        text = link.get_text(" ", strip=True)
+        if text:
+            link.replace_with(f"{text} ({urljoin(base_url, link['href'])})")
+    return {"title": title, "text": _normalize_text([container.get_text(separator="\n")])}
+
+
+def extract_content(html: bytes, base_url: str, main_only: bool = True) -> Dict:
+    """
+    Mengekstrak judul & teks konten utama dari HTML. Link ditulis inline
+    sebagai "teks (url absolut)". Mengembalikan {"title": ..., "text": ...}.
+    """
+    if lxml_html is not None:
+        return _extract_with_lxml(html, base_url, main_only)
+    return _extract_with_bs4(html, base_url, main_only)
+
+
+def extract_url(
+    url: str,
+    session: Optional[requests.Session] = None,
+    cache: Optional[HTMLCache] = None,
+    main_only: bool = True,
+) -> Dict:
+    """Fetch + ekstraksi dengan cache; halaman yang tidak berubah tidak diparse ulang."""
+    html, content_hash, not_modified = fetch_html(url, session=session, cache=cache)
+    variant = "main" if main_only else "body"
+    if cache:
+        cached = cache.get_extracted(url, content_hash, variant)
+        if cached is not None:
+            return {**cached, "url": url, "content_hash": content_hash, "cached": True, "not_modified": not_modified}
+
+    page = extract_content(html, url, main_only=main_only)
+    if cache:
+        cache.put_extracted(url, content_hash, variant, page)
+    return {**page, "url": url, "content_hash": content_hash, "cached": False, "not_modified": not_modified}
+
+
+def iter_extracted_urls(
+    urls: List[str], cache: Optional[HTMLCache] = None, main_only: bool = True
+) -> Iterator[Dict]:
+    with requests.Session() as session:
+        for url in urls:
+            # Satu halaman yang gagal (jaringan maupun parse) tidak menghentikan ingest URL lainnya
+            try:
+                page = extract_url(url, session=session, cache=cache, main_only=main_only)
+            except requests.RequestException as e:
+                print(f"❌ Gagal mengambil {url}: {e}")
+                continue
+            except Exception as e:
+                print(f"❌ Gagal mengekstrak {url}: {e}")
+                continue
+            yield page
@@ -0,0 +1,298 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from app.answer_cache import changed_sources, get_document_sources, store_source_chunk_ids
+from app.dedup import DEDUP_ENABLED, MERGED_SEPARATOR, MERGED_SOURCES_KEY, StreamingDeduplicator
+from app.document_processor import iter_documents, stream_chunks
+from app.vector_versions import (
+    DEFAULT_VERSIONS_ROOT,
+    close_vector_store,
+    discard_version,
+    gc_versions,
+    new_version_dir,
+    open_vector_store,
+    publish_version,
+    validate_version,
+)
+from app.vectorstore import batched, update_chunk_metadata, write_documents
+
+JOB_TYPES = ("directory", "url_list", "file")
+DEFAULT_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "32"))
+# Job ingest lewat API hanya boleh membaca file di bawah direktori ini
+DEFAULT_INGEST_ROOT = os.getenv("INGEST_ROOT", "./documents")
+# Jeda antar batch embedding agar CPU tetap tersedia untuk request /chat
+DEFAULT_THROTTLE_S = float(os.getenv("INGEST_THROTTLE_S", "0.05"))
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class IngestJob:
+    def __init__(self, job_type: str, target: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.target = target
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.documents_parsed = 0
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        # Chunk yang disalin dari index aktif beserta embedding-nya (tidak di-embed ulang)
+        self.chunks_copied = 0
+        self.sources: List[str] = []
+        # Sumber yang himpunan chunk-nya berbeda dari index aktif sebelumnya (untuk invalidasi cache)
+        self.changed_sources: List[str] = []
+        self.version: Optional[str] = None
+        self.cancel_event = threading.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = None
+        if self.started_at:
+            elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "id": self.id,
+            "type": self.type,
+            "target": self.target,
+            "status": self.status,
+            "error": self.error,
+            "version": self.version,
+            "progress": {
+                "documents_parsed": self.documents_parsed,
+                "chunks_total": self.chunks_total,
+                "chunks_embedded": self.chunks_embedded,
+                "chunks_copied": self.chunks_copied,
+                "chunks_per_s": round(self.chunks_embedded / elapsed, 2) if elapsed else 0.0,
+            },
+            "elapsed_s": round(elapsed, 2) if elapsed else None,
+        }
+
+
+def _lower_thread_priority() -> None:
+    # Di Linux, nice berlaku per thread: worker ingest kalah prioritas dari request /chat
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except (AttributeError, OSError):
+        pass
+
+
+class IngestJobManager:
+    """
+    Menjalankan ingest di worker pool terpisah dari jalur request chat.
+
+    Index baru selalu dibangun sebagai versi baru (lihat app.vector_versions);
+    setelah lolos validasi, pointer versi dipindah dan `on_ready(vector_store, job)`
+    dipanggil untuk menukar retriever yang aktif secara atomik. Untuk setiap tipe
+    job, chunk dari index aktif (kecuali yang berasal dari sumber yang di-ingest
+    ulang) disalin beserta embedding-nya, sehingga hanya sumber job itu yang
+    di-embed ulang dan sumber lain tidak hilang dari index.
+
+    Path job harus berada di dalam `ingest_root`; path di luar root ditolak.
+    `publish(version_dir)` memindahkan pointer versi (default `publish_version`),
+    misal `VersionWatcher.publish` agar watcher tidak memuat ulang versi yang sama.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        on_ready: Callable[[Chroma, IngestJob], None],
+        get_live_store: Callable[[], Optional[Chroma]] = lambda: None,
+        versions_root: str = DEFAULT_VERSIONS_ROOT,
+        collection_name: str = "prodi_collection",
+        max_workers: int = 1,
+        ingest_root: str = DEFAULT_INGEST_ROOT,
+        publish: Optional[Callable[[str], None]] = None,
+    ):
+        self.embedding_model = embedding_model
+        self.ingest_root = os.path.realpath(ingest_root)
+        self.on_ready = on_ready
+        self.get_live_store = get_live_store
+        self.versions_root = versions_root
+        self.publish = publish or (lambda version_dir: publish_version(version_dir, versions_root))
+        self.collection_name = collection_name
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest-job")
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_type: str, target: str) -> IngestJob:
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Tipe job tidak dikenal: {job_type}. Pilihan: {', '.join(JOB_TYPES)}")
+        # realpath dulu agar "../" maupun symlink tidak bisa keluar dari ingest_root
+        resolved = os.path.realpath(target)
+        if os.path.commonpath([resolved, self.ingest_root]) != self.ingest_root:
+            raise ValueError(f"Path harus berada di dalam {self.ingest_root}")
+        if not os.path.exists(resolved):
+            raise ValueError(f"Path tidak ditemukan: {target}")
+        target = resolved
+
+        job = IngestJob(job_type, target)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job)
+        print(f"📥 Job ingest {job.id} ({job_type}: {target}) masuk antrian")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[IngestJob]:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.status not in ("queued", "running"):
+            return False
+        job.cancel_event.set()
+        return True
+
+    def _check_cancelled(self, job: IngestJob) -> None:
+        if job.cancel_event.is_set():
+            raise JobCancelled()
+
+    def _run(self, job: IngestJob) -> None:
+        _lower_thread_priority()
+        build_dir, vector_store = None, None
+        try:
+            self._check_cancelled(job)
+            job.status = "running"
+            job.started_at = time.time()
+
+            build_dir = new_version_dir(self.versions_root)
+            vector_store = open_vector_store(build_dir, self.embedding_model, self.collection_name)
+            live_chunk_ids = store_source_chunk_ids(self.get_live_store())
+            # Dokumen dimuat, dipecah & di-embed per batch; memori tidak bergantung ukuran korpus
+            deduplicator = StreamingDeduplicator() if DEDUP_ENABLED else None
+            chunks = stream_chunks(self._iter_job_documents(job), deduplicator=deduplicator)
+            if not self._embed_chunks(job, vector_store, chunks):
+                raise ValueError("Tidak ada dokumen yang berhasil diproses")
+            if deduplicator:
+                self._write_merged_sources(job, vector_store, deduplicator)
+            # Job apa pun hanya mengganti sumber miliknya; sumber lain disalin dari index aktif
+            self._copy_live_chunks(job, vector_store, self._replaced_sources(job))
+
+            self._check_cancelled(job)
+            validate_version(
+                vector_store,
+                expected_chunks=job.chunks_embedded + job.chunks_copied,
+                root=self.versions_root,
+                embedding_model=self.embedding_model,
+                collection_name=self.collection_name,
+            )
+            job.changed_sources = sorted(changed_sources(live_chunk_ids, store_source_chunk_ids(vector_store)))
+            self.publish(build_dir)
+            job.version = os.path.basename(build_dir)
+            self.on_ready(vector_store, job)
+            gc_versions(self.versions_root)
+            job.status = "succeeded"
+            print(f"✅ Job ingest {job.id} selesai: {job.chunks_embedded} chunk di-embed, {job.chunks_copied} disalin")
+        except JobCancelled:
+            job.status = "cancelled"
+            if vector_store is not None:
+                close_vector_store(vector_store)
+            if build_dir:
+                discard_version(build_dir)
+            print(f"🛑 Job ingest {job.id} dibatalkan")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            if build_dir and job.version is None:
+                if vector_store is not None:
+                    close_vector_store(vector_store)
+                discard_version(build_dir)
+            print(f"❌ Job ingest {job.id} gagal: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _iter_job_documents(self, job: IngestJob) -> Iterator[Document]:
+        kwargs = {"directory": "local_dir", "url_list": "url_list_file_path", "file": "file_path"}
+        for doc in iter_documents(**{kwargs[job.type]: job.target}):
+            self._check_cancelled(job)
+            job.documents_parsed += 1
+            yield doc
+
+    def _embed_chunks(self, job: IngestJob, vector_store: Chroma, chunks: Iterable[Document]) -> int:
+        sources, seen_ids, written = set(), set(), 0
+        for batch in batched(chunks, DEFAULT_EMBED_BATCH_SIZE):
+            self._check_cancelled(job)
+            job.chunks_total += len(batch)
+            sources.update(source for doc in batch for source in get_document_sources(doc))
+            count = write_documents(vector_store, batch, len(batch), seen_ids)
+            job.chunks_embedded += count
+            written += count
+            time.sleep(DEFAULT_THROTTLE_S)
+        job.sources = sorted(sources)
+        return written
+
+    def _write_merged_sources(self, job: IngestJob, vector_store: Chroma, deduplicator: StreamingDeduplicator) -> None:
+        """Sumber duplikat yang dilewati dedup streaming dicatat di chunk yang dipertahankan."""
+        merged = deduplicator.merged_metadata()
+        if not merged:
+            return
+        update_chunk_metadata(vector_store, merged)
+        sources = {
+            source for fields in merged.values()
+            for source in fields.get(MERGED_SOURCES_KEY, "").split(MERGED_SEPARATOR) if source
+        }
+        job.sources = sorted(set(job.sources) | sources)
+
+    def _replaced_sources(self, job: IngestJob) -> Set[str]:
+        """
+        Sumber yang digantikan job: semua sumber yang menghasilkan chunk, ditambah file
+        target (sumber chunk file = nama file) agar file yang kini kosong ikut terhapus.
+        URL yang gagal diambil tidak termasuk, sehingga chunk lamanya tetap dipakai.
+        """
+        replaced = set(job.sources)
+        if job.type == "file":
+            replaced.add(os.path.basename(job.target))
+        elif job.type == "directory":
+            replaced.update(name for name in os.listdir(job.target) if name.endswith(".json"))
+        return replaced
+
+    def _copy_live_chunks(self, job: IngestJob, vector_store: Chroma, replaced_sources: set, page_size: int = 500) -> None:
+        """
+        Salin chunk index aktif (beserta embedding-nya) kecuali dari sumber yang di-ingest
+        ulang. ID chunk yang sudah ditulis job ini (ID = hash sumber + isi) tidak ditimpa.
+        """
+        live_store = self.get_live_store()
+        if live_store is None:
+            return
+
+        offset = 0
+        while True:
+            self._check_cancelled(job)
+            page = live_store.get(include=["embeddings", "documents", "metadatas"], limit=page_size, offset=offset)
+            if not page["ids"]:
+                break
+            offset += len(page["ids"])
+
+            # Chunk hasil dedup tetap disalin selama masih ada sumbernya yang tidak di-ingest ulang
+            keep = [
+                i for i, metadata in enumerate(page["metadatas"])
+                if any(
+                    source not in replaced_sources
+                    for source in get_document_sources(Document(page_content="", metadata=metadata or {}))
+                )
+            ]
+            if keep:
+                existing = set(vector_store._collection.get(ids=[page["ids"][i] for i in keep], include=[])["ids"])
+                keep = [i for i in keep if page["ids"][i] not in existing]
+            if keep:
+                vector_store._collection.add(
+                    ids=[page["ids"][i] for i in keep],
+                    embeddings=[page["embeddings"][i] for i in keep],
+                    documents=[page["documents"][i] for i in keep],
+                    metadatas=[page["metadatas"][i] for i in keep],
+                )
+                job.chunks_copied += len(keep)
@@ -2,39 +2,66 @@ from langchain_ollama import OllamaEmbeddings, OllamaLLM
 from langchain_groq import ChatGroq
 from dotenv import load_dotenv
 from langchain_huggingface import HuggingFaceEmbeddings
+from typing import Optional
 import os
 
 load_dotenv()
 groq_api_key = os.getenv("GROQ_API_KEY")
 
 DEFAULT_MODEL_NAME = "mistral:instruct"
-DEFAULT_EMBEDDING_MODEL_NAME = "nomic-embed-text"
 DEFAULT_TEMPERATURE = 0.1
+# Model Ollama tetap dimuat agar KV cache prefix prompt bisa dipakai ulang antar request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
 
-def get_llm(model_name: str = DEFAULT_MODEL_NAME, temperature: float = DEFAULT_TEMPERATURE):
+# Backend embedding: "huggingface" (PyTorch), "onnx" (ONNX Runtime, fp32/int8) atau "ollama"
+DEFAULT_EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")
+DEFAULT_EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+DEFAULT_OLLAMA_EMBEDDING_MODEL_NAME = "nomic-embed-text"
+DEFAULT_ONNX_EMBEDDING_MODEL_PATH = "models/all-MiniLM-L6-v2-onnx/model_quantized.onnx"
+
+def get_llm(model_name: str = DEFAULT_MODEL_NAME, temperature: float = DEFAULT_TEMPERATURE, **kwargs):
     try:
-        llm = OllamaLLM(model= model_name, temperature=temperature)
+        kwargs.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+        # Context cukup besar agar prompt tidak terpotong dari depan (merusak prefix cache)
+        kwargs.setdefault("num_ctx", OLLAMA_NUM_CTX)
+        llm = OllamaLLM(model= model_name, temperature=temperature, **kwargs)
         return llm
     except Exception as e:
         raise ValueError(f"Failed to initialize LLM with model {model_name}: {str(e)}") from e
     
-def get_groq_llm(model_name: str, temperature: float):
+def get_groq_llm(model_name: str, temperature: float, **kwargs):
     try:
-        llm = ChatGroq(model=model_name, temperature=temperature, api_key=groq_api_key)
+        llm = ChatGroq(model=model_name, temperature=temperature, api_key=groq_api_key, **kwargs)
         return llm
     except Exception as e:
         raise ValueError(f"Failed to initialize Groq LLM with model {model_name}: {str(e)}") from e
 
-def get_embedding(model_name : str = DEFAULT_EMBEDDING_MODEL_NAME):
+def get_embedding(model_name: Optional[str] = None, backend: Optional[str] = None):
+    """
+    Membuat model embedding sesuai backend.
+
+    `model_name` berarti nama model untuk backend huggingface/ollama dan path
+    file .onnx untuk backend onnx. Jika kosong, dibaca dari EMBEDDING_MODEL_NAME
+    atau default masing-masing backend.
+    """
+    backend = (backend or DEFAULT_EMBEDDING_BACKEND).lower()
+    model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME")
     try:
-        embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        return embeddings
+        if backend == "huggingface":
+            return HuggingFaceEmbeddings(model_name=model_name or DEFAULT_EMBEDDING_MODEL_NAME)
+        if backend == "onnx":
+            from app.onnx_embeddings import OnnxEmbeddings
+            return OnnxEmbeddings(model_path=model_name or DEFAULT_ONNX_EMBEDDING_MODEL_PATH)
+        if backend == "ollama":
+            return OllamaEmbeddings(model=model_name or DEFAULT_OLLAMA_EMBEDDING_MODEL_NAME)
     except Exception as e:
-        raise ValueError(f"Failed to initialize embeddings with model {model_name}: {str(e)}") from e
+        raise ValueError(f"Failed to initialize {backend} embeddings with model {model_name}: {str(e)}") from e
+    raise ValueError(f"Unknown embedding backend: {backend}")
 
 if __name__ == "__main__":
     llm = get_llm()
     print(f"LLM initialized with model: {llm.model}")
     
     embeddings = get_embedding()
-    print(f"Embeddings initialized with model: {embeddings.model}")    
+    print(f"Embeddings initialized with backend: {DEFAULT_EMBEDDING_BACKEND}")    
@@ -0,0 +1,363 @@
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+import httpx
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import ConfigDict
+
+from app.llm_config import DEFAULT_MODEL_NAME, get_groq_llm, get_llm
+
+# Konfigurasi gateway (bisa diubah lewat environment variable)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_RATE_PER_SEC = float(os.getenv("LLM_RATE_PER_SEC", "5"))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "10"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+LLM_FALLBACK = os.getenv("LLM_FALLBACK", "1") == "1"
+OLLAMA_FALLBACK_MODEL = os.getenv("OLLAMA_FALLBACK_MODEL", DEFAULT_MODEL_NAME)
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+DEFAULT_GROQ_MODEL = "llama-3.1-8b-instant"
+
+# Routing model per node graph. Node bantu (klasifikasi & condense) dibatasi
+# output-nya agar biayanya hanya sebagian kecil dari panggilan jawaban.
+NODE_LLM_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "classify": {
+        "model": os.getenv("CLASSIFY_MODEL", DEFAULT_GROQ_MODEL),
+        "temperature": 0.0,
+        "max_tokens": 4,  # "rag_query" / "general_chat" cukup beberapa token
+        "stop": ["\n"],
+    },
+    "condense": {
+        "model": os.getenv("CONDENSE_MODEL", DEFAULT_GROQ_MODEL),
+        "temperature": 0.0,
+        "max_tokens": 96,
+        "stop": ["\n"],
+    },
+    # Node jawaban tidak dibatasi: jawaban prosedural bisa panjang
+    "answer_rag": {
+        "model": os.getenv("ANSWER_MODEL", DEFAULT_GROQ_MODEL),
+        "temperature": 0.1,
+    },
+    "general_chat": {
+        "model": os.getenv("GENERAL_CHAT_MODEL", DEFAULT_GROQ_MODEL),
+        "temperature": 0.1,
+    },
+}
+
+
+class TokenBucket:
+    """Rate limiter token bucket sederhana (thread-safe)."""
+
+    def __init__(self, rate_per_sec: float, capacity: int):
+        self.rate = rate_per_sec
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        if self.rate <= 0:
+            return True
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_s = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_s = min(wait_s, remaining)
+            time.sleep(wait_s)
+
+
+class ProviderStats:
+    """Metrik latency dan error per provider (jendela latency bergulir)."""
+
+    def __init__(self, window: int = 500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self.calls = 0
+        self.errors: Counter = Counter()
+        self.counters: Counter = Counter()
+
+    def record_success(self, latency_ms: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(latency_ms)
+
+    def record_error(self, error: BaseException) -> None:
+        with self._lock:
+            self.calls += 1
+            status = get_status_code(error)
+            self.errors[str(status) if status else type(error).__name__] += 1
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def percentile(self, p: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95, p99 = self.percentile(50), self.percentile(95), self.percentile(99)
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": dict(self.errors),
+                "latency_ms": {
+                    "p50": round(p50, 1) if p50 else None,
+                    "p95": round(p95, 1) if p95 else None,
+                    "p99": round(p99, 1) if p99 else None,
+                },
+                **dict(self.counters),
+            }
+
+
+class Provider:
+    """Sumber daya yang dipakai bersama oleh semua gateway ke provider yang sama."""
+
+    def __init__(self, name: str, max_concurrency: int, rate_per_sec: float, burst: int):
+        self.name = name
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.stats = ProviderStats()
+
+
+_providers: Dict[str, Provider] = {}
+_providers_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+
+def get_provider(
+    name: str,
+    max_concurrency: int = LLM_MAX_CONCURRENCY,
+    rate_per_sec: float = LLM_RATE_PER_SEC,
+    burst: int = LLM_RATE_BURST,
+) -> Provider:
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = Provider(name, max_concurrency, rate_per_sec, burst)
+        return _providers[name]
+
+
+def get_shared_http_client() -> httpx.Client:
+    """Connection pool HTTP yang dipakai bersama oleh semua client LLM."""
+    global _http_client
+    with _providers_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONCURRENCY * 2,
+                    max_keepalive_connections=LLM_MAX_CONCURRENCY,
+                ),
+                timeout=httpx.Timeout(LLM_TIMEOUT_S, connect=5.0),
+            )
+        return _http_client
+
+
+def get_status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error: BaseException) -> bool:
+    status = get_status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES or status >= 500
+    # Timeout / koneksi putus (httpx, SDK groq/openai, atau builtin)
+    return isinstance(error, (httpx.TimeoutException, httpx.TransportError, TimeoutError, ConnectionError)) or \
+        type(error).__name__ in ("APITimeoutError", "APIConnectionError")
+
+
+def _retry_after_seconds(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_ai_message(result: Any) -> BaseMessage:
+    # OllamaLLM mengembalikan string, ChatGroq mengembalikan AIMessage
+    if isinstance(result, BaseMessage):
+        return result
+    return AIMessage(content=str(result))
+
+
+class LLMGateway(BaseChatModel):
+    """
+    Chat model pembungkus yang menambahkan ketahanan di depan provider LLM:
+    batas concurrency + rate limit per provider, retry dengan jittered backoff
+    untuk 429/5xx/timeout, hedging opsional setelah p95, dan failover ke
+    model lokal (Ollama). Bisa dipakai langsung di chain `prompt | llm | parser`.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    primary: Any
+    fallback: Optional[Any] = None
+    primary_name: str = "groq"
+    fallback_name: str = "ollama"
+    max_retries: int = LLM_MAX_RETRIES
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    hedge_requests: bool = LLM_HEDGE
+    hedge_min_samples: int = 20
+    acquire_timeout: float = LLM_TIMEOUT_S
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm-gateway"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {
+            "primary": self.primary_name,
+            "primary_params": getattr(self.primary, "_identifying_params", {}),
+        }
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        provider = get_provider(self.primary_name)
+        try:
+            message = self._call_with_retries(provider, messages, stop, kwargs)
+        except Exception as e:
+            if self.fallback is None:
+                raise
+            print(f"⚠️ Provider '{self.primary_name}' gagal ({e}). Failover ke '{self.fallback_name}'...")
+            provider.stats.incr("failovers")
+            # Parameter khusus provider (misal max_tokens) tidak diteruskan ke model lokal
+            message = self._call_once(get_provider(self.fallback_name), self.fallback, messages, stop, {})
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _call_once(self, provider: Provider, model, messages, stop, kwargs) -> BaseMessage:
+        if not provider.bucket.acquire(timeout=self.acquire_timeout):
+            provider.stats.incr("rate_limited")
+            raise TimeoutError(f"Rate limit lokal provider '{provider.name}' penuh")
+        if not provider.semaphore.acquire(timeout=self.acquire_timeout):
+            provider.stats.incr("concurrency_timeouts")
+            raise TimeoutError(f"Slot concurrency provider '{provider.name}' penuh")
+
+        start = time.perf_counter()
+        try:
+            result = model.invoke(messages, stop=stop, **kwargs)
+        except Exception as e:
+            provider.stats.record_error(e)
+            raise
+        finally:
+            provider.semaphore.release()
+
+        provider.stats.record_success((time.perf_counter() - start) * 1000)
+        return _to_ai_message(result)
+
+    def _call_with_retries(self, provider: Provider, messages, stop, kwargs) -> BaseMessage:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self._call_maybe_hedged(provider, messages, stop, kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                # Full jitter: sebar retry agar tidak serentak menghantam provider
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                delay = max(delay, _retry_after_seconds(e) or 0)
+                provider.stats.incr("retries")
+                print(f"🔁 Retry {attempt + 1}/{self.max_retries} ke '{provider.name}' dalam {delay:.2f}s ({e})")
+                time.sleep(delay)
+
+    def _call_maybe_hedged(self, provider: Provider, messages, stop, kwargs) -> BaseMessage:
+        deadline_ms = None
+        if self.hedge_requests:
+            deadline_ms = provider.stats.percentile(95, min_samples=self.hedge_min_samples)
+        if deadline_ms is None:
+            return self._call_once(provider, self.primary, messages, stop, kwargs)
+
+        first = _hedge_executor.submit(self._call_once, provider, self.primary, messages, stop, kwargs)
+        done, _ = wait([first], timeout=deadline_ms / 1000)
+        if done:
+            return first.result()
+
+        # Request pertama melewati p95: kirim request cadangan, pakai yang selesai duluan
+        provider.stats.incr("hedged")
+        second = _hedge_executor.submit(self._call_once, provider, self.primary, messages, stop, kwargs)
+        done, pending = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = next(iter(done))
+        if winner.exception() is not None and pending:
+            winner = next(iter(pending))
+        if winner is second:
+            provider.stats.incr("hedge_wins")
+        return winner.result()
+
+
+def get_llm_gateway(model_name: str, temperature: float, **kwargs) -> LLMGateway:
+    """
+    Membuat gateway dengan Groq sebagai provider utama (retry di-handle gateway,
+    bukan SDK) dan Ollama lokal sebagai fallback.
+    """
+    primary = get_groq_llm(
+        model_name=model_name,
+        temperature=temperature,
+        http_client=get_shared_http_client(),
+        max_retries=0,
+        timeout=LLM_TIMEOUT_S,
+        cache=False,  # Cache global sudah dicek di level gateway
+        **kwargs,
+    )
+    fallback = get_llm(OLLAMA_FALLBACK_MODEL, temperature, cache=False) if LLM_FALLBACK else None
+    return LLMGateway(primary=primary, fallback=fallback)
+
+
+def get_node_llms(settings: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Membuat LLM per node sesuai NODE_LLM_SETTINGS. Batas max_tokens & stop
+    di-bind per panggilan, sehingga node dengan model yang sama tetap
+    memakai satu gateway/connection pool.
+    """
+    settings = settings or NODE_LLM_SETTINGS
+    gateways: Dict[tuple, LLMGateway] = {}
+    node_llms = {}
+    for node, config in settings.items():
+        key = (config["model"], config.get("temperature", 0.1))
+        if key not in gateways:
+            gateways[key] = get_llm_gateway(model_name=key[0], temperature=key[1])
+
+        bind_kwargs = {name: config[name] for name in ("max_tokens", "stop") if config.get(name) is not None}
+        node_llms[node] = gateways[key].bind(**bind_kwargs) if bind_kwargs else gateways[key]
+    return node_llms
+
+
+def gateway_stats() -> Dict[str, Any]:
+    with _providers_lock:
+        providers = dict(_providers)
+    return {name: provider.stats.snapshot() for name, provider in providers.items()}
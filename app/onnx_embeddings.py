@@ -0,0 +1,152 @@
+import argparse
+import os
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_ONNX_MODEL_DIR = "models/all-MiniLM-L6-v2-onnx"
+FP32_MODEL_FILENAME = "model.onnx"
+INT8_MODEL_FILENAME = "model_quantized.onnx"
+DEFAULT_MAX_LENGTH = 256  # Batas sequence all-MiniLM-L6-v2
+DEFAULT_BATCH_SIZE = 32
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Embedding sentence-transformers (MiniLM) yang dijalankan dengan ONNX Runtime di CPU.
+
+    Model dan `tokenizer.json` dibaca dari file lokal (tanpa akses jaringan).
+    Hasilnya mean pooling + normalisasi L2, sama seperti pipeline
+    sentence-transformers, sehingga vektornya kompatibel dengan index
+    yang dibuat oleh backend HuggingFace.
+    """
+
+    def __init__(
+        self,
+        model_path: str = os.path.join(DEFAULT_ONNX_MODEL_DIR, INT8_MODEL_FILENAME),
+        tokenizer_path: Optional[str] = None,
+        max_length: int = DEFAULT_MAX_LENGTH,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        num_threads: Optional[int] = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        tokenizer_path = tokenizer_path or os.path.join(os.path.dirname(model_path), "tokenizer.json")
+        for path in (model_path, tokenizer_path):
+            if not os.path.exists(path):
+                raise FileNotFoundError(
+                    f"{path} tidak ditemukan. Jalankan 'python -m app.onnx_embeddings' untuk export model."
+                )
+
+        self.model_path = model_path
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        embeddings: List[List[float]] = []
+        for i in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[i:i + self.batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            # Mean pooling (abaikan token padding) lalu normalisasi L2
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            embeddings.extend(pooled.tolist())
+
+        return embeddings
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+
+def export_onnx_model(
+    model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+    output_dir: str = DEFAULT_ONNX_MODEL_DIR,
+    quantize: bool = True,
+    opset: int = 17,
+) -> str:
+    """
+    Export model HuggingFace ke ONNX (fp32) dan, jika diminta, versi int8
+    hasil dynamic quantization. Butuh torch + transformers (sekali saja);
+    runtime cukup onnxruntime + tokenizers.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModel, AutoTokenizer
+
+    if "/" not in model_name:
+        model_name = f"sentence-transformers/{model_name}"
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(output_dir)  # Menghasilkan tokenizer.json
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(
+                input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids
+            ).last_hidden_state
+
+    model = _LastHiddenState(AutoModel.from_pretrained(model_name)).eval()
+    sample = tokenizer(["Apa visi Program Studi Informatika?"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+
+    fp32_path = os.path.join(output_dir, FP32_MODEL_FILENAME)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+            opset_version=opset,
+            dynamo=False,
+        )
+    print(f"✅ Model ONNX fp32 disimpan ke: {fp32_path}")
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = os.path.join(output_dir, INT8_MODEL_FILENAME)
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    print(f"✅ Model ONNX int8 disimpan ke: {int8_path}")
+    return int8_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export model embedding ke ONNX (+ int8).")
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--output-dir", default=DEFAULT_ONNX_MODEL_DIR)
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    export_onnx_model(args.model, args.output_dir, quantize=not args.no_quantize)
@@ -86,6 +86,31 @@ JAWABAN:
     ]
 )
 
+# ==========================================
+# 2b. RAG PROMPT (MODE PREFIX CACHE)
+# ==========================================
+# Urutan dari yang paling statis ke paling dinamis agar prefix prompt bisa
+# dipakai ulang oleh cache provider / KV cache Ollama:
+#   system prompt (sama untuk semua request)
+#   -> riwayat chat sebagai pesan asli (append-only per thread)
+#   -> konteks (berubah tiap pertanyaan) -> pertanyaan
+RAG_PREFIX_CACHE_PROMPT_TEMPLATE = ChatPromptTemplate.from_messages(
+    [
+        SystemMessagePromptTemplate.from_template(SYSTEM_MESSAGE_CONTENT),
+        MessagesPlaceholder(variable_name="chat_history"),
+        HumanMessagePromptTemplate.from_template(
+            """KONTEKS INFORMASI:
+{context}
+
+PERTANYAAN MAHASISWA:
+{question}
+
+JAWABAN:
+"""
+        ),
+    ]
+)
+
 # ==========================================
 # 3. CLASSIFICATION PROMPT
 # ==========================================
@@ -0,0 +1,284 @@
+import argparse
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from queue import Empty, Full, Queue
+from typing import Any, Dict, List, Optional
+
+from app.graph_builder import normalize_question
+
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG", "1") == "1"
+DEFAULT_QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", ".query_log.sqlite")
+DEFAULT_QUERY_LOG_BATCH_SIZE = int(os.getenv("QUERY_LOG_BATCH_SIZE", "200"))
+DEFAULT_QUERY_LOG_FLUSH_MS = float(os.getenv("QUERY_LOG_FLUSH_MS", "1000"))
+DEFAULT_QUERY_LOG_QUEUE_SIZE = int(os.getenv("QUERY_LOG_QUEUE_SIZE", "10000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    thread_id TEXT,
+    tenant TEXT,
+    question TEXT NOT NULL,
+    normalized TEXT NOT NULL,
+    condensed TEXT,
+    route TEXT,
+    doc_ids TEXT,
+    timings TEXT,
+    total_ms REAL,
+    answer_cache_hit INTEGER NOT NULL DEFAULT 0,
+    prompt_cached_tokens INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_queries_normalized ON queries(normalized);
+CREATE INDEX IF NOT EXISTS idx_queries_ts ON queries(ts);
+"""
+
+_COLUMNS = (
+    "ts", "source", "thread_id", "tenant", "question", "normalized", "condensed", "route", "doc_ids",
+    "timings", "total_ms", "answer_cache_hit", "prompt_cached_tokens", "error",
+)
+_SENTINEL = object()
+
+
+def build_entry(
+    question: str,
+    result: Optional[Dict[str, Any]] = None,
+    total_ms: Optional[float] = None,
+    thread_id: Optional[str] = None,
+    source: str = "chat",
+    error: Optional[str] = None,
+    tenant: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Satu baris log dari pertanyaan + state akhir graph (atau error). `tenant` None = tenant bawaan."""
+    result = result or {}
+    route = result.get("query_type")
+    doc_refs = result.get("doc_refs") or []
+    return {
+        "ts": time.time(),
+        "source": source,
+        "thread_id": thread_id,
+        "tenant": tenant,
+        "question": question,
+        "normalized": normalize_question(question),
+        "condensed": result.get("question"),
+        "route": route,
+        "doc_ids": json.dumps([ref["id"] for ref in doc_refs]),
+        "timings": json.dumps(result.get("timings") or {}),
+        "total_ms": None if total_ms is None else round(total_ms, 2),
+        "answer_cache_hit": int(bool(result.get("answer_cache_hit"))),
+        "prompt_cached_tokens": (result.get("prompt_cache") or {}).get("cached_tokens", 0),
+        "error": error,
+    }
+
+
+class QueryLog:
+    """
+    Log pertanyaan append-only untuk analitik (pertanyaan populer, turn paling
+    lambat, peluang cache).
+
+    `record()` hanya memasukkan entri ke antrean in-memory (tanpa I/O), jadi
+    tidak menambah latensi /chat. Thread background menulis antrean ke SQLite
+    dalam batch. Jika antrean penuh, entri dibuang dan dihitung di `stats()`.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_QUERY_LOG_PATH,
+        batch_size: int = DEFAULT_QUERY_LOG_BATCH_SIZE,
+        flush_ms: float = DEFAULT_QUERY_LOG_FLUSH_MS,
+        queue_size: int = DEFAULT_QUERY_LOG_QUEUE_SIZE,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000.0
+        self._queue: "Queue[Any]" = Queue(maxsize=queue_size)
+        self._stats_lock = threading.Lock()
+        self._stats = {"recorded": 0, "written": 0, "dropped": 0, "batches": 0, "write_errors": 0}
+
+        init_db(path)
+        self._worker = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(entry)
+            key = "recorded"
+        except Full:
+            key = "dropped"
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def _run(self) -> None:
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        closing = False
+        while not closing:
+            batch: List[Dict[str, Any]] = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except Empty:
+                    break
+                if item is _SENTINEL:
+                    closing = True
+                    break
+                batch.append(item)
+            if batch:
+                self._write(conn, batch)
+        conn.close()
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]) -> None:
+        placeholders = ", ".join("?" * len(_COLUMNS))
+        try:
+            with conn:
+                conn.executemany(
+                    f"INSERT INTO queries ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                    [tuple(entry.get(column) for column in _COLUMNS) for entry in batch],
+                )
+            key, count = "written", len(batch)
+        except sqlite3.Error as e:
+            print(f"⚠️ Query log: gagal menulis {len(batch)} entri: {e}")
+            key, count = "write_errors", 1
+        with self._stats_lock:
+            self._stats[key] += count
+            self._stats["batches"] += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush sisa antrean sebelum proses berhenti."""
+        if self._worker.is_alive():
+            try:
+                self._queue.put(_SENTINEL, timeout=timeout)
+            except Full:
+                return
+            self._worker.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {**self._stats, "queued": self._queue.qsize()}
+
+
+def init_db(path: str = DEFAULT_QUERY_LOG_PATH) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(_SCHEMA)
+        # Log lama dibuat sebelum ada kolom tenant
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(queries)")}
+        if "tenant" not in columns:
+            conn.execute("ALTER TABLE queries ADD COLUMN tenant TEXT")
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def _connect_readonly(path: str) -> Optional[sqlite3.Connection]:
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _query(path: str, sql: str, params: tuple) -> List[Dict[str, Any]]:
+    conn = _connect_readonly(path)
+    if conn is None:
+        return []
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+
+def top_questions(path: str = DEFAULT_QUERY_LOG_PATH, limit: int = 20, days: float = 30) -> List[Dict[str, Any]]:
+    """Pertanyaan (ternormalisasi) yang paling sering ditanyakan."""
+    return _query(
+        path,
+        """
+        SELECT normalized, MAX(question) AS question, COUNT(*) AS count,
+               ROUND(AVG(total_ms), 1) AS avg_ms, GROUP_CONCAT(DISTINCT route) AS routes
+        FROM queries WHERE ts >= ? AND error IS NULL
+        GROUP BY normalized ORDER BY count DESC LIMIT ?
+        """,
+        (time.time() - days * 86400, limit),
+    )
+
+
+def slowest_turns(path: str = DEFAULT_QUERY_LOG_PATH, limit: int = 20, days: float = 30) -> List[Dict[str, Any]]:
+    """Turn paling lambat beserta rincian waktu per tahap."""
+    return _query(
+        path,
+        """
+        SELECT ts, question, route, total_ms, timings, answer_cache_hit
+        FROM queries WHERE ts >= ? AND total_ms IS NOT NULL
+        ORDER BY total_ms DESC LIMIT ?
+        """,
+        (time.time() - days * 86400, limit),
+    )
+
+
+def cache_opportunities(path: str = DEFAULT_QUERY_LOG_PATH, limit: int = 20, days: float = 30) -> List[Dict[str, Any]]:
+    """
+    Pertanyaan RAG berulang yang masih sering miss answer cache, diurutkan
+    menurut total waktu yang bisa dihemat jika jawabannya di-cache/di-warm-up.
+    """
+    return _query(
+        path,
+        """
+        SELECT normalized, MAX(question) AS question, COUNT(*) AS count,
+               SUM(1 - answer_cache_hit) AS misses, ROUND(AVG(total_ms), 1) AS avg_ms,
+               ROUND(SUM(CASE WHEN answer_cache_hit = 0 THEN total_ms ELSE 0 END), 1) AS miss_ms
+        FROM queries WHERE ts >= ? AND route = 'rag_query' AND error IS NULL
+        GROUP BY normalized HAVING count > 1 AND misses > 0
+        ORDER BY miss_ms DESC LIMIT ?
+        """,
+        (time.time() - days * 86400, limit),
+    )
+
+
+def hot_questions(path: str = DEFAULT_QUERY_LOG_PATH, limit: int = 50) -> List[str]:
+    """Pertanyaan RAG populer dari traffic asli (untuk warm-up)."""
+    return [row["question"] for row in top_questions(path, limit) if "rag_query" in (row["routes"] or "")]
+
+
+def _print_rows(title: str, rows: List[Dict[str, Any]], columns: List[str]) -> None:
+    print(f"\n{title}")
+    if not rows:
+        print("  (belum ada data)")
+        return
+    for row in rows:
+        print("  " + " | ".join(str(row[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laporan query log /chat.")
+    parser.add_argument("report", choices=["top", "slow", "cache", "all"], nargs="?", default="all")
+    parser.add_argument("--path", default=DEFAULT_QUERY_LOG_PATH)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--days", type=float, default=30, help="Hanya data N hari terakhir")
+    args = parser.parse_args()
+
+    if args.report in ("top", "all"):
+        _print_rows(
+            "🔥 Pertanyaan terpopuler (jumlah | rata-rata ms | route | pertanyaan):",
+            top_questions(args.path, args.limit, args.days),
+            ["count", "avg_ms", "routes", "question"],
+        )
+    if args.report in ("slow", "all"):
+        _print_rows(
+            "🐢 Turn paling lambat (total ms | route | cache hit | timings | pertanyaan):",
+            slowest_turns(args.path, args.limit, args.days),
+            ["total_ms", "route", "answer_cache_hit", "timings", "question"],
+        )
+    if args.report in ("cache", "all"):
+        _print_rows(
+            "💡 Peluang cache (jumlah | miss | ms terbuang | pertanyaan):",
+            cache_opportunities(args.path, args.limit, args.days),
+            ["count", "misses", "miss_ms", "question"],
+        )
@@ -0,0 +1,76 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+
+from app.vectorstore import get_document_id
+
+# Cross-encoder multilingual kecil agar cukup cepat di CPU untuk teks Bahasa Indonesia
+DEFAULT_RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+DEFAULT_RERANK_TOP_N = 4
+DEFAULT_RERANK_BATCH_SIZE = 16
+DEFAULT_RERANK_CACHE_SIZE = 4096
+
+
+class CrossEncoderReranker:
+    """
+    Mengurutkan ulang kandidat hasil retrieval dengan cross-encoder lokal (CPU)
+    dan hanya mengembalikan `top_n` dokumen teratas.
+
+    Skor disimpan di cache LRU dengan kunci (query, ID chunk) sehingga pasangan
+    yang sama tidak dihitung ulang.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_RERANKER_MODEL,
+        top_n: int = DEFAULT_RERANK_TOP_N,
+        batch_size: int = DEFAULT_RERANK_BATCH_SIZE,
+        cache_size: int = DEFAULT_RERANK_CACHE_SIZE,
+    ):
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device="cpu")
+        self.top_n = top_n
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _score(self, query: str, documents: List[Document]) -> List[float]:
+        keys = [(query, get_document_id(doc)) for doc in documents]
+        scores = {}
+        with self._lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[key] = self._cache[key]
+
+        missing = [(key, doc) for key, doc in zip(keys, documents) if key not in scores]
+        if missing:
+            pairs = [(query, doc.page_content) for _, doc in missing]
+            predicted = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+            with self._lock:
+                for (key, _), score in zip(missing, predicted):
+                    scores[key] = float(score)
+                    self._cache[key] = float(score)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [scores[key] for key in keys]
+
+    def rerank(self, query: str, documents: List[Document]) -> List[Document]:
+        if not documents:
+            return []
+
+        scores = self._score(query, documents)
+        ranked = sorted(zip(documents, scores), key=lambda item: item[1], reverse=True)
+
+        # Salinan, bukan mutasi: Document yang sama juga dipegang cache ChunkResolver
+        # dan dipakai bersama oleh request lain
+        return [
+            Document(page_content=doc.page_content, metadata={**doc.metadata, "rerank_score": score}, id=doc.id)
+            for doc, score in ranked[:self.top_n]
+        ]
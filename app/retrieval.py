@@ -0,0 +1,215 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+LAYANAN_SOURCES = ["Layanan Kemahasiswaan.pdf", "https://informatika.umsida.ac.id/layanan-kemahasiswaan/"]
+KURIKULUM_SOURCES = ["Sebaran Mata Kuliah.pdf", "https://informatika.umsida.ac.id/sebaran-mata-kuliah/"]
+PROFIL_SOURCES = ["Visi dan Misi.pdf", "https://informatika.umsida.ac.id/tentang-umsida/visi-dan-misi/"]
+PROGRAM_SOURCES = ["Program Akademik.pdf", "https://informatika.umsida.ac.id/program-akademik-2/"]
+
+# Aturan deteksi intent: kata kunci di pertanyaan -> kategori metadata (JSON)
+# dan sumber (PDF/halaman web) yang membahas topik yang sama.
+# Dokumen PDF tidak punya metadata "category", jadi disaring lewat "source".
+CATEGORY_RULES: Dict[str, Dict[str, List[str]]] = {
+    "Download": {
+        "keywords": ["jadwal praktikum", "praktikum"],
+        "sources": LAYANAN_SOURCES,
+    },
+    "Fasilitas": {
+        "keywords": ["lab", "laboratorium"],
+        "sources": LAYANAN_SOURCES,
+    },
+    "Fasilitas Umum": {
+        "keywords": ["fasilitas", "masjid", "parkir", "perpustakaan", "kantin", "gedung"],
+        "sources": LAYANAN_SOURCES,
+    },
+    "Layanan": {
+        "keywords": ["surat aktif", "aktif kuliah", "surat online", "layanan"],
+        "sources": LAYANAN_SOURCES,
+    },
+    "Organisasi": {
+        "keywords": ["organisasi", "himatika", "hima", "aslab", "asisten lab", "ukm"],
+        "sources": LAYANAN_SOURCES,
+    },
+    "Kurikulum": {
+        "keywords": ["mata kuliah", "matkul", "kurikulum", "sks", "semester \\d"],
+        "sources": KURIKULUM_SOURCES,
+    },
+    "Profil Prodi": {
+        "keywords": ["visi", "misi", "tujuan prodi", "profil lulusan", "lulusan"],
+        "sources": PROFIL_SOURCES,
+    },
+    "MBKM": {
+        "keywords": ["mbkm", "magang", "pertukaran mahasiswa", "proyek independen", "merdeka belajar"],
+        "sources": PROGRAM_SOURCES,
+    },
+    "Sertifikasi": {
+        "keywords": ["sertifikasi", "pelatihan"],
+        "sources": PROGRAM_SOURCES,
+    },
+    "Dokumen Akademik": {
+        "keywords": ["akreditasi", "sk", "surat keputusan", "perubahan nama", "lulus praktikum"],
+        "sources": [],
+    },
+    "Administrasi Skripsi": {
+        "keywords": ["berita acara", "sempro", "seminar proposal", "sidang", "ujian skripsi",
+                     "ujian proposal", "dosen pembimbing", "dosbing", "pendaftaran ujian"],
+        "sources": [],
+    },
+    "Panduan Skripsi": {
+        "keywords": ["template proposal", "proposal skripsi", "panduan skripsi"],
+        "sources": [],
+    },
+    "Panduan PKL": {
+        "keywords": ["pkl", "praktek kerja lapangan", "praktik kerja lapangan"],
+        "sources": [],
+    },
+    "Administrasi Akademik": {
+        "keywords": ["revisi nilai", "perbaikan nilai"],
+        "sources": [],
+    },
+    "Keuangan": {
+        "keywords": ["spp", "dispensasi", "biaya", "pembayaran", "ukt"],
+        "sources": [],
+    },
+}
+
+_CATEGORY_PATTERNS = {
+    category: re.compile(r"\b(?:" + "|".join(rule["keywords"]) + r")\b")
+    for category, rule in CATEGORY_RULES.items()
+}
+
+
+def detect_categories(question: str) -> List[str]:
+    """Deteksi kategori dari pertanyaan berdasarkan kata kunci (tanpa LLM)."""
+    text = question.lower()
+    return [category for category, pattern in _CATEGORY_PATTERNS.items() if pattern.search(text)]
+
+
+def build_metadata_filter(question: str) -> Optional[Dict[str, Any]]:
+    """
+    Membuat filter `where` Chroma dari kategori yang terdeteksi.
+    Mengembalikan None jika tidak ada kategori yang cocok (pencarian tanpa filter).
+    """
+    categories = detect_categories(question)
+    if not categories:
+        return None
+
+    sources = sorted({s for c in categories for s in CATEGORY_RULES[c]["sources"]})
+    category_clause = {"category": {"$in": categories}}
+    if not sources:
+        return category_clause
+    return {"$or": [category_clause, {"source": {"$in": sources}}]}
+
+
+def relevance_from_distance(distance: float, space: str) -> float:
+    """
+    Jarak Chroma -> kemiripan kosinus. Koleksi "cosine"/"ip" menyimpan 1 - kosinus;
+    koleksi "l2" (default versi lama) menyimpan L2 kuadrat, yang untuk embedding
+    ternormalisasi (MiniLM via huggingface/onnx) sama dengan 2 - 2 * kosinus.
+    """
+    if space == "l2":
+        return 1.0 - distance / 2.0
+    return 1.0 - distance
+
+
+def cut_by_score(
+    scored: List[Tuple[Document, float]],
+    min_k: int,
+    score_threshold: float,
+    score_gap: float,
+) -> Tuple[List[Tuple[Document, float]], str]:
+    """
+    Memotong hasil (urut skor menurun) di posisi pertama setelah `min_k` di mana
+    skor di bawah `score_threshold`, atau turun lebih dari `score_gap` (relatif)
+    dibanding hasil sebelumnya. Mengembalikan (hasil terpotong, alasan).
+    """
+    # Minimal satu chunk selalu dipertahankan (min_k <= 0 akan membandingkan dengan scored[-1])
+    for i in range(max(1, min_k), len(scored)):
+        score, previous = scored[i][1], scored[i - 1][1]
+        if score < score_threshold:
+            return scored[:i], "threshold"
+        if previous > 0 and (previous - score) / previous > score_gap:
+            return scored[:i], "gap"
+    return scored, "max_k"
+
+
+class CategoryAwareRetriever(BaseRetriever):
+    """
+    Retriever yang mempersempit pencarian vektor ke kategori/sumber yang relevan
+    dengan pertanyaan. Jika hasil terfilter kosong, jatuh kembali ke pencarian biasa.
+
+    Dengan `adaptive_k`, `k` menjadi batas atas: hasil dipotong saat skor relevansi
+    anjlok (lihat `cut_by_score`), minimal `min_k` chunk. Skor relevansi berupa
+    kemiripan kosinus (lihat `relevance_from_distance`) dan selalu disimpan di
+    `metadata["score"]`. `score_threshold` bergantung model embedding & korpus,
+    jadi kalibrasi dulu dengan benchmarks/adaptive_k.py sebelum adaptive k diaktifkan.
+    """
+
+    vector_store: Any
+    k: int = 15
+    use_metadata_filter: bool = True
+    adaptive_k: bool = False
+    min_k: int = 3
+    score_threshold: float = 0.3
+    score_gap: float = 0.15
+
+    def _search(self, query: str, where: Optional[Dict[str, Any]]) -> List[Document]:
+        # Skor dihitung sendiri dari jarak mentah: relevance score bawaan LangChain untuk
+        # koleksi l2 (1 - d / sqrt(2)) tidak memperhitungkan bahwa Chroma memakai L2 kuadrat
+        kwargs = {"filter": where} if where else {}
+        space = (self.vector_store._collection.metadata or {}).get("hnsw:space", "l2")
+        scored = [
+            (doc, relevance_from_distance(distance, space))
+            for doc, distance in self.vector_store.similarity_search_with_score(query, k=self.k, **kwargs)
+        ]
+        if self.adaptive_k and scored:
+            kept, reason = cut_by_score(scored, self.min_k, self.score_threshold, self.score_gap)
+            print(
+                f"📏 Adaptive k: {len(kept)}/{len(scored)} chunk "
+                f"(skor {kept[0][1]:.3f} -> {kept[-1][1]:.3f}, berhenti karena {reason})"
+            )
+            scored = kept
+
+        documents = []
+        for doc, score in scored:
+            doc.metadata["score"] = round(float(score), 4)
+            documents.append(doc)
+        return documents
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        where = build_metadata_filter(query) if self.use_metadata_filter else None
+        if where:
+            documents = self._search(query, where)
+            if documents:
+                print(f"🔎 Filter metadata aktif: {where}")
+                return documents
+            print(f"⚠️ Filter {where} tidak menemukan dokumen, fallback ke pencarian tanpa filter.")
+        return self._search(query, None)
+
+
+class SwappableRetriever(BaseRetriever):
+    """
+    Retriever yang isinya bisa ditukar saat runtime (misal setelah ingest selesai)
+    tanpa membangun ulang graph. Penukaran referensi bersifat atomik.
+    """
+
+    inner: Optional[Any] = None
+
+    def swap(self, inner: Any) -> Any:
+        previous = self.inner
+        self.inner = inner
+        return previous
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        inner = self.inner
+        if inner is None:
+            return []
+        return inner.invoke(query)
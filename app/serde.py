@@ -0,0 +1,209 @@
+import argparse
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from typing import Any, Tuple
+
+import ormsgpack
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    import zstandard
+except ImportError:  # zstandard opsional: tanpa kompresi
+    zstandard = None
+
+# "compact" = tulis msgpack ringkas (+zstd); "jsonplus" = format bawaan LangGraph.
+# Keduanya tetap bisa dibaca, jadi bisa di-rollback tanpa migrasi balik.
+SERDE_FORMAT = os.getenv("SERDE_FORMAT", "compact")
+SERDE_ZSTD_LEVEL = int(os.getenv("SERDE_ZSTD_LEVEL", "3"))
+# Payload kecil tidak dikompresi: header zstd lebih besar dari penghematannya
+SERDE_ZSTD_MIN_BYTES = int(os.getenv("SERDE_ZSTD_MIN_BYTES", "512"))
+
+TYPE_COMPACT = "cmsgpack"
+TYPE_COMPACT_ZSTD = "cmsgpack+zstd"
+
+# Kode ext msgpack untuk skema ringkas; field bernilai default tidak ditulis
+EXT_TYPES = {
+    HumanMessage: 1,
+    AIMessage: 2,
+    SystemMessage: 3,
+    ToolMessage: 4,
+    Document: 5,
+}
+EXT_CLASSES = {code: cls for cls, code in EXT_TYPES.items()}
+# Objek lain (set, datetime, Send, ...) dibungkus utuh dengan JsonPlusSerializer
+EXT_FALLBACK = 127
+
+_OPTIONS = (
+    ormsgpack.OPT_NON_STR_KEYS
+    | ormsgpack.OPT_PASSTHROUGH_DATACLASS
+    | ormsgpack.OPT_PASSTHROUGH_DATETIME
+    | ormsgpack.OPT_PASSTHROUGH_ENUM
+    | ormsgpack.OPT_PASSTHROUGH_UUID
+    | ormsgpack.OPT_REPLACE_SURROGATES
+)
+
+
+class CompactSerializer:
+    """
+    Serializer checkpoint LangGraph (SerializerProtocol) yang lebih ringkas
+    dari JsonPlusSerializer bawaan.
+
+    Message & Document ditulis sebagai ext msgpack berkode kecil berisi field
+    non-default saja (tanpa nama modul/kelas dan field kosong), lalu payload
+    yang cukup besar dikompresi zstd. Tipe lain diserahkan ke JsonPlusSerializer,
+    dan data lama (tipe "msgpack"/"json") tetap dibaca lewat serializer tersebut.
+    """
+
+    def __init__(
+        self,
+        compact_writes: bool = True,
+        zstd_level: int = SERDE_ZSTD_LEVEL,
+        zstd_min_bytes: int = SERDE_ZSTD_MIN_BYTES,
+    ):
+        self.compact_writes = compact_writes
+        self.zstd_level = zstd_level
+        self.zstd_min_bytes = zstd_min_bytes
+        self.fallback = JsonPlusSerializer()
+        # Objek zstandard tidak thread-safe: satu compressor per thread
+        self._local = threading.local()
+
+    def _compressor(self):
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.zstd_level)
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.compressor, self._local.decompressor
+
+    def _default(self, obj: Any) -> ormsgpack.Ext:
+        code = EXT_TYPES.get(type(obj))
+        if code is not None:
+            fields = obj.model_dump(exclude_defaults=True, exclude={"type"})
+            return ormsgpack.Ext(code, self._pack(fields))
+        return ormsgpack.Ext(EXT_FALLBACK, self._pack(self.fallback.dumps_typed(obj)))
+
+    def _ext_hook(self, code: int, data: bytes) -> Any:
+        if code == EXT_FALLBACK:
+            type_, payload = self._unpack(data)
+            return self.fallback.loads_typed((type_, payload))
+        return EXT_CLASSES[code](**self._unpack(data))
+
+    def _pack(self, obj: Any) -> bytes:
+        return ormsgpack.packb(obj, default=self._default, option=_OPTIONS)
+
+    def _unpack(self, data: bytes) -> Any:
+        return ormsgpack.unpackb(data, ext_hook=self._ext_hook, option=ormsgpack.OPT_NON_STR_KEYS)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if not self.compact_writes or obj is None or isinstance(obj, (bytes, bytearray)):
+            return self.fallback.dumps_typed(obj)
+
+        payload = self._pack(obj)
+        if zstandard is not None and len(payload) >= self.zstd_min_bytes:
+            compressor, _ = self._compressor()
+            return TYPE_COMPACT_ZSTD, compressor.compress(payload)
+        return TYPE_COMPACT, payload
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == TYPE_COMPACT_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Checkpoint terkompresi zstd, tetapi paket 'zstandard' tidak terpasang")
+            _, decompressor = self._compressor()
+            return self._unpack(decompressor.decompress(payload))
+        if type_ == TYPE_COMPACT:
+            return self._unpack(payload)
+        return self.fallback.loads_typed(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        """Versi bytes-only (untuk kolom BLOB biasa): tipe disimpan di depan payload."""
+        type_, payload = self.dumps_typed(obj)
+        return type_.encode("utf-8") + b"\0" + payload
+
+    def loads(self, data: bytes) -> Any:
+        type_, _, payload = bytes(data).partition(b"\0")
+        return self.loads_typed((type_.decode("utf-8"), payload))
+
+
+def get_checkpoint_serde() -> CompactSerializer:
+    """Serializer untuk SqliteSaver; selalu bisa membaca kedua format."""
+    return CompactSerializer(compact_writes=SERDE_FORMAT == "compact")
+
+
+def migrate_checkpoints(db_path: str, batch_size: int = 500, backup: bool = True, dry_run: bool = False) -> dict:
+    """
+    Menulis ulang kolom checkpoint (tabel `checkpoints`) dan nilai `writes` di
+    database SqliteSaver ke format ringkas. Baris yang sudah ringkas dilewati.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    if backup and not dry_run:
+        backup_path = f"{db_path}.bak-{time.strftime('%Y%m%d%H%M%S')}"
+        shutil.copy2(db_path, backup_path)
+        print(f"💾 Backup: {backup_path}")
+
+    serde = CompactSerializer(compact_writes=True)
+    conn = sqlite3.connect(db_path)
+    stats = {"rows": 0, "migrated": 0, "bytes_before": 0, "bytes_after": 0}
+    tables = [
+        ("checkpoints", "checkpoint", ["thread_id", "checkpoint_ns", "checkpoint_id"]),
+        ("writes", "value", ["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"]),
+    ]
+    try:
+        for table, column, keys in tables:
+            key_sql = ", ".join(keys)
+            where_sql = " AND ".join(f"{key} = ?" for key in keys)
+            rows = conn.execute(f"SELECT {key_sql}, type, {column} FROM {table}").fetchall()
+            updates = []
+            for row in rows:
+                key_values, type_, payload = row[:-2], row[-2], row[-1]
+                stats["rows"] += 1
+                payload_size = len(payload or b"")
+                stats["bytes_before"] += payload_size
+                if type_ in (TYPE_COMPACT, TYPE_COMPACT_ZSTD) or payload is None:
+                    stats["bytes_after"] += payload_size
+                    continue
+
+                new_type, new_payload = serde.dumps_typed(serde.loads_typed((type_, payload)))
+                # Nilai yang tetap memakai format bawaan (misal None, bytes) tidak perlu ditulis ulang
+                if new_type == type_:
+                    stats["bytes_after"] += payload_size
+                    continue
+                stats["bytes_after"] += len(new_payload)
+                stats["migrated"] += 1
+                if dry_run:
+                    continue
+                updates.append((new_type, new_payload, *key_values))
+                if len(updates) >= batch_size:
+                    conn.executemany(f"UPDATE {table} SET type = ?, {column} = ? WHERE {where_sql}", updates)
+                    conn.commit()
+                    updates = []
+            if updates:
+                conn.executemany(f"UPDATE {table} SET type = ?, {column} = ? WHERE {where_sql}", updates)
+                conn.commit()
+
+        if not dry_run and stats["migrated"]:
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrasi checkpoint SqliteSaver ke format ringkas (msgpack + zstd).")
+    parser.add_argument("--db", default="chat_history.sqlite")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--no-backup", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="Hanya hitung ukuran, tanpa menulis")
+    args = parser.parse_args()
+
+    result = migrate_checkpoints(args.db, args.batch_size, backup=not args.no_backup, dry_run=args.dry_run)
+    before, after = result["bytes_before"], result["bytes_after"]
+    ratio = f"{after / before:.1%}" if before else "-"
+    print(
+        f"✅ {result['migrated']}/{result['rows']} baris {'akan ' if args.dry_run else ''}dimigrasi; "
+        f"ukuran payload {before / 1024:.1f} KB -> {after / 1024:.1f} KB ({ratio})"
+    )
@@ -0,0 +1,204 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List
+
+from app.chunk_resolver import ChunkResolver
+from app.retrieval import SwappableRetriever
+from app.singleflight import SingleFlight
+from app.vector_versions import DEFAULT_COLLECTION_NAME, close_vector_store, current_version_dir, open_vector_store
+
+# Tenant tambahan (prodi lain) masing-masing punya root versi sendiri:
+# <TENANTS_ROOT>/<tenant>/CURRENT, dibangun dengan INGEST_TENANT=<tenant> python ingest.py
+TENANTS_ROOT = os.getenv("TENANTS_ROOT", "vector_store_tenants")
+# Tenant bawaan dilayani oleh graph utama (vector_store_versions/)
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+TENANT_MAX_OPEN = int(os.getenv("TENANT_MAX_OPEN", "8"))
+TENANT_IDLE_S = float(os.getenv("TENANT_IDLE_S", "900"))
+# Vector store tenant yang dilepas/diganti baru ditutup setelah jeda ini (request yang sedang berjalan selesai dulu)
+TENANT_RELEASE_DELAY_S = float(os.getenv("TENANT_RELEASE_DELAY_S", "30"))
+
+_TENANT_KEY = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+
+class TenantNotFound(Exception):
+    pass
+
+
+def tenant_versions_root(tenant: str, root: str = TENANTS_ROOT) -> str:
+    """Root versi vector store milik tenant. Key divalidasi agar tidak bisa keluar dari `root`."""
+    if not isinstance(tenant, str) or not _TENANT_KEY.match(tenant):
+        raise TenantNotFound(f"Tenant '{tenant}' tidak valid")
+    return os.path.join(root, tenant)
+
+
+def list_tenants(root: str = TENANTS_ROOT) -> List[str]:
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if _TENANT_KEY.match(name) and current_version_dir(os.path.join(root, name))
+    )
+
+
+class Tenant:
+    def __init__(
+        self, key: str, version_dir: str, vector_store, retriever: SwappableRetriever, chunk_resolver: ChunkResolver, graph
+    ):
+        self.key = key
+        self.version_dir = version_dir
+        self.vector_store = vector_store
+        self.retriever = retriever
+        self.chunk_resolver = chunk_resolver
+        self.graph = graph
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+
+
+class TenantRegistry:
+    """
+    Melayani beberapa koleksi (prodi) dari satu proses. Model embedding, LLM,
+    checkpointer dan cache dipakai bersama; per tenant hanya ada vector store,
+    retriever, resolver chunk dan graph (ringan).
+
+    Tenant dimuat saat pertama diminta, disimpan dalam LRU berukuran `max_open`,
+    dan dilepas setelah idle `idle_s` detik. Versi baru yang dipublikasikan untuk
+    tenant (pointer CURRENT berubah) dimuat ulang saat tenant diakses berikutnya.
+    Vector store yang dilepas atau digantikan ditutup (lihat `close_vector_store`)
+    setelah `release_delay_s` detik, sehingga memorinya benar-benar kembali.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        build_retriever: Callable[[Any], Any],
+        build_graph: Callable[[SwappableRetriever, ChunkResolver], Any],
+        root: str = TENANTS_ROOT,
+        collection_name: str = DEFAULT_COLLECTION_NAME,
+        max_open: int = TENANT_MAX_OPEN,
+        idle_s: float = TENANT_IDLE_S,
+        release_delay_s: float = TENANT_RELEASE_DELAY_S,
+    ):
+        self.embedding_model = embedding_model
+        self.build_retriever = build_retriever
+        self.build_graph = build_graph
+        self.root = root
+        self.collection_name = collection_name
+        self.max_open = max_open
+        self.idle_s = idle_s
+        self.release_delay_s = release_delay_s
+
+        self._lock = threading.Lock()
+        self._tenants: "OrderedDict[str, Tenant]" = OrderedDict()
+        # Request bersamaan untuk tenant yang belum dimuat cukup memuat sekali
+        self._loads = SingleFlight()
+        self._stats = {"hits": 0, "loads": 0, "reloads": 0, "evicted_lru": 0, "evicted_idle": 0}
+        self._tenant_stats: Dict[str, Dict[str, float]] = {}
+        self._stop = threading.Event()
+
+    def get(self, key: str) -> Tenant:
+        version_dir = current_version_dir(tenant_versions_root(key, self.root))
+        if not version_dir:
+            raise TenantNotFound(f"Tenant '{key}' belum memiliki vector store")
+
+        with self._lock:
+            tenant = self._tenants.get(key)
+            if tenant is not None:
+                self._tenants.move_to_end(key)
+                tenant.last_used = time.monotonic()
+                self._stats["hits"] += 1
+
+        if tenant is None:
+            tenant, _ = self._loads.do(key, lambda: self._load(key, version_dir))
+        elif tenant.version_dir != version_dir:
+            self._reload(tenant, version_dir)
+        return tenant
+
+    def _load(self, key: str, version_dir: str) -> Tenant:
+        with self._lock:
+            # Pemanggil sebelumnya mungkin sudah selesai memuat
+            if key in self._tenants:
+                return self._tenants[key]
+
+        start = time.perf_counter()
+        vector_store = open_vector_store(version_dir, self.embedding_model, self.collection_name)
+        retriever = SwappableRetriever()
+        retriever.swap(self.build_retriever(vector_store))
+        chunk_resolver = ChunkResolver(get_vector_store=lambda: getattr(retriever.inner, "vector_store", None))
+        tenant = Tenant(key, version_dir, vector_store, retriever, chunk_resolver, self.build_graph(retriever, chunk_resolver))
+
+        evicted = []
+        with self._lock:
+            self._tenants[key] = tenant
+            self._stats["loads"] += 1
+            self._tenant_stat(key)["loads"] += 1
+            while len(self._tenants) > self.max_open:
+                evicted.append(self._tenants.popitem(last=False)[1])
+                self._stats["evicted_lru"] += 1
+        for old in evicted:
+            close_vector_store(old.vector_store, self.release_delay_s)
+            print(f"📤 Tenant '{old.key}' dilepas (LRU)")
+        print(f"📥 Tenant '{key}' dimuat ({os.path.basename(version_dir)}) dalam {(time.perf_counter() - start) * 1000:.0f} ms")
+        return tenant
+
+    def _reload(self, tenant: Tenant, version_dir: str) -> None:
+        # Graph tetap; hanya retriever di dalam SwappableRetriever yang ditukar
+        vector_store = open_vector_store(version_dir, self.embedding_model, self.collection_name)
+        tenant.retriever.swap(self.build_retriever(vector_store))
+        previous, tenant.vector_store, tenant.version_dir = tenant.vector_store, vector_store, version_dir
+        close_vector_store(previous, self.release_delay_s)
+        with self._lock:
+            self._stats["reloads"] += 1
+        print(f"🔁 Tenant '{tenant.key}' dimuat ulang ke versi {os.path.basename(version_dir)}")
+
+    def _tenant_stat(self, key: str) -> Dict[str, float]:
+        return self._tenant_stats.setdefault(key, {"requests": 0, "errors": 0, "total_ms": 0.0, "loads": 0})
+
+    def record(self, key: str, elapsed_ms: float, error: bool = False) -> None:
+        with self._lock:
+            stat = self._tenant_stat(key)
+            stat["requests"] += 1
+            stat["errors"] += int(error)
+            stat["total_ms"] += elapsed_ms
+
+    def evict_idle(self) -> List[str]:
+        cutoff = time.monotonic() - self.idle_s
+        with self._lock:
+            idle = [tenant for tenant in self._tenants.values() if tenant.last_used < cutoff]
+            for tenant in idle:
+                del self._tenants[tenant.key]
+            self._stats["evicted_idle"] += len(idle)
+        for tenant in idle:
+            close_vector_store(tenant.vector_store, self.release_delay_s)
+            print(f"📤 Tenant '{tenant.key}' dilepas (idle > {self.idle_s:.0f} detik)")
+        return [tenant.key for tenant in idle]
+
+    def start(self, interval_s: float = 60.0) -> "TenantRegistry":
+        def run():
+            while not self._stop.wait(interval_s):
+                self.evict_idle()
+
+        threading.Thread(target=run, name="tenant-reaper", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tenants = {}
+            for key, stat in self._tenant_stats.items():
+                tenant = self._tenants.get(key)
+                tenants[key] = {
+                    "requests": stat["requests"],
+                    "errors": stat["errors"],
+                    "avg_ms": round(stat["total_ms"] / stat["requests"], 1) if stat["requests"] else 0.0,
+                    "loads": stat["loads"],
+                    "open": tenant is not None,
+                    "version": os.path.basename(tenant.version_dir) if tenant else None,
+                    "idle_s": round(time.monotonic() - tenant.last_used, 1) if tenant else None,
+                    "chunk_resolver": tenant.chunk_resolver.stats() if tenant else None,
+                }
+            return {**self._stats, "open": len(self._tenants), "max_open": self.max_open, "tenants": tenants}
@@ -0,0 +1,342 @@
+import argparse
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import chromadb
+from chromadb.api.shared_system_client import SharedSystemClient
+from chromadb.config import Settings
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from app.vectorstore import COLLECTION_METADATA, get_or_create_vector_store, write_documents
+
+DEFAULT_VERSIONS_ROOT = os.getenv("VECTOR_STORE_ROOT", "vector_store_versions")
+LEGACY_VECTOR_STORE_DIR = "vector_store"
+POINTER_FILE = "CURRENT"
+DEFAULT_COLLECTION_NAME = "prodi_collection"
+DEFAULT_KEEP_VERSIONS = int(os.getenv("VECTOR_STORE_KEEP_VERSIONS", "3"))
+DEFAULT_RELOAD_INTERVAL_S = float(os.getenv("VECTOR_STORE_RELOAD_S", "5"))
+# Versi lama ditutup setelah jeda ini agar request yang masih memakainya selesai dulu
+DEFAULT_RELEASE_DELAY_S = float(os.getenv("VECTOR_STORE_RELEASE_DELAY_S", "30"))
+
+# Validasi sebelum versi baru dipublikasikan
+SMOKE_QUERY = os.getenv("VECTOR_STORE_SMOKE_QUERY", "informatika umsida")
+MAX_SMOKE_LATENCY_MS = float(os.getenv("VECTOR_STORE_MAX_SMOKE_MS", "2000"))
+# Versi baru yang jauh lebih kecil dari versi aktif kemungkinan hasil ingest yang rusak
+MIN_CHUNK_RATIO = float(os.getenv("VECTOR_STORE_MIN_CHUNK_RATIO", "0.5"))
+
+# chromadb menyimpan satu System (SQLite + index HNSW di memori) per direktori secara
+# global dan tidak pernah melepasnya; jumlah pemakai dihitung agar bisa ditutup eksplisit
+_open_stores: Dict[str, int] = {}
+_open_stores_lock = threading.Lock()
+
+
+class VersionValidationError(Exception):
+    pass
+
+
+def new_version_dir(root: str = DEFAULT_VERSIONS_ROOT) -> str:
+    """Direktori versi baru; nama diawali timestamp agar urut secara leksikal."""
+    version = time.strftime("v%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    path = os.path.join(root, version)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def list_versions(root: str = DEFAULT_VERSIONS_ROOT) -> List[str]:
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        os.path.join(root, name) for name in os.listdir(root)
+        if name.startswith("v") and os.path.isdir(os.path.join(root, name))
+    )
+
+
+def current_version_dir(root: str = DEFAULT_VERSIONS_ROOT) -> Optional[str]:
+    """Membaca pointer versi aktif. None jika belum pernah ada versi yang dipublikasikan."""
+    try:
+        with open(os.path.join(root, POINTER_FILE), "r", encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    path = os.path.join(root, name)
+    return path if name and os.path.isdir(path) else None
+
+
+def publish_version(version_dir: str, root: str = DEFAULT_VERSIONS_ROOT) -> None:
+    """Memindahkan pointer ke versi baru secara atomik (tulis file sementara lalu os.replace)."""
+    tmp_path = os.path.join(root, f".{POINTER_FILE}.{uuid.uuid4().hex[:6]}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version_dir))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, POINTER_FILE))
+    print(f"🔀 Versi vector store aktif: {os.path.basename(version_dir)}")
+
+
+def open_vector_store(
+    version_dir: str, embedding_model, collection_name: str = DEFAULT_COLLECTION_NAME
+) -> Chroma:
+    client = chromadb.PersistentClient(path=version_dir, settings=Settings(persist_directory=version_dir))
+    with _open_stores_lock:
+        _open_stores[client._identifier] = _open_stores.get(client._identifier, 0) + 1
+    # Metrik hanya ditentukan saat koleksi dibuat; versi lama (l2) tetap dibuka apa adanya
+    exists = any(c.name == collection_name for c in client.list_collections())
+    return Chroma(
+        client=client,
+        collection_name=collection_name,
+        embedding_function=embedding_model,
+        collection_metadata=None if exists else COLLECTION_METADATA,
+    )
+
+
+def close_vector_store(vector_store: Chroma, delay_s: float = 0.0) -> None:
+    """
+    Melepas vector store hasil `open_vector_store`. Setelah pemakai terakhir
+    menutupnya, System chromadb untuk direktori itu dihentikan dan dikeluarkan
+    dari cache global sehingga index HNSW-nya bisa dibebaskan. `delay_s` memberi
+    waktu request yang masih memakai store lama untuk selesai.
+    """
+    identifier = vector_store._client._identifier
+
+    def release():
+        with _open_stores_lock:
+            remaining = _open_stores.get(identifier, 0) - 1
+            if remaining > 0:
+                _open_stores[identifier] = remaining
+                return
+            _open_stores.pop(identifier, None)
+            system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+        if system is not None:
+            system.stop()
+
+    if delay_s > 0:
+        timer = threading.Timer(delay_s, release)
+        timer.daemon = True
+        timer.start()
+    else:
+        release()
+
+
+def validate_version(
+    vector_store: Chroma,
+    expected_chunks: Optional[int] = None,
+    root: str = DEFAULT_VERSIONS_ROOT,
+    embedding_model=None,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+) -> Dict[str, Any]:
+    """
+    Memastikan versi baru layak dipublikasikan: jumlah chunk sesuai,
+    tidak menyusut drastis dibanding versi aktif, dan smoke query cukup cepat.
+    """
+    count = vector_store._collection.count()
+    if count == 0:
+        raise VersionValidationError("Versi baru tidak berisi chunk")
+    if expected_chunks is not None and count != expected_chunks:
+        raise VersionValidationError(f"Jumlah chunk {count} != {expected_chunks} yang diharapkan")
+
+    current_dir = current_version_dir(root)
+    if current_dir and embedding_model is not None:
+        current_store = open_vector_store(current_dir, embedding_model, collection_name)
+        try:
+            current_count = current_store._collection.count()
+        finally:
+            close_vector_store(current_store)
+        if current_count and count < current_count * MIN_CHUNK_RATIO:
+            raise VersionValidationError(
+                f"Jumlah chunk turun dari {current_count} ke {count} (batas rasio {MIN_CHUNK_RATIO})"
+            )
+
+    start = time.perf_counter()
+    results = vector_store.similarity_search(SMOKE_QUERY, k=1)
+    latency_ms = (time.perf_counter() - start) * 1000
+    if not results:
+        raise VersionValidationError("Smoke query tidak mengembalikan dokumen")
+    if latency_ms > MAX_SMOKE_LATENCY_MS:
+        raise VersionValidationError(f"Smoke query {latency_ms:.0f} ms melebihi {MAX_SMOKE_LATENCY_MS:.0f} ms")
+
+    report = {"chunks": count, "smoke_latency_ms": round(latency_ms, 1)}
+    print(f"🩺 Validasi versi OK: {report}")
+    return report
+
+
+def gc_versions(root: str = DEFAULT_VERSIONS_ROOT, keep: int = DEFAULT_KEEP_VERSIONS) -> List[str]:
+    """
+    Menghapus versi lama. Versi aktif dan `keep` versi terbaru dipertahankan,
+    sehingga retriever yang masih memegang versi sebelumnya tidak langsung kehilangan datanya.
+    """
+    current_dir = current_version_dir(root)
+    versions = list_versions(root)
+    retained = set(versions[-keep:]) if keep > 0 else set()
+    removed = []
+    for path in versions:
+        if path in retained or path == current_dir:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(path)
+    if removed:
+        print(f"🧹 {len(removed)} versi vector store lama dihapus")
+    return removed
+
+
+def discard_version(version_dir: str) -> None:
+    shutil.rmtree(version_dir, ignore_errors=True)
+
+
+def build_version(
+    embedding_model,
+    documents: Iterable[Document],
+    root: str = DEFAULT_VERSIONS_ROOT,
+    collection_name: str = DEFAULT_COLLECTION_NAME,
+    after_write: Optional[Callable[[Chroma], None]] = None,
+) -> Optional[Chroma]:
+    """
+    Membangun versi baru dari dokumen, memvalidasi, lalu mempublikasikannya.
+    `documents` boleh berupa generator (ditulis per batch).
+    Versi aktif tidak disentuh selama proses berjalan; jika gagal, versi baru dibuang.
+    `after_write(vector_store)` dipanggil setelah semua dokumen tertulis, sebelum validasi.
+    """
+    version_dir, vector_store = new_version_dir(root), None
+    try:
+        vector_store = open_vector_store(version_dir, embedding_model, collection_name)
+        written = write_documents(vector_store, documents)
+        if written and after_write:
+            after_write(vector_store)
+    except Exception as e:
+        print(f"❌ Gagal membangun versi {os.path.basename(version_dir)}: {e}")
+        if vector_store is not None:
+            close_vector_store(vector_store)
+        discard_version(version_dir)
+        return None
+    if not written:
+        print("⚠️ Tidak ada dokumen untuk inisialisasi vector store.")
+        close_vector_store(vector_store)
+        discard_version(version_dir)
+        return None
+
+    try:
+        validate_version(
+            vector_store,
+            expected_chunks=written,
+            root=root,
+            embedding_model=embedding_model,
+            collection_name=collection_name,
+        )
+    except VersionValidationError as e:
+        print(f"❌ Versi {os.path.basename(version_dir)} ditolak: {e}")
+        close_vector_store(vector_store)
+        discard_version(version_dir)
+        return None
+
+    publish_version(version_dir, root)
+    gc_versions(root)
+    return vector_store
+
+
+def load_current_vector_store(
+    embedding_model, root: str = DEFAULT_VERSIONS_ROOT, collection_name: str = DEFAULT_COLLECTION_NAME
+) -> Optional[Chroma]:
+    """Memuat versi aktif; jika belum ada, jatuh kembali ke direktori lama `vector_store/`."""
+    version_dir = current_version_dir(root)
+    if version_dir:
+        print(f"📂 Memuat vector store versi {os.path.basename(version_dir)}")
+        return open_vector_store(version_dir, embedding_model, collection_name)
+    return get_or_create_vector_store(
+        embedding_model=embedding_model,
+        documents=None,
+        vector_store_dir=LEGACY_VECTOR_STORE_DIR,
+        collection_name=collection_name,
+        force_rebuild=False,
+    )
+
+
+class VersionWatcher:
+    """
+    Memantau pointer versi dan memanggil `on_change(vector_store, version_dir)`
+    saat proses lain (misal script ingest) mempublikasikan versi baru. Versi yang
+    dibangun di proses ini dipublikasikan lewat `publish` agar tidak dimuat dua kali.
+    """
+
+    def __init__(
+        self,
+        embedding_model,
+        on_change: Callable[[Chroma, str], None],
+        root: str = DEFAULT_VERSIONS_ROOT,
+        collection_name: str = DEFAULT_COLLECTION_NAME,
+        interval_s: float = DEFAULT_RELOAD_INTERVAL_S,
+    ):
+        self.embedding_model = embedding_model
+        self.on_change = on_change
+        self.root = root
+        self.collection_name = collection_name
+        self.interval_s = interval_s
+        self._loaded = current_version_dir(root)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="vector-version-watcher", daemon=True)
+
+    def start(self) -> "VersionWatcher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def publish(self, version_dir: str) -> None:
+        """
+        Memindahkan pointer ke versi yang di-swap langsung oleh proses ini. Versi
+        ditandai sudah dimuat di bawah lock yang sama dengan `check`, sehingga
+        watcher tidak pernah melihat pointer baru sebagai versi asing.
+        """
+        with self._lock:
+            publish_version(version_dir, self.root)
+            self._loaded = version_dir
+
+    def check(self) -> bool:
+        with self._lock:
+            version_dir = current_version_dir(self.root)
+            if not version_dir or version_dir == self._loaded:
+                return False
+            self._loaded = version_dir
+
+        vector_store = open_vector_store(version_dir, self.embedding_model, self.collection_name)
+        try:
+            self.on_change(vector_store, version_dir)
+        except Exception:
+            close_vector_store(vector_store)
+            raise
+        print(f"🔁 Hot reload vector store ke versi {os.path.basename(version_dir)}")
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Gagal hot reload vector store: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kelola versi vector store.")
+    parser.add_argument("--root", default=DEFAULT_VERSIONS_ROOT)
+    parser.add_argument("--rollback", metavar="VERSION", help="Pindahkan pointer ke versi yang sudah ada")
+    parser.add_argument("--gc", action="store_true", help="Hapus versi lama")
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP_VERSIONS)
+    args = parser.parse_args()
+
+    if args.rollback:
+        target = os.path.join(args.root, args.rollback)
+        if not os.path.isdir(target):
+            raise SystemExit(f"❌ Versi {args.rollback} tidak ditemukan")
+        publish_version(target, args.root)
+    if args.gc:
+        gc_versions(args.root, args.keep)
+
+    current = current_version_dir(args.root)
+    for path in list_versions(args.root):
+        marker = "*" if path == current else " "
+        print(f"{marker} {os.path.basename(path)}")
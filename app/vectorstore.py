@@ -1,12 +1,78 @@
+import hashlib
 import os
 import shutil
+from itertools import islice
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 from langchain_ollama import OllamaEmbeddings
 import chromadb
 from chromadb.config import Settings
 
+# Koleksi baru memakai jarak kosinus; skor relevansi dihitung di app.retrieval.relevance_from_distance
+COLLECTION_METADATA = {"hnsw:space": "cosine"}
+
+def get_document_id(doc: Document) -> str:
+    """
+    ID chunk yang stabil: pakai ID dari vector store jika ada,
+    jika tidak, hash dari source + isi chunk.
+    """
+    if getattr(doc, "id", None):
+        return doc.id
+    raw = f"{doc.metadata.get('source', '')}\n{doc.page_content}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def batched(iterable: Iterable, size: int) -> Iterator[List]:
+    """Memecah iterable (termasuk generator) menjadi list berukuran maksimal `size`."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def write_documents(
+    vector_store: Chroma,
+    documents: Iterable[Document],
+    batch_size: int = 100,
+    seen_ids: Optional[Set[str]] = None,
+) -> int:
+    """
+    Menulis chunk ke vector store per batch. `documents` boleh berupa generator,
+    sehingga hanya satu batch yang berada di memori. Mengembalikan jumlah chunk tertulis.
+    """
+    # ID chunk deterministik agar stabil antar rebuild (dipakai cache jawaban/rerank).
+    # Chunk identik dari sumber yang sama cukup disimpan sekali.
+    seen_ids = set() if seen_ids is None else seen_ids
+    written = 0
+    for batch in batched(documents, batch_size):
+        unique_documents = {}
+        for doc in batch:
+            doc_id = get_document_id(doc)
+            if doc_id not in seen_ids:
+                seen_ids.add(doc_id)
+                unique_documents[doc_id] = doc
+        if unique_documents:
+            vector_store.add_documents(list(unique_documents.values()), ids=list(unique_documents.keys()))
+            written += len(unique_documents)
+            print(f"   ...tersimpan {written} chunk")
+    return written
+
+def update_chunk_metadata(vector_store: Chroma, updates: Dict[str, Dict], batch_size: int = 500) -> int:
+    """
+    Menambahkan field metadata ke chunk yang sudah tertulis (misal kunci gabungan
+    hasil dedup streaming). Embedding tidak dihitung ulang. Mengembalikan jumlah chunk.
+    """
+    updated = 0
+    for ids in batched(updates.keys(), batch_size):
+        current = vector_store._collection.get(ids=ids, include=["metadatas"])
+        if not current["ids"]:
+            continue
+        metadatas = [{**(metadata or {}), **updates[doc_id]} for doc_id, metadata in zip(current["ids"], current["metadatas"])]
+        vector_store._collection.update(ids=current["ids"], metadatas=metadatas)
+        updated += len(current["ids"])
+    return updated
+
 def get_or_create_vector_store(
     embedding_model: OllamaEmbeddings,
     documents: List[Document] = None,
@@ -16,6 +82,8 @@ def get_or_create_vector_store(
 ) -> Optional[Chroma]:
     try:
         # 1. Reset Database jika diminta
+        # Catatan: menghapus direktori yang sedang dibaca server. Untuk refresh tanpa downtime
+        # gunakan app.vector_versions.build_version (blue/green + pointer atomik).
         if force_rebuild and os.path.exists(vector_store_dir):
             print(f"⚠️ Force rebuild aktif. Menghapus database lama...")
             shutil.rmtree(vector_store_dir)
@@ -52,13 +120,11 @@ def get_or_create_vector_store(
                 client=persistent_client,
                 collection_name=collection_name,
                 embedding_function=embedding_model,
-                persist_directory=vector_store_dir
+                persist_directory=vector_store_dir,
+                collection_metadata=COLLECTION_METADATA,
             )
             
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i + batch_size]
-                vector_store.add_documents(batch)
-                print(f"   ...tersimpan {min(i + batch_size, len(documents))}/{len(documents)}")
+            write_documents(vector_store, documents, batch_size)
                 
             print("✅ Vector store berhasil dibuat!")
             return vector_store
@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.graph_builder import build_chat_inputs, normalize_question
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+# Batas laju agar warm-up tidak berebut kuota LLM dengan traffic asli
+WARMUP_MAX_PER_MINUTE = float(os.getenv("WARMUP_MAX_PER_MINUTE", "20"))
+WARMUP_MAX_QUESTIONS = int(os.getenv("WARMUP_MAX_QUESTIONS", "100"))
+# Selama ada traffic asli warm-up tidak berhenti, hanya melambat ke laju ini
+WARMUP_BUSY_MAX_PER_MINUTE = float(os.getenv("WARMUP_BUSY_MAX_PER_MINUTE", "4"))
+# /ready cukup menunggu N pertanyaan teratas, atau paling lama sekian detik sejak warm-up pertama dimulai
+WARMUP_READY_QUESTIONS = int(os.getenv("WARMUP_READY_QUESTIONS", "10"))
+WARMUP_READY_TIMEOUT_S = float(os.getenv("WARMUP_READY_TIMEOUT_S", "60"))
+# File teks opsional berisi pertanyaan populer (satu per baris)
+WARMUP_QUESTIONS_FILE = os.getenv("WARMUP_QUESTIONS_FILE", "warmup_questions.txt")
+
+
+def load_questions_file(path: str = WARMUP_QUESTIONS_FILE) -> List[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        return []
+
+
+def default_warmup_questions() -> List[str]:
+    """
+    Pertanyaan populer dari query log (traffic asli), WARMUP_QUESTIONS_FILE,
+    lalu dataset evaluasi.
+    """
+    from app.eval_dataset import EVAL_DATA
+    from app.query_log import hot_questions
+
+    return hot_questions(limit=WARMUP_MAX_QUESTIONS) + load_questions_file() + [item["question"] for item in EVAL_DATA]
+
+
+def unique_questions(questions: Iterable[str], limit: int = WARMUP_MAX_QUESTIONS) -> List[str]:
+    """Buang duplikat (setelah normalisasi), urutan pertama dipertahankan."""
+    seen = set()
+    result = []
+    for question in questions:
+        key = normalize_question(question)
+        if key and key not in seen:
+            seen.add(key)
+            result.append(question)
+        if len(result) >= limit:
+            break
+    return result
+
+
+class WarmupRunner:
+    """
+    Menjalankan daftar pertanyaan populer melalui graph di thread background,
+    sehingga cache LLM (SQLiteCache), cache jawaban, dan cache chunk sudah
+    terisi sebelum mahasiswa pertama bertanya.
+
+    Graph warm-up sebaiknya memakai checkpointer terpisah (MemorySaver) agar
+    riwayat chat asli tidak tercampur; thread warm-up dihapus setelah tiap
+    pertanyaan sehingga checkpointer tidak terus membesar antar run. Laju dibatasi `max_per_minute`; selama
+    `is_busy()` bernilai True (ada traffic asli) laju turun ke `busy_max_per_minute`,
+    tetapi warm-up tetap berjalan sehingga traffic terus-menerus tidak menahannya.
+
+    Readiness tidak menunggu seluruh daftar: `ready` menjadi True setelah
+    `ready_questions` pertanyaan teratas diproses, atau setelah `ready_timeout_s`
+    detik sejak warm-up pertama dimulai.
+    """
+
+    def __init__(
+        self,
+        graph,
+        get_questions: Callable[[], Iterable[str]] = default_warmup_questions,
+        max_per_minute: float = WARMUP_MAX_PER_MINUTE,
+        is_busy: Optional[Callable[[], bool]] = None,
+        busy_max_per_minute: float = WARMUP_BUSY_MAX_PER_MINUTE,
+        ready_questions: int = WARMUP_READY_QUESTIONS,
+        ready_timeout_s: float = WARMUP_READY_TIMEOUT_S,
+    ):
+        self.graph = graph
+        self.get_questions = get_questions
+        self.interval = 60.0 / max_per_minute if max_per_minute > 0 else 0.0
+        self.busy_interval = max(self.interval, 60.0 / busy_max_per_minute if busy_max_per_minute > 0 else 0.0)
+        self.is_busy = is_busy or (lambda: False)
+        self.ready_questions = ready_questions
+        self.ready_timeout_s = ready_timeout_s
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._rerun = False
+        self._ready = threading.Event()
+        self._first_started: Optional[float] = None
+        self._status: Dict[str, Any] = {"state": "idle", "runs": 0}
+
+    @property
+    def ready(self) -> bool:
+        """True setelah `ready_questions` pertanyaan pertama selesai, atau batas waktu readiness lewat."""
+        if self._ready.is_set():
+            return True
+        return self._first_started is not None and time.monotonic() - self._first_started >= self.ready_timeout_s
+
+    def start(self, reason: str = "startup") -> "WarmupRunner":
+        """Mulai warm-up di background. Jika sedang berjalan, warm-up diulang setelahnya."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                self._rerun = True
+                return self
+            if self._first_started is None:
+                self._first_started = time.monotonic()
+            self._thread = threading.Thread(target=self._run, args=(reason,), name="cache-warmup", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _run(self, reason: str) -> None:
+        while True:
+            try:
+                self._warm(reason)
+            except Exception as e:
+                print(f"❌ Warm-up gagal: {e}")
+                self._update(state="failed", error=str(e))
+            finally:
+                self._ready.set()
+
+            with self._lock:
+                if not self._rerun:
+                    return
+                self._rerun = False
+            reason = "rerun"
+
+    def _warm(self, reason: str) -> None:
+        questions = unique_questions(self.get_questions())
+        started_at = time.time()
+        self._update(
+            state="running", reason=reason, total=len(questions), completed=0, failed=0,
+            started_at=started_at, finished_at=None, error=None,
+        )
+        rate = f"maks {60 / self.interval:.0f}/menit" if self.interval else "tanpa batas laju"
+        print(f"🔥 Warm-up ({reason}): {len(questions)} pertanyaan, {rate}")
+
+        # Thread_id baru per pertanyaan: semuanya dijalankan sebagai giliran pertama (tanpa riwayat)
+        run_id = uuid.uuid4().hex[:8]
+        for i, question in enumerate(questions):
+            start = time.perf_counter()
+            config = {"configurable": {"thread_id": f"warmup_{run_id}_{i}"}}
+            try:
+                self.graph.invoke(build_chat_inputs(question), config=config)
+                self._increment("completed")
+            except Exception as e:
+                self._increment("failed")
+                print(f"⚠️ Warm-up gagal untuk '{question}': {e}")
+            finally:
+                self._delete_thread(config["configurable"]["thread_id"])
+
+            done = i + 1
+            if done % 10 == 0 or done == len(questions):
+                print(f"🔥 Warm-up {done}/{len(questions)}")
+            if done >= self.ready_questions and not self._ready.is_set():
+                self._ready.set()
+                print(f"✅ Warm-up: {done} pertanyaan teratas siap, /ready = 200")
+
+            elapsed = time.perf_counter() - start
+            interval = self.busy_interval if self.is_busy() else self.interval
+            if interval > elapsed:
+                time.sleep(interval - elapsed)
+
+        with self._lock:
+            self._status.update(state="done", finished_at=time.time(), runs=self._status["runs"] + 1)
+            status = dict(self._status)
+        print(
+            f"✅ Warm-up selesai: {status['completed']} berhasil, {status['failed']} gagal "
+            f"dalam {status['finished_at'] - started_at:.1f} detik"
+        )
+
+    def _delete_thread(self, thread_id: str) -> None:
+        # Yang dipanaskan adalah cache (LLM, jawaban, chunk), bukan checkpoint-nya
+        checkpointer = getattr(self.graph, "checkpointer", None)
+        if checkpointer is None or not hasattr(checkpointer, "delete_thread"):
+            return
+        try:
+            checkpointer.delete_thread(thread_id)
+        except Exception as e:
+            print(f"⚠️ Gagal menghapus thread warm-up {thread_id}: {e}")
+
+    def _update(self, **values) -> None:
+        with self._lock:
+            self._status.update(values)
+
+    def _increment(self, key: str) -> None:
+        with self._lock:
+            self._status[key] = self._status.get(key, 0) + 1
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._status, "ready": self.ready}
@@ -0,0 +1,86 @@
+"""
+Benchmark adaptive k: retrieval k tetap vs dipotong berdasarkan skor relevansi.
+
+Untuk setiap pertanyaan di EVAL_DATA dihitung jumlah chunk, ukuran konteks
+(token hasil format_docs, yaitu yang masuk ke prompt RAG), dan recall istilah:
+proporsi kata penting ground truth yang muncul di konteks. Recall adaptive
+sebaiknya tetap mendekati recall k tetap.
+
+Skor relevansi (kemiripan kosinus) dari retrieval k tetap juga dicetak per
+peringkat sebagai dasar kalibrasi --threshold / RETRIEVAL_SCORE_THRESHOLD.
+
+    python -m benchmarks.adaptive_k --k 15 --min-k 3 --threshold 0.3 --gap 0.15
+"""
+import argparse
+import re
+import statistics
+
+from app.chunking import count_tokens
+from app.eval_dataset import EVAL_DATA
+from app.graph_builder import format_docs
+from app.llm_config import get_embedding
+from app.retrieval import CategoryAwareRetriever
+from app.vector_versions import load_current_vector_store
+
+
+def term_recall(ground_truth, context):
+    # Kata >= 4 huruf cukup untuk membuang kata sambung; angka & URL tetap dihitung
+    terms = {t for t in re.findall(r"[\w./:-]+", ground_truth.lower()) if len(t) >= 4 or t.isdigit()}
+    if not terms:
+        return 1.0
+    context = context.lower()
+    return sum(1 for t in terms if t in context) / len(terms)
+
+
+def run(retriever, label):
+    chunks, tokens, recalls, scores = [], [], [], {}
+    for item in EVAL_DATA:
+        documents = retriever.invoke(item["question"])
+        for rank, doc in enumerate(documents, start=1):
+            scores.setdefault(rank, []).append(doc.metadata["score"])
+        context = format_docs(documents)
+        chunks.append(len(documents))
+        tokens.append(count_tokens(context))
+        recalls.append(term_recall(item["ground_truth"], context))
+    return {
+        "label": label,
+        "chunks": statistics.mean(chunks),
+        "tokens": statistics.mean(tokens),
+        "recall": statistics.mean(recalls),
+        "scores": scores,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--min-k", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--gap", type=float, default=0.15)
+    args = parser.parse_args()
+
+    vector_store = load_current_vector_store(get_embedding())
+    if not vector_store:
+        print("❌ Vector store tidak ditemukan. Jalankan ingest terlebih dahulu.")
+        return
+
+    fixed = CategoryAwareRetriever(vector_store=vector_store, k=args.k)
+    adaptive = CategoryAwareRetriever(
+        vector_store=vector_store, k=args.k, adaptive_k=True,
+        min_k=args.min_k, score_threshold=args.threshold, score_gap=args.gap,
+    )
+    results = [run(fixed, f"k={args.k}"), run(adaptive, "adaptive")]
+
+    print(f"\n{len(EVAL_DATA)} pertanyaan")
+    print(f"{'mode':<12}{'chunk':>8}{'token konteks':>16}{'recall istilah':>17}")
+    for r in results:
+        print(f"{r['label']:<12}{r['chunks']:>8.1f}{r['tokens']:>16.0f}{r['recall']:>17.3f}")
+    print("\nSkor relevansi k tetap per peringkat (min / median / maks):")
+    for rank, values in sorted(results[0]["scores"].items()):
+        print(f"  #{rank:<3}{min(values):>8.3f}{statistics.median(values):>8.3f}{max(values):>8.3f}")
+    print(f"\nKonteks {1 - results[1]['tokens'] / results[0]['tokens']:.0%} lebih kecil, "
+          f"recall {results[1]['recall'] - results[0]['recall']:+.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Ukuran & waktu encode/decode checkpoint: JsonPlusSerializer (bawaan LangGraph)
+vs CompactSerializer (msgpack ringkas, dengan/tanpa zstd).
+
+Tanpa --db, state sintetis dengan N giliran percakapan (HumanMessage dengan
+timestamp + AIMessage dengan response_metadata) dan doc_refs dipakai. Dengan
+--db, checkpoint terbaru dari chat_history.sqlite diukur ulang.
+
+    python -m benchmarks.checkpoint_serde --turns 10 --repeat 200
+    python -m benchmarks.checkpoint_serde --db chat_history.sqlite --limit 50
+"""
+import argparse
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.serde import CompactSerializer
+
+
+def synthetic_checkpoint(turns):
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(
+            content=f"Bagaimana prosedur pengajuan surat aktif kuliah semester {i + 1}?",
+            id=f"human-{i}",
+            additional_kwargs={"timestamp": datetime.now().isoformat()},
+        ))
+        messages.append(AIMessage(
+            content="Untuk mengajukan surat aktif kuliah, mahasiswa mengisi formulir layanan akademik "
+                    "melalui portal, lalu mengunggah KTM dan bukti pembayaran UKT semester berjalan. " * 3,
+            id=f"ai-{i}",
+            additional_kwargs={"timestamp": datetime.now().isoformat()},
+            response_metadata={"model_name": "llama-3.1-8b-instant", "finish_reason": "stop",
+                               "token_usage": {"prompt_tokens": 1850, "completion_tokens": 120}},
+        ))
+    return {
+        "v": 4,
+        "id": "1f0b-synthetic",
+        "ts": datetime.now().isoformat(),
+        "channel_values": {
+            "messages": messages,
+            "question": messages[-2].content,
+            "query_type": "rag_query",
+            "doc_refs": [{"id": f"chunk-{i:04d}", "score": 0.81 - i * 0.01} for i in range(15)],
+            "timings": {"retrieve_documents_ms": 42.1, "generate_answer_rag_ms": 812.4},
+        },
+        "channel_versions": {"messages": f"{turns:032d}.0.1", "question": f"{turns:032d}.0.2"},
+        "versions_seen": {"classify_question": {"messages": f"{turns:032d}.0.1"}},
+        "updated_channels": ["messages"],
+    }
+
+
+def load_checkpoints(db_path, limit):
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT type, checkpoint FROM checkpoints ORDER BY checkpoint_id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+    reader = CompactSerializer()
+    return [reader.loads_typed((type_, payload)) for type_, payload in rows]
+
+
+def measure(serde, checkpoints, repeat):
+    sizes, dumps_ms, loads_ms = [], [], []
+    for checkpoint in checkpoints:
+        encoded = serde.dumps_typed(checkpoint)
+        sizes.append(len(encoded[1]))
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serde.dumps_typed(checkpoint)
+            dumps_ms.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            serde.loads_typed(encoded)
+            loads_ms.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(sizes), statistics.median(dumps_ms), statistics.median(loads_ms)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--db", help="Ukur checkpoint asli dari database SqliteSaver")
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    if args.db:
+        checkpoints = load_checkpoints(args.db, args.limit)
+        repeat = max(1, args.repeat // 10)
+        print(f"{len(checkpoints)} checkpoint dari {args.db}")
+    else:
+        checkpoints = [synthetic_checkpoint(args.turns)]
+        repeat = args.repeat
+        print(f"Checkpoint sintetis, {args.turns} giliran")
+
+    serdes = {
+        "jsonplus": JsonPlusSerializer(),
+        "compact": CompactSerializer(zstd_min_bytes=sys.maxsize),
+        "compact+zstd": CompactSerializer(),
+    }
+
+    print(f"{'serde':<14}{'bytes':>10}{'dumps p50 ms':>15}{'loads p50 ms':>15}")
+    results = {}
+    for name, serde in serdes.items():
+        results[name] = measure(serde, checkpoints, repeat)
+        size, dumps_ms, loads_ms = results[name]
+        print(f"{name:<14}{size:>10.0f}{dumps_ms:>15.3f}{loads_ms:>15.3f}")
+
+    base = results["jsonplus"]
+    best = results["compact+zstd"]
+    print(f"\ncompact+zstd: {base[0] / best[0]:.1f}x lebih kecil, "
+          f"dumps {base[1] / best[1]:.1f}x, loads {base[2] / best[2]:.1f}x dibanding jsonplus")
+
+
+if __name__ == "__main__":
+    main()
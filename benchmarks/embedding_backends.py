@@ -0,0 +1,96 @@
+"""
+Benchmark backend embedding: throughput ingest, latency query, dan recall retrieval.
+
+Backend "huggingface" (PyTorch, dipakai sekarang) menjadi baseline. Recall@k
+dihitung sebagai irisan top-k hasil backend lain terhadap top-k baseline untuk
+setiap pertanyaan di EVAL_DATA.
+
+Jalankan dari root project (setelah `python -m app.onnx_embeddings`):
+    python -m benchmarks.embedding_backends --k 5
+"""
+import argparse
+import os
+import statistics
+import time
+
+import numpy as np
+
+from app.document_processor import load_custom_json, split_documents
+from app.eval_dataset import EVAL_DATA
+from app.llm_config import get_embedding
+from app.onnx_embeddings import DEFAULT_ONNX_MODEL_DIR, FP32_MODEL_FILENAME, INT8_MODEL_FILENAME
+
+BACKENDS = {
+    "huggingface": lambda: get_embedding(backend="huggingface"),
+    "onnx-fp32": lambda: get_embedding(os.path.join(DEFAULT_ONNX_MODEL_DIR, FP32_MODEL_FILENAME), backend="onnx"),
+    "onnx-int8": lambda: get_embedding(os.path.join(DEFAULT_ONNX_MODEL_DIR, INT8_MODEL_FILENAME), backend="onnx"),
+}
+
+
+def load_corpus(documents_dir: str):
+    documents = []
+    for file_name in sorted(os.listdir(documents_dir)):
+        if file_name.endswith(".json"):
+            documents.extend(load_custom_json(os.path.join(documents_dir, file_name)))
+    return [doc.page_content for doc in split_documents(documents)]
+
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int):
+    # Vektor sudah dinormalisasi, jadi dot product = cosine similarity
+    scores = query_vectors @ doc_vectors.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+
+def run_backend(name, corpus, questions, k, repeats):
+    embedding = BACKENDS[name]()
+    embedding.embed_documents(corpus[:8])  # Warm-up
+
+    start = time.perf_counter()
+    doc_vectors = np.array(embedding.embed_documents(corpus))
+    ingest_s = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeats):
+        for question in questions:
+            start = time.perf_counter()
+            embedding.embed_query(question)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    query_vectors = np.array(embedding.embed_documents(questions))
+    return {
+        "docs_per_s": len(corpus) / ingest_s,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "top_k": top_k(doc_vectors, query_vectors, k),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents-dir", default="./documents")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.documents_dir)
+    questions = [item["question"] for item in EVAL_DATA]
+    print(f"📄 Corpus: {len(corpus)} chunks, {len(questions)} pertanyaan\n")
+
+    results = {}
+    for name in args.backends:
+        print(f"⏳ Benchmark backend '{name}'...")
+        results[name] = run_backend(name, corpus, questions, args.k, args.repeats)
+
+    baseline = results.get("huggingface")
+    print(f"\n{'backend':<14}{'docs/s':>10}{'p50 ms':>10}{'p95 ms':>10}{f'recall@{args.k}':>12}")
+    for name, result in results.items():
+        recall = "-"
+        if baseline:
+            overlaps = [len(a & b) / args.k for a, b in zip(result["top_k"], baseline["top_k"])]
+            recall = f"{statistics.mean(overlaps):.3f}"
+        print(f"{name:<14}{result['docs_per_s']:>10.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{recall:>12}")
+
+
+if __name__ == "__main__":
+    main()
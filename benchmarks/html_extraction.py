@@ -0,0 +1,101 @@
+"""
+Benchmark ekstraksi HTML: jalur lama vs app.html_extract.
+
+- legacy_convert : BeautifulSoup html.parser + replace_with per <a> + get_text (convert.py lama)
+- legacy_rag     : BeautifulSoupTransformer tags_to_extract (process_urls_for_rag lama)
+- lxml_walk      : extract_content (lxml, satu kali penelusuran tree)
+- cached         : extract_url dengan HTMLCache yang sudah hangat (tanpa parse ulang)
+
+HTML diambil sekali lalu semua jalur diukur atas byte yang sama, sehingga
+latensi jaringan tidak ikut terhitung (kecuali baris "cached" yang tetap
+melakukan conditional GET).
+
+    python -m benchmarks.html_extraction --urls convert_web_document/urls.txt --repeat 20
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from app.html_extract import DEFAULT_HEADERS, HTMLCache, extract_content, extract_url
+
+
+def legacy_convert(html, base_url):
+    soup = BeautifulSoup(html, "html.parser")
+    for link_tag in soup.find_all("a", href=True):
+        link_text = link_tag.get_text(strip=True)
+        if link_text:
+            link_tag.replace_with(f"{link_text} ({urljoin(base_url, link_tag.get('href'))})")
+    body = soup.find("body")
+    return body.get_text(separator="\n", strip=True) if body else ""
+
+
+def legacy_rag(html, base_url):
+    from langchain_community.document_transformers import BeautifulSoupTransformer
+    from langchain_core.documents import Document
+
+    docs = BeautifulSoupTransformer().transform_documents(
+        [Document(page_content=html.decode("utf-8", errors="ignore"), metadata={"source": base_url})],
+        tags_to_extract=["main", "article", "div.content", "p"],
+    )
+    return docs[0].page_content
+
+
+def time_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", default="convert_web_document/urls.txt")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.urls, "r", encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip()]
+
+    session = requests.Session()
+    pages = {}
+    for url in urls:
+        try:
+            response = session.get(url, headers=DEFAULT_HEADERS, timeout=15)
+            response.raise_for_status()
+            pages[url] = response.content
+        except requests.RequestException as e:
+            print(f"⚠️ Lewati {url}: {e}")
+    if not pages:
+        print("❌ Tidak ada halaman yang berhasil diambil.")
+        return
+
+    paths = {
+        "legacy_convert": lambda html, url: legacy_convert(html, url),
+        "legacy_rag": lambda html, url: legacy_rag(html, url),
+        "lxml_walk": lambda html, url: extract_content(html, url, main_only=True),
+    }
+    totals = {name: 0.0 for name in list(paths) + ["cached"]}
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = HTMLCache(cache_dir)
+        for url, html in pages.items():
+            for name, fn in paths.items():
+                totals[name] += time_ms(lambda: fn(html, url), args.repeat)
+            extract_url(url, session=session, cache=cache)  # hangatkan cache
+            totals["cached"] += time_ms(lambda: extract_url(url, session=session, cache=cache), max(1, args.repeat // 4))
+
+    print(f"{len(pages)} halaman, median per halaman (ms), dijumlah untuk semua halaman:")
+    baseline = totals["legacy_convert"]
+    for name, total in totals.items():
+        print(f"  {name:<16}{total:>10.2f}  ({baseline / total:.1f}x vs legacy_convert)" if total else f"  {name:<16}-")
+
+
+if __name__ == "__main__":
+    main()
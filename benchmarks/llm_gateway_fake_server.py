@@ -0,0 +1,107 @@
+"""
+Fake server OpenAI/Groq-compatible untuk menguji LLMGateway tanpa kuota Groq.
+
+Server menyuntikkan latency (termasuk ekor lambat) dan error 429/5xx sesuai
+argumen, lalu script mengirim banyak request paralel lewat gateway dan
+mencetak metrik per provider (retry, hedging, failover, latency).
+
+    python -m benchmarks.llm_gateway_fake_server --requests 50 --error-rate 0.2 --slow-rate 0.1
+
+Hanya server (misal untuk menjalankan api/app.py terhadapnya):
+    python -m benchmarks.llm_gateway_fake_server --serve-only --port 8089
+    GROQ_API_BASE=http://127.0.0.1:8089 GROQ_API_KEY=fake python -m api.app
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, Response, request
+from werkzeug.serving import make_server
+
+
+def create_fake_app(latency_ms: float, slow_rate: float, slow_ms: float, error_rate: float, error_status: int) -> Flask:
+    fake_app = Flask("fake_llm")
+
+    @fake_app.route("/openai/v1/chat/completions", methods=["POST"])
+    def chat_completions():
+        body = request.get_json(force=True)
+        delay = slow_ms if random.random() < slow_rate else latency_ms
+        time.sleep(delay / 1000)
+
+        if random.random() < error_rate:
+            error = {"error": {"message": "fake upstream error", "type": "fake_error"}}
+            headers = {"retry-after": "0.1"} if error_status == 429 else {}
+            return Response(json.dumps(error), status=error_status, mimetype="application/json", headers=headers)
+
+        question = body["messages"][-1]["content"]
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake-model"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"Jawaban palsu untuk: {question[:50]}"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 8, "total_tokens": 18},
+        }
+
+    return fake_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=100)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-ms", type=float, default=3000)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--serve-only", action="store_true")
+    args = parser.parse_args()
+
+    fake_app = create_fake_app(args.latency_ms, args.slow_rate, args.slow_ms, args.error_rate, args.error_status)
+    server = make_server("127.0.0.1", args.port, fake_app, threaded=True)
+    if args.serve_only:
+        print(f"🧪 Fake LLM server di http://127.0.0.1:{args.port}")
+        server.serve_forever()
+        return
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{args.port}"
+    os.environ.setdefault("GROQ_API_KEY", "fake")
+    from app.llm_gateway import gateway_stats, get_llm_gateway
+
+    gateway = get_llm_gateway(model_name="fake-model", temperature=0.0)
+
+    def one_call(i):
+        start = time.perf_counter()
+        try:
+            gateway.invoke(f"Pertanyaan nomor {i}")
+            return time.perf_counter() - start, None
+        except Exception as e:
+            return time.perf_counter() - start, e
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(one_call, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    failures = [e for _, e in results if e is not None]
+    print(f"\n✅ {args.requests - len(failures)}/{args.requests} sukses dalam {elapsed:.2f}s")
+    print(f"   Latency end-to-end maksimum: {max(t for t, _ in results):.2f}s")
+    print(json.dumps(gateway_stats(), indent=2))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
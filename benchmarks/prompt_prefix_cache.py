@@ -0,0 +1,94 @@
+"""
+Benchmark time-to-first-token (TTFT) prompt RAG: mode "legacy" vs "prefix_cache".
+
+Mensimulasikan percakapan multi-giliran (pertanyaan dari EVAL_DATA, konteks dari
+documents/*.json) dan mengukur waktu sampai token pertama di-stream. Pada mode
+prefix_cache, system prompt + riwayat membentuk prefix yang stabil antar giliran
+sehingga bisa dipakai ulang oleh cache prompt Groq atau KV cache Ollama.
+
+    python -m benchmarks.prompt_prefix_cache --backend ollama --turns 6
+    python -m benchmarks.prompt_prefix_cache --backend groq --turns 6
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.document_processor import load_custom_json
+from app.eval_dataset import EVAL_DATA
+from app.graph_builder import format_docs, get_prompt_cache_usage, render_chat_history
+from app.llm_config import DEFAULT_MODEL_NAME, get_groq_llm, get_llm
+from app.prompt import RAG_PREFIX_CACHE_PROMPT_TEMPLATE, RAG_PROMPT_TEMPLATE
+
+
+def build_prompt(mode, history, context, question):
+    if mode == "prefix_cache":
+        return RAG_PREFIX_CACHE_PROMPT_TEMPLATE.invoke(
+            {"chat_history": render_chat_history(history), "context": context, "question": question}
+        )
+    # Mode lama: riwayat (termasuk pertanyaan saat ini) di-stringify ke pesan human
+    current = HumanMessage(content=question, additional_kwargs={"timestamp": datetime.now().isoformat()})
+    return RAG_PROMPT_TEMPLATE.invoke(
+        {"chat_history": history + [current], "context": context, "question": question}
+    )
+
+
+def run_conversation(llm, mode, documents, turns):
+    history, ttfts, cached = [], [], []
+    for i in range(turns):
+        question = EVAL_DATA[i % len(EVAL_DATA)]["question"]
+        context = format_docs(documents[i * 3:(i + 1) * 3])
+        prompt = build_prompt(mode, history, context, question)
+
+        start = time.perf_counter()
+        first_token_at, answer, aggregated = None, "", None
+        for chunk in llm.stream(prompt):
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+            if isinstance(chunk, str):  # OllamaLLM men-stream string
+                answer += chunk
+            else:
+                answer += chunk.content
+                aggregated = chunk if aggregated is None else aggregated + chunk
+        ttfts.append(((first_token_at or time.perf_counter()) - start) * 1000)
+        cached.append(get_prompt_cache_usage(aggregated).get("cached_tokens", 0))
+
+        history += [
+            HumanMessage(content=question, additional_kwargs={"timestamp": datetime.now().isoformat()}),
+            AIMessage(content=answer, additional_kwargs={"timestamp": datetime.now().isoformat()}),
+        ]
+    return ttfts, cached
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["ollama", "groq"], default="ollama")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--json-file", default="./documents/informasi_umum.json")
+    args = parser.parse_args()
+
+    if args.backend == "groq":
+        llm = get_groq_llm(args.model or "llama-3.1-8b-instant", 0.1, max_tokens=64, cache=False)
+    else:
+        llm = get_llm(args.model or DEFAULT_MODEL_NAME, 0.1, num_predict=64, cache=False)
+
+    documents = load_custom_json(args.json_file)
+    if not documents:
+        print("❌ Dokumen JSON tidak ditemukan.")
+        return
+
+    print(f"{'mode':<14}{'TTFT p50':>10}{'TTFT avg':>10}{'giliran 2+':>12}{'cached tok':>12}")
+    for mode in ("legacy", "prefix_cache"):
+        ttfts, cached = run_conversation(llm, mode, documents, args.turns)
+        later = ttfts[1:] or ttfts
+        print(
+            f"{mode:<14}{statistics.median(ttfts):>10.1f}{statistics.mean(ttfts):>10.1f}"
+            f"{statistics.mean(later):>12.1f}{sum(cached):>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Ukuran & waktu serialisasi checkpoint per giliran: state dengan List[Document]
+penuh (lama) vs doc_refs (ID + skor).
+
+Memakai serializer checkpoint LangGraph (JsonPlusSerializer) atas 15 chunk
+dari documents/informasi_umum.json, sama seperti hasil retrieval default.
+
+    python -m benchmarks.state_checkpoint_size --k 15 --repeat 200
+"""
+import argparse
+import statistics
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.chunk_resolver import to_doc_refs
+from app.document_processor import load_custom_json
+
+
+def measure(serde, state, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, payload = serde.dumps_typed(state)
+        samples.append((time.perf_counter() - start) * 1000)
+    return len(payload), statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json-file", default="./documents/informasi_umum.json")
+    parser.add_argument("--k", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    documents = load_custom_json(args.json_file)[:args.k]
+    base = {
+        "question": "Apa saja laboratorium di prodi informatika?",
+        "messages": [HumanMessage(content="Apa saja laboratorium di prodi informatika?"), AIMessage(content="...")],
+        "sources": "- informasi_umum.json",
+        "query_type": "rag_query",
+    }
+    serde = JsonPlusSerializer()
+
+    print(f"{'state':<12}{'bytes':>10}{'dumps p50 ms':>15}")
+    results = {}
+    for name, state in (
+        ("document", {**base, "document": documents}),
+        ("doc_refs", {**base, "doc_refs": to_doc_refs(documents)}),
+    ):
+        results[name] = measure(serde, state, args.repeat)
+        print(f"{name:<12}{results[name][0]:>10}{results[name][1]:>15.3f}")
+
+    print(f"\nUkuran {results['document'][0] / results['doc_refs'][0]:.1f}x lebih kecil, "
+          f"serialisasi {results['document'][1] / results['doc_refs'][1]:.1f}x lebih cepat")
+
+
+if __name__ == "__main__":
+    main()
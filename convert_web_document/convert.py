@@ -1,9 +1,28 @@
+import argparse
+import hashlib
+import json
 import os
-import requests
-from bs4 import BeautifulSoup
-from docx import Document
 import re
-from urllib.parse import urljoin
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if __package__ in (None, ""):
+    # Dijalankan sebagai script (python convert_web_document/convert.py): root repo belum ada di sys.path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.html_extract import HTMLCache, extract_url
+
+DEFAULT_OUTPUT_FOLDER = "Hasil Salinan Web (dengan Link)"
+MANIFEST_FILENAME = "manifest.jsonl"
+PAGES_DIRNAME = "pages"
+JSON_FILENAME = "web_pages.json"
+
 
 def sanitize_filename(name):
     """
@@ -13,87 +32,212 @@ def sanitize_filename(name):
     cleaned_name = re.sub(r'\s+', ' ', cleaned_name).strip()
     return cleaned_name[:100]
 
-def process_urls_from_file(input_filename):
+
+def create_session(pool_size):
+    """Session dengan connection pool (keep-alive) dan retry untuk error sementara."""
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Manifest:
+    """
+    Catatan URL yang sudah selesai (url, hash konten, file JSON halaman, docx).
+    Setiap URL yang selesai ditambahkan sebagai satu baris JSONL, sehingga proses
+    yang terhenti bisa dilanjutkan tanpa menulis ulang seluruh manifest. Entri
+    terakhir untuk sebuah URL yang berlaku; `compact()` merapikan file di akhir.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Baris terakhir bisa terpotong jika proses dihentikan
+                    self.entries[entry["url"]] = entry
+        except FileNotFoundError:
+            pass
+
+    def get(self, url):
+        with self._lock:
+            return self.entries.get(url)
+
+    def update(self, url, entry):
+        entry = {"url": url, **entry}
+        with self._lock:
+            self.entries[url] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def compact(self):
+        """Menulis ulang manifest dengan satu baris per URL (sekali, di akhir proses)."""
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+
+
+def page_json_path(output_folder, base_url):
+    name = hashlib.sha1(base_url.encode("utf-8")).hexdigest()[:16] + ".json"
+    return os.path.join(output_folder, PAGES_DIRNAME, name)
+
+
+def save_docx(page, base_url, page_title, output_folder):
+    from docx import Document  # python-docx hanya diperlukan untuk output DOCX
+
+    full_path = os.path.join(output_folder, sanitize_filename(page_title) + ".docx")
+    document = Document()
+    document.add_heading(page_title, level=1)
+    document.add_paragraph(f"Konten ini disalin dari: {base_url}\n")
+
+    if page["text"]:
+        document.add_paragraph(page["text"])
+    else:
+        document.add_paragraph("Konten utama (body) tidak dapat ditemukan.")
+
+    document.save(full_path)
+    return full_path
+
+
+def convert_url(base_url, index, session, cache, manifest, output_folder, output_format, category, force):
+    """Memproses satu URL. Mengembalikan (status, entry manifest)."""
+    # Link (tag <a>) ditulis inline sebagai "teks (url absolut)" dalam satu penelusuran tree
+    page = extract_url(base_url, session=session, cache=cache, main_only=False)
+    content_hash = page.get("content_hash")
+
+    previous = manifest.get(base_url)
+    wants_docx = output_format in ("docx", "both")
+    if (
+        not force
+        and previous
+        and previous.get("content_hash") == content_hash
+        and previous.get("file") and os.path.exists(previous["file"])
+        and (not wants_docx or (previous.get("docx") and os.path.exists(previous["docx"])))
+    ):
+        return "skipped", previous
+
+    page_title = page["title"] or f"Tanpa Judul - {index + 1}"
+    # Isi halaman disimpan per file; manifest hanya mencatat path-nya
+    page_path = page_json_path(output_folder, base_url)
+    with open(page_path, "w", encoding="utf-8") as f:
+        # Format yang dibaca app.document_processor.load_custom_json
+        json.dump({
+            "page_content": page["text"],
+            "metadata": {"source": base_url, "category": category, "title": page_title},
+        }, f, ensure_ascii=False)
+
+    entry = {
+        "content_hash": content_hash,
+        "title": page_title,
+        "file": page_path,
+        "converted_at": time.time(),
+    }
+    if wants_docx:
+        entry["docx"] = save_docx(page, base_url, page_title, output_folder)
+
+    manifest.update(base_url, entry)
+    return "converted", entry
+
+
+def write_ingest_json(urls, manifest, path):
+    items = []
+    for url in urls:
+        entry = manifest.get(url)
+        if not entry or not entry.get("file") or not os.path.exists(entry["file"]):
+            continue
+        with open(entry["file"], "r", encoding="utf-8") as f:
+            item = json.load(f)
+        if item["page_content"]:
+            items.append(item)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False, indent=2)
+    print(f"🗂️ {len(items)} halaman ditulis ke '{path}' (siap untuk ingest)")
+
+
+def process_urls_from_file(
+    input_filename,
+    output_folder=DEFAULT_OUTPUT_FOLDER,
+    output_format="docx",
+    workers=8,
+    category="Web",
+    force=False,
+):
     """
     Membaca daftar URL dari file, menyalin kontennya termasuk link (href),
-    dan menyimpannya ke file Word dengan nama sesuai judul halaman.
+    dan menyimpannya ke file Word (dan/atau JSON untuk ingest) secara paralel.
+    Halaman yang tidak berubah sejak proses sebelumnya dilewati.
     """
     if not os.path.exists(input_filename):
         print(f"Error: File '{input_filename}' tidak ditemukan!")
         print("Silakan buat file tersebut dan isi dengan daftar URL (satu per baris).")
         return
 
-    output_folder = "Hasil Salinan Web (dengan Link)"
     if not os.path.exists(output_folder):
-        os.makedirs(output_folder)
         print(f"Folder '{output_folder}' dibuat untuk menyimpan hasil.")
+    os.makedirs(os.path.join(output_folder, PAGES_DIRNAME), exist_ok=True)
 
     with open(input_filename, 'r') as file:
-        urls = file.readlines()
+        urls = list(dict.fromkeys(line.strip() for line in file if line.strip()))
+
+    print(f"Ditemukan {len(urls)} URL untuk diproses ({workers} worker)...")
+
+    # HTML & teks hasil ekstraksi di-cache; halaman yang tidak berubah tidak diparse ulang
+    cache = HTMLCache()
+    session = create_session(workers)
+    manifest = Manifest(os.path.join(output_folder, MANIFEST_FILENAME))
+    counts = {"converted": 0, "skipped": 0, "failed": 0}
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                convert_url, url, i, session, cache, manifest, output_folder, output_format, category, force
+            ): url
+            for i, url in enumerate(urls)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            base_url = futures[future]
+            try:
+                status, entry = future.result()
+                counts[status] += 1
+                icon = "✅" if status == "converted" else "⏭️"
+                print(f"({done}/{len(urls)}) {icon} {status}: {base_url} -> '{entry['title']}'")
+            except requests.exceptions.RequestException as e:
+                counts["failed"] += 1
+                print(f"({done}/{len(urls)}) ❌ Gagal memproses URL {base_url}. Error: {e}")
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"({done}/{len(urls)}) ❌ Terjadi error tak terduga saat memproses {base_url}. Error: {e}")
+
+    manifest.compact()
+    if output_format in ("json", "both"):
+        write_ingest_json(urls, manifest, os.path.join(output_folder, JSON_FILENAME))
+
+    elapsed = time.perf_counter() - start
+    print(f"\n📊 {counts['converted']} dikonversi, {counts['skipped']} tidak berubah, "
+          f"{counts['failed']} gagal dalam {elapsed:.1f} detik")
 
-    print(f"Ditemukan {len(urls)} URL untuk diproses...")
-
-    for i, base_url in enumerate(urls):
-        base_url = base_url.strip()
-        if not base_url:
-            continue
-
-        print(f"\n({i+1}/{len(urls)}) Memproses URL: {base_url}")
-
-        try:
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            response = requests.get(base_url, headers=headers, timeout=15)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # --- BAGIAN BARU: Proses semua link (tag <a>) ---
-            # Cari semua tag 'a' yang memiliki atribut 'href'
-            for link_tag in soup.find_all('a', href=True):
-                link_text = link_tag.get_text(strip=True)
-                
-                # Jangan proses link jika tidak ada teksnya (misal, link pada gambar)
-                if not link_text:
-                    continue
-                    
-                # Ambil nilai href
-                href = link_tag.get('href')
-                
-                # Ubah URL relatif (misal: /profil) menjadi URL absolut
-                absolute_href = urljoin(base_url, href)
-                
-                # Buat string baru untuk menggantikan tag <a>
-                replacement_string = f"{link_text} ({absolute_href})"
-                
-                # Gantikan tag <a> dengan string yang sudah diformat
-                link_tag.replace_with(replacement_string)
-            # --- AKHIR BAGIAN BARU ---
-
-            page_title = soup.title.string if soup.title else f"Tanpa Judul - {i+1}"
-            doc_filename = sanitize_filename(page_title) + ".docx"
-            full_path = os.path.join(output_folder, doc_filename)
-
-            document = Document()
-            document.add_heading(page_title, level=1)
-            document.add_paragraph(f"Konten ini disalin dari: {base_url}\n")
-
-            body_content = soup.find('body')
-            if body_content:
-                # Sekarang get_text() akan menyertakan string link yang sudah kita format
-                all_text = body_content.get_text(separator='\n', strip=True)
-                document.add_paragraph(all_text)
-            else:
-                document.add_paragraph("Konten utama (body) tidak dapat ditemukan.")
-
-            document.save(full_path)
-            print(f"✅ Berhasil disimpan ke: '{full_path}'")
-
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Gagal memproses URL {base_url}. Error: {e}")
-        except Exception as e:
-            print(f"❌ Terjadi error tak terduga saat memproses {base_url}. Error: {e}")
 
 if __name__ == "__main__":
-    nama_file_sumber = "convert_web_document/urls.txt"
-    process_urls_from_file(nama_file_sumber)
-    print("\n--- Selesai ---")
\ No newline at end of file
+    # Dari root repo: python convert_web_document/convert.py atau python -m convert_web_document.convert
+    parser = argparse.ArgumentParser(description="Konversi halaman web ke DOCX dan/atau JSON ingest.")
+    parser.add_argument("--urls", default="convert_web_document/urls.txt")
+    parser.add_argument("--out", default=DEFAULT_OUTPUT_FOLDER)
+    parser.add_argument("--format", choices=["docx", "json", "both"], default="docx")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--category", default="Web", help="Nilai metadata 'category' untuk output JSON")
+    parser.add_argument("--force", action="store_true", help="Konversi ulang meskipun konten tidak berubah")
+    args = parser.parse_args()
+
+    process_urls_from_file(args.urls, args.out, args.format, args.workers, args.category, args.force)
+    print("\n--- Selesai ---")
@@ -3,7 +3,6 @@ import sqlite3
 import warnings
 import pandas as pd
 from langgraph.checkpoint.sqlite import SqliteSaver
-from langchain_core.messages import HumanMessage
 from langchain_groq import ChatGroq
 from ragas import evaluate, RunConfig
 from ragas.metrics import (
@@ -17,6 +16,10 @@ from datasets import Dataset
 # --- IMPORT MODUL APLIKASI ANDA ---
 # Pastikan modul ini ada di struktur project Anda
 try:
+    from app.batch import run_batch
+    from app.chunk_resolver import ChunkResolver
+    from app.embedding_batcher import BatchedEmbeddings
+    from app.eval_dataset import EVAL_DATA
     from app.graph_builder import create_graph
     from app.llm_config import get_embedding
     from app.prompt import (
@@ -25,7 +28,7 @@ try:
         GENERAL_CHAT_PROMPT_TEMPLATE,
         RAG_PROMPT_TEMPLATE,
     )
-    from app.vectorstore import get_or_create_vector_store
+    from app.vector_versions import load_current_vector_store
 except ImportError as e:
     print(f"Error Importing App Modules: {e}")
     print("Pastikan Anda menjalankan script ini dari root directory project.")
@@ -34,6 +37,9 @@ except ImportError as e:
 # Filter warnings agar output bersih
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 
+# Groq rawan rate limit; naikkan jika kuota mengizinkan
+EVAL_BATCH_CONCURRENCY = int(os.getenv("EVAL_BATCH_CONCURRENCY", "2"))
+
 
 # --- 1. CUSTOM WRAPPER UNTUK GROQ (FIX n=1 ISSUE) ---
 class SafeChatGroq(ChatGroq):
@@ -66,12 +72,11 @@ def run_evaluation():
         model="llama-3.1-8b-instant", temperature=0.1, api_key=os.getenv("GROQ_API_KEY")
     )
 
-    embedding_model = get_embedding()
+    # BatchedEmbeddings agar pertanyaan evaluasi bisa di-embed dalam satu batch (prime)
+    embedding_model = BatchedEmbeddings(get_embedding())
 
     # Load Vector Store
-    vector_store = get_or_create_vector_store(
-        embedding_model=embedding_model, documents=None, force_rebuild=False
-    )
+    vector_store = load_current_vector_store(embedding_model)
     if not vector_store:
         print("❌ Vector store not found. Please ingest data first.")
         return
@@ -80,6 +85,9 @@ def run_evaluation():
         search_type="similarity", search_kwargs={"k": 10}
     )
 
+    # Resolver ID chunk -> teks (untuk graph & pengambilan konteks evaluasi)
+    chunk_resolver = ChunkResolver(get_vector_store=lambda: vector_store)
+
     # Memory
     conn = sqlite3.connect(":memory:", check_same_thread=False)
     memory = SqliteSaver(conn)
@@ -93,137 +101,35 @@ def run_evaluation():
         classification_prompt=CLASSIFICATION_PROMPT_TEMPLATE,
         general_chat_prompt=GENERAL_CHAT_PROMPT_TEMPLATE,
         memory=memory,
+        chunk_resolver=chunk_resolver,
     )
 
     # --- 3. DATASET PENGUJIAN ---
-    eval_data = [
-        {
-            "question": "Apa saja fokus utama dari Laboratorium Sistem Cerdas di Informatika UMSIDA?",
-            "ground_truth": "Fokus utama Laboratorium Sistem Cerdas adalah Software Engineering, Programming, dan Computer Science. Aktivitasnya meliputi pengembangan basis kode video game dan alat pengembangan software.",
-        },
-        {
-            "question": "Sebutkan fasilitas umum yang tersedia di kampus UMSIDA untuk mahasiswa.",
-            "ground_truth": "Fasilitas umum di UMSIDA meliputi Masjid Kampus, Gedung Perkuliahan, Area Parkir yang luas, Ruang Baca dan Perpustakaan, serta Kantin Universitas.",
-        },
-        {
-            "question": "Berikan link untuk mengunduh Jadwal Praktikum PBO Semester Genap 2024/2025.",
-            "ground_truth": "Jadwal Praktikum PBO (Pemrograman Berorientasi Objek) Semester Genap 2024/2025 dapat diunduh melalui tautan ini: https://informatika.umsida.ac.id/wp-content/uploads/2025/03/PRAKTIKUM-PBO-2024-2025.pdf",
-        },
-        {
-            "question": "Dimana saya bisa download jadwal praktikum Jaringan Komputer?",
-            "ground_truth": "Jadwal Praktikum Jaringan Komputer (Jarkom) Semester Genap 2024/2025 tersedia di tautan berikut: https://informatika.umsida.ac.id/wp-content/uploads/2025/03/PRAKTIKUM-JARINGAN-KOMPUTER-2024-2025.pdf",
-        },
-        {
-            "question": "Bagaimana cara mengajukan surat keterangan aktif kuliah secara online?",
-            "ground_truth": "Mahasiswa dapat mengajukan Surat Aktif Kuliah melalui layanan administrasi online menggunakan formulir berikut: https://docs.google.com/forms/d/1ijKTVs1T546WU__zqqEc9JeSfj2HoGVWFqhcGaJr-bs/viewform?edit_requested=true",
-        },
-        {
-            "question": "Apa visi dari Program Studi Informatika UMSIDA?",
-            "ground_truth": "Visi Program Studi Informatika UMSIDA adalah menghasilkan lulusan yang profesional, unggul, inovatif, dan kompetitif dalam rekayasa perangkat lunak dan sistem cerdas yang adaptif terhadap perkembangan IPTEKS berdasarkan nilai-nilai Islam untuk kesejahteraan masyarakat tingkat ASEAN pada tahun 2038.",
-        },
-        {
-            "question": "Mata kuliah apa saja yang dipelajari pada semester 1?",
-            "ground_truth": "Mata kuliah pada semester 1 meliputi: Kemanusiaan dan Keimanan, Algoritma dan Pemrograman, Sistem Digital, Arsitektur Komputer, Kalkulus, dan Fisika.",
-        },
-        {
-            "question": "Sebutkan mata kuliah pilihan yang tersedia di semester 7.",
-            "ground_truth": "Mata kuliah pilihan di semester 7 meliputi Multimedia, Game Programming (Game Prog), Web Mining, dan Ethical Hacking.",
-        },
-        {
-            "question": "Apa itu program Magang Bersertifikat di UMSIDA?",
-            "ground_truth": "Program Magang Bersertifikat adalah program MBKM yang berlangsung selama 1-2 semester untuk memberikan pengalaman industri agar mahasiswa siap kerja, dimana mahasiswa dapat mengaplikasikan ilmunya dan industri mendapatkan talenta.",
-        },
-        {
-            "question": "Saya membutuhkan Sertifikat Akreditasi Informatika, dimana saya bisa mengunduhnya?",
-            "ground_truth": "Dokumen Sertifikat Akreditasi Program Studi Informatika UMSIDA dapat diunduh melalui tautan ini: https://informatika.umsida.ac.id/wp-content/uploads/2025/04/file_sertifikat_25011014431107106055201_1742941667.pdf",
-        },
-        {
-            "question": "Apakah ada dokumen SK mengenai alternatif pengganti skripsi?",
-            "ground_truth": "Ya, Surat Keputusan (SK) Alternatif Pengganti Skripsi berisi aturan mengenai jalur kelulusan non-skripsi dan dapat diunduh di sini: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/984SK-Penetapan-Kegiatan-Alternatif-sebagai-Pengganti-Tesis-Skripsi-Tugas-Akhir_11zon.pdf",
-        },
-        {
-            "question": "Minta link download untuk Template Proposal Skripsi.",
-            "ground_truth": "Template Proposal Skripsi Informatika yang berisi format baku dan aturan penulisan dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/template-proposal-skripsi-1.docx",
-        },
-        {
-            "question": "Dimana saya bisa mendapatkan formulir pendaftaran ujian proposal skripsi?",
-            "ground_truth": "Form Pendaftaran Ujian Proposal Skripsi dapat diunduh melalui tautan berikut: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/FORM-DAFTAR-UJIAN-PROPOSAL-SKRIPSI-FST.pdf",
-        },
-        {
-            "question": "Bagaimana format penulisan proposal PKL? Apakah ada panduannya?",
-            "ground_truth": "Format Penulisan Proposal PKL 2023 tersedia sebagai panduan dan template yang dapat diunduh di sini: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/Format_Penulisan_PROPOSAL_PKL-1-1.docx",
-        },
-        {
-            "question": "Apa fungsi dari surat keterangan lulus praktikum dan dimana downloadnya?",
-            "ground_truth": "Surat Keterangan Lulus Praktikum menyatakan bahwa mahasiswa telah menyelesaikan seluruh beban praktikum dan menjadi syarat mendaftar skripsi/yudisium. Dokumennya dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/SURAT-PERNYATAAN-LULUS-PRAKTIKUM-1-1.pdf",
-        },
-        {
-            "question": "Saya ingin mengajukan dispensasi SPP, apakah ada formulirnya?",
-            "ground_truth": "Ya, Form Surat Permohonan Dispensasi SPP untuk mengajukan keringanan atau penundaan pembayaran dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/02/Format-Surat-Permohonan-Dispensasi-SPP-TA-Ganjil-2023-2024-1.docx",
-        },
-        {
-            "question": "Apa peran HIMATIKA bagi mahasiswa?",
-            "ground_truth": "HIMATIKA (Himpunan Mahasiswa Informatika) adalah wadah pengembangan pola pikir, kepribadian, dan potensi intelektual mahasiswa Informatika yang berlandaskan nilai-nilai Islam.",
-        },
-        {
-            "question": "Apa itu ASLAB dan apa saja tugasnya?",
-            "ground_truth": "ASLAB adalah Asisten Laboratorium Informatika, sebuah organisasi yang bertugas mewujudkan laboratorium bermutu, menyelenggarakan praktikum, dan menyediakan sarana penelitian.",
-        },
-        {
-            "question": "Apa saja mata kuliah di semester 8?",
-            "ground_truth": "Mata kuliah di Semester 8 hanya berfokus pada pengerjaan Skripsi dengan bobot 6 SKS.",
-        },
-        {
-            "question": "Apakah ada form persetujuan dosen pembimbing skripsi?",
-            "ground_truth": "Ya, Form Persetujuan Dosen Pembimbing Skripsi sebagai bukti tertulis persetujuan dosbing dapat diunduh di: https://informatika.umsida.ac.id/wp-content/uploads/2024/05/Form-Persetujuan-Dosen-Pembimbing-Skripsi_New.docx",
-        },
-    ]
+    eval_data = EVAL_DATA
 
     test_questions = [item["question"] for item in eval_data]
     ground_truths = [item["ground_truth"] for item in eval_data]
 
     # --- 4. RUN INFERENCE (Menjalankan Chatbot Anda) ---
-    answers = []
-    contexts = []
-
-    print(f"Running inference on {len(test_questions)} questions...")
-
-    for i, question in enumerate(test_questions):
-        print(f"Processing {i+1}/{len(test_questions)}: {question}")
-
-        inputs = {"question": question, "messages": [HumanMessage(content=question)]}
-        # Gunakan thread_id unik agar memory tidak tercampur antar pertanyaan
-        config = {"configurable": {"thread_id": f"eval_user_{i}"}}
-
-        try:
-            # Invoke Graph
-            result = graph.invoke(inputs, config=config)
-
-            # Extract Answer Logic (Sesuaikan dengan struktur output graph Anda)
-            ans = ""
-            if "generation" in result and result["generation"]:
-                ans = result["generation"]
-            elif "messages" in result and len(result["messages"]) > 0:
-                # Ambil konten pesan terakhir dari AI
-                last_msg = result["messages"][-1]
-                ans = (
-                    last_msg.content if hasattr(last_msg, "content") else str(last_msg)
-                )
-            else:
-                ans = "No answer generated."
-
-            answers.append(ans)
-
-            # Extract Contexts
-            # Pastikan key 'document' atau 'documents' ada di state graph Anda
-            docs = result.get("document", [])
-            ctx = [d.page_content for d in docs]
-            contexts.append(ctx)
-
-        except Exception as e:
-            print(f"Error processing question '{question}': {e}")
-            answers.append("Error generating answer")
-            contexts.append([])
+    answers = ["Error generating answer"] * len(test_questions)
+    contexts = [[] for _ in test_questions]
+
+    print(f"Running inference on {len(test_questions)} questions ({EVAL_BATCH_CONCURRENCY} paralel)...")
+
+    # Thread_id unik per pertanyaan agar memory tidak tercampur; semua pertanyaan
+    # di-embed sekaligus lalu diproses paralel dengan batas EVAL_BATCH_CONCURRENCY
+    items = [{"thread_id": f"eval_user_{i}", "message": q} for i, q in enumerate(test_questions)]
+    for done, result in enumerate(run_batch(graph, items, EVAL_BATCH_CONCURRENCY, embedding_model), start=1):
+        i = result["index"]
+        if result.get("error"):
+            print(f"Error processing question '{test_questions[i]}': {result['error']}")
+            continue
+        print(f"Processed {done}/{len(test_questions)}: {test_questions[i]}")
+        answers[i] = result["response"] or "No answer generated."
+
+        # State graph hanya menyimpan ID chunk (doc_refs); teksnya dimuat lewat resolver
+        docs = chunk_resolver.resolve(result.get("doc_refs", []))
+        contexts[i] = [d.page_content for d in docs]
 
     # --- 5. PREPARE DATASET FOR RAGAS ---
     data = {
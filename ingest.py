@@ -1,26 +1,41 @@
 import os
-from app.document_processor import process_document_for_rag
-from app.vectorstore import get_or_create_vector_store
+from app.answer_cache import AnswerCache, changed_sources, store_source_chunk_ids
+from app.dedup import DEDUP_ENABLED, StreamingDeduplicator
+from app.document_processor import iter_chunks, process_document_for_rag
+from app.tenants import tenant_versions_root
+from app.vector_versions import DEFAULT_VERSIONS_ROOT, build_version, close_vector_store, current_version_dir, open_vector_store
+from app.vectorstore import update_chunk_metadata
 from app.llm_config import get_embedding
 
+INGEST_STREAMING = os.getenv("INGEST_STREAMING", "0") == "1"
+# Ingest untuk prodi lain: INGEST_TENANT=<tenant> INGEST_DOCUMENTS_DIR=./documents_<tenant> python ingest.py
+INGEST_TENANT = os.getenv("INGEST_TENANT")
+INGEST_DOCUMENTS_DIR = os.getenv("INGEST_DOCUMENTS_DIR", "./documents")
+
 def main():
     print("🔄 Memulai proses Ingest Data ke Vector Store...")
     
     # 1. Proses Dokumen (PDF & JSON)
     # Pastikan folder documents ada dan berisi file yang ingin diproses
-    local_docs_dir = "./documents"
+    local_docs_dir = INGEST_DOCUMENTS_DIR
     if not os.path.exists(local_docs_dir):
         print(f"❌ Direktori {local_docs_dir} tidak ditemukan.")
         return
 
     print(f"📂 Membaca dokumen dari {local_docs_dir}...")
-    document_chunks = process_document_for_rag(local_dir=local_docs_dir)
-    
-    if not document_chunks:
-        print("⚠️ Tidak ada dokumen yang ditemukan atau diproses.")
-        return
+    deduplicator = None
+    if INGEST_STREAMING:
+        # Mode streaming: dokumen dimuat, dipecah & ditulis per batch (memori tetap datar)
+        deduplicator = StreamingDeduplicator() if DEDUP_ENABLED else None
+        document_chunks = iter_chunks(local_dir=local_docs_dir, deduplicator=deduplicator)
+    else:
+        document_chunks = process_document_for_rag(local_dir=local_docs_dir)
+
+        if not document_chunks:
+            print("⚠️ Tidak ada dokumen yang ditemukan atau diproses.")
+            return
 
-    print(f"📄 Total chunks dokumen yang akan disimpan: {len(document_chunks)}")
+        print(f"📄 Total chunks dokumen yang akan disimpan: {len(document_chunks)}")
 
     # 2. Inisialisasi Embedding Model
     embedding_model = get_embedding()
@@ -28,16 +43,28 @@ def main():
         print("❌ Gagal memuat model embedding.")
         return
 
-    # 3. Simpan ke Vector Store (Force Rebuild untuk memastikan data bersih dan terupdate)
-    # force_rebuild=True akan menghapus database lama dan membuat baru dengan data terbaru
-    print("💾 Menyimpan ke ChromaDB...")
-    vector_store = get_or_create_vector_store(
+    # 3. Simpan ke Vector Store sebagai versi baru (blue/green)
+    # Versi aktif tetap dilayani server sampai versi baru lolos validasi dan pointer dipindah
+    versions_root = tenant_versions_root(INGEST_TENANT) if INGEST_TENANT else DEFAULT_VERSIONS_ROOT
+    # ID chunk per sumber di versi aktif, untuk invalidasi cache yang hanya menyentuh sumber yang berubah
+    live_dir = current_version_dir(versions_root)
+    live_chunk_ids = {}
+    if live_dir:
+        live_store = open_vector_store(live_dir, embedding_model)
+        live_chunk_ids = store_source_chunk_ids(live_store)
+        close_vector_store(live_store)
+    print(f"💾 Menyimpan ke ChromaDB ({versions_root})...")
+    vector_store = build_version(
         embedding_model=embedding_model,
         documents=document_chunks,
-        force_rebuild=True 
+        root=versions_root,
+        # Sumber duplikat yang dilewati dedup streaming ditulis ke chunk yang dipertahankan
+        after_write=(lambda store: update_chunk_metadata(store, deduplicator.merged_metadata())) if deduplicator else None,
     )
 
     if vector_store:
+        # Hanya jawaban dari sumber yang chunk-nya berubah yang tidak lagi valid
+        AnswerCache().invalidate_sources(changed_sources(live_chunk_ids, store_source_chunk_ids(vector_store)))
         print("✅ Ingest Data Selesai! Database vector telah diperbarui.")
     else:
         print("❌ Gagal menyimpan ke vector store.")
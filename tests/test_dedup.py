@@ -0,0 +1,49 @@
+from langchain_core.documents import Document
+
+from app.answer_cache import get_document_sources
+from app.dedup import MERGED_SOURCES_KEY, StreamingDeduplicator, deduplicate_chunks, merged_fields
+from app.vectorstore import get_document_id
+
+TEXT = (
+    "Mahasiswa dapat mengajukan surat aktif kuliah secara online melalui portal layanan "
+    "akademik dengan melampirkan kartu rencana studi semester berjalan dan bukti pembayaran."
+)
+
+
+def _chunks():
+    return [
+        Document(page_content=TEXT, metadata={"source": "layanan.json", "url": "https://a.example/layanan"}),
+        Document(page_content="Jadwal praktikum laboratorium diumumkan setiap awal semester.", metadata={"source": "jadwal.json"}),
+        Document(page_content=TEXT + " ", metadata={"source": "faq.json", "url": "https://b.example/faq"}),
+        Document(page_content=TEXT, metadata={"source_file": "Layanan Kemahasiswaan.pdf", "source": "Layanan Kemahasiswaan.pdf"}),
+    ]
+
+
+def test_streaming_dedup_keeps_sources_of_dropped_duplicates():
+    deduplicator = StreamingDeduplicator()
+    kept = [chunk for chunk in _chunks() if not deduplicator.is_duplicate(chunk)]
+    assert [chunk.metadata["source"] for chunk in kept] == ["layanan.json", "jadwal.json"]
+
+    merged = deduplicator.merged_metadata()
+    assert list(merged) == [get_document_id(kept[0])]
+    fields = merged[get_document_id(kept[0])]
+    assert fields[MERGED_SOURCES_KEY] == "layanan.json | faq.json | Layanan Kemahasiswaan.pdf"
+    assert fields["urls"] == "https://a.example/layanan | https://b.example/faq"
+
+    written = Document(page_content=kept[0].page_content, metadata={**kept[0].metadata, **fields})
+    assert get_document_sources(written) == ["layanan.json", "faq.json", "Layanan Kemahasiswaan.pdf"]
+
+
+def test_streaming_and_batch_dedup_merge_the_same_fields():
+    deduplicator = StreamingDeduplicator()
+    for chunk in _chunks():
+        deduplicator.is_duplicate(chunk)
+
+    batch = deduplicate_chunks(_chunks())
+    representative = next(doc for doc in batch if MERGED_SOURCES_KEY in doc.metadata)
+    streaming_fields = next(iter(deduplicator.merged_metadata().values()))
+    assert set(representative.metadata[MERGED_SOURCES_KEY].split(" | ")) == set(streaming_fields[MERGED_SOURCES_KEY].split(" | "))
+
+
+def test_merged_fields_single_source_is_empty():
+    assert merged_fields([{"source": "a.json"}, {"source": "a.json"}]) == {}
@@ -0,0 +1,107 @@
+import operator
+import sqlite3
+from datetime import datetime, timezone
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
+
+from app.serde import TYPE_COMPACT, TYPE_COMPACT_ZSTD, CompactSerializer, migrate_checkpoints
+
+
+def _sample_values():
+    return {
+        "messages": [
+            HumanMessage(content="Berapa SKS minimal untuk lulus?"),
+            AIMessage(
+                content="Minimal 144 SKS.",
+                id="msg-1",
+                tool_calls=[{"name": "search", "args": {"q": "sks"}, "id": "call-1"}],
+                response_metadata={"model": "llama3"},
+            ),
+        ],
+        "documents": [Document(page_content="Kurikulum 144 SKS " * 50, metadata={"source": "kurikulum.json"}, id="doc-1")],
+        "send": Send("answer_rag", {"question": "sks"}),
+        "created_at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "tags": {"a", "b"},
+    }
+
+
+@pytest.mark.parametrize("zstd_min_bytes", [0, 10**9])
+def test_round_trip(zstd_min_bytes):
+    serde = CompactSerializer(zstd_min_bytes=zstd_min_bytes)
+    values = _sample_values()
+
+    type_, payload = serde.dumps_typed(values)
+    assert type_ == (TYPE_COMPACT_ZSTD if zstd_min_bytes == 0 else TYPE_COMPACT)
+
+    restored = serde.loads_typed((type_, payload))
+    assert restored == values
+    assert type(restored["messages"][0]) is HumanMessage
+    assert type(restored["messages"][1]) is AIMessage
+    assert type(restored["documents"][0]) is Document
+    assert type(restored["send"]) is Send
+    assert restored["created_at"].tzinfo is not None
+
+
+def test_reads_jsonplus_payloads():
+    values = _sample_values()
+    assert CompactSerializer().loads_typed(JsonPlusSerializer().dumps_typed(values)) == values
+
+
+class _State(TypedDict):
+    messages: Annotated[List, operator.add]
+    documents: List[Document]
+
+
+def _build_graph(checkpointer):
+    def answer(state: _State):
+        question = state["messages"][-1].content
+        return {
+            "messages": [AIMessage(content=f"Jawaban: {question}")],
+            "documents": [Document(page_content=question, metadata={"source": "faq.json"})],
+        }
+
+    graph = StateGraph(_State)
+    graph.add_node("answer", answer)
+    graph.add_edge(START, "answer")
+    graph.add_edge("answer", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def test_migrate_checkpoints_preserves_state(tmp_path):
+    db_path = str(tmp_path / "chat_history.sqlite")
+    config = {"configurable": {"thread_id": "mahasiswa-1"}}
+
+    with sqlite3.connect(db_path, check_same_thread=False) as conn:
+        graph = _build_graph(SqliteSaver(conn, serde=JsonPlusSerializer()))
+        for question in ("Apa itu KRS?", "Kapan batas pengisian KRS?"):
+            graph.invoke({"messages": [HumanMessage(content=question)], "documents": []}, config=config)
+        before = graph.get_state(config)
+        history_before = [snapshot.values for snapshot in graph.get_state_history(config)]
+    conn.close()
+
+    stats = migrate_checkpoints(db_path, backup=False)
+    assert stats["migrated"] > 0
+
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        types = {row[0] for row in conn.execute("SELECT type FROM checkpoints")}
+        assert types <= {TYPE_COMPACT, TYPE_COMPACT_ZSTD}
+
+        graph = _build_graph(SqliteSaver(conn, serde=CompactSerializer()))
+        after = graph.get_state(config)
+        assert after.values == before.values
+        assert after.next == before.next
+        assert after.config == before.config
+        assert [snapshot.values for snapshot in graph.get_state_history(config)] == history_before
+    finally:
+        conn.close()
+
+    # Migrasi kedua tidak mengubah apa pun
+    assert migrate_checkpoints(db_path, backup=False)["migrated"] == 0